@@ -0,0 +1,207 @@
+"""
+Contract Intelligence API
+ASGI service for submitting contracts and querying extraction results
+
+Usage:
+    uvicorn api:app --host 0.0.0.0 --port 8000
+"""
+
+import asyncio
+import os
+import threading
+from functools import partial
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from fastapi import FastAPI, File, Form, HTTPException, Query, UploadFile
+
+from src.config import load_environment
+from src.contract_validator import validate_contract
+from src.database import ContractDatabase, open_contract_database
+from src.group_commit import GroupCommitWriter
+from src.jobs import DONE, JobQueue, WorkerPool, new_session_id, process_contract_job
+
+load_environment()
+
+DB_PATH = os.getenv("DATABASE_PATH", "data/contracts.db")
+
+# Database calls running at once; further requests wait instead of piling up threads
+MAX_CONCURRENT_QUERIES = int(os.getenv("API_MAX_CONCURRENCY", 8))
+
+MAX_UPLOAD_BYTES = int(os.getenv("API_MAX_UPLOAD_MB", 20)) * 1024 * 1024
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+_local = threading.local()
+_state = {}
+
+
+def get_db() -> ContractDatabase:
+    """Get this thread's database (SQLite connections are not shared across threads)."""
+    db = getattr(_local, 'db', None)
+    if db is None:
+        db = open_contract_database(DB_PATH)
+        _local.db = db
+    return db
+
+
+async def run_query(func, *args, **kwargs):
+    """Run a blocking call in the thread pool, bounded by MAX_CONCURRENT_QUERIES."""
+    async with _state['query_slots']:
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    queue = JobQueue()
+    pool = WorkerPool(queue, partial(process_contract_job, db_path=DB_PATH))
+    pool.start()
+    _state['queue'] = queue
+    _state['writer'] = GroupCommitWriter(DB_PATH)
+    _state['query_slots'] = asyncio.Semaphore(MAX_CONCURRENT_QUERIES)
+    _state['saving'] = set()
+    yield
+    pool.stop(timeout=5)
+    _state['writer'].close(timeout=5)
+
+
+app = FastAPI(title="Contract Intelligence API", lifespan=lifespan)
+
+
+async def read_upload(upload: UploadFile) -> bytes:
+    """Read an upload chunk by chunk, stopping as soon as it exceeds MAX_UPLOAD_BYTES."""
+    chunks, size = [], 0
+    while True:
+        chunk = await upload.read(min(UPLOAD_CHUNK_BYTES, MAX_UPLOAD_BYTES + 1 - size))
+        if not chunk:
+            return b"".join(chunks)
+        size += len(chunk)
+        if size > MAX_UPLOAD_BYTES:
+            raise HTTPException(413, f"{upload.filename} exceeds {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+        chunks.append(chunk)
+
+
+@app.post("/jobs", status_code=202)
+async def submit_contracts(files: List[UploadFile] = File(...), client_id: Optional[str] = Form(None)):
+    """Queue PDFs for extraction. Poll /jobs/{id} for results."""
+    client_id = client_id or new_session_id()
+    uploads = []
+    for upload in files:
+        content = await read_upload(upload)
+        if not content.startswith(b"%PDF"):
+            raise HTTPException(400, f"{upload.filename} is not a PDF")
+        uploads.append((upload.filename, content))
+
+    queue = _state['queue']
+    jobs = []
+    for filename, content in uploads:
+        job_id = await run_query(queue.enqueue, client_id, filename, content)
+        jobs.append({'id': job_id, 'filename': filename, 'status': 'queued'})
+    return {'client_id': client_id, 'jobs': jobs}
+
+
+@app.get("/jobs")
+async def list_jobs(client_id: str):
+    """List a client's jobs, oldest first."""
+    return await run_query(_state['queue'].get_session_jobs, client_id)
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: int):
+    """Get a job's progress and, once done, its extracted data."""
+    job = await run_query(_state['queue'].get_job, job_id)
+    if job is None:
+        raise HTTPException(404, "Job not found")
+    return job
+
+
+def _save_job(job: dict) -> dict:
+    db = get_db()
+    if db.get_contract_by_filename(job['filename']):
+        raise HTTPException(409, f"Contract '{job['filename']}' already exists")
+
+    extracted_data = job['result']['data']
+    is_valid, errors, warnings = validate_contract(extracted_data)
+    if errors:
+        raise HTTPException(422, {'errors': errors, 'warnings': warnings})
+
+    contract_id = _state['writer'].insert_contract(
+        filename=job['filename'],
+        contract_data=extracted_data,
+        signature=job['result']['signature']
+    )
+    from src.semantic_search import index_contract
+    index_contract(contract_id, extracted_data)
+    _state['queue'].mark_saved(job['id'], contract_id)
+    return {'contract_id': contract_id, 'warnings': warnings}
+
+
+@app.post("/jobs/{job_id}/save", status_code=201)
+async def save_job(job_id: int):
+    """Validate a finished job's data and store it as a contract."""
+    job = await run_query(_state['queue'].get_job, job_id)
+    if job is None:
+        raise HTTPException(404, "Job not found")
+    if job['status'] != DONE:
+        raise HTTPException(409, f"Job is {job['status']}")
+
+    # Only saves of the same file are exclusive, so different files share group commits
+    # (no await between the check and the add, so the event loop makes this atomic)
+    if job['filename'] in _state['saving']:
+        raise HTTPException(409, f"Contract '{job['filename']}' is already being saved")
+    _state['saving'].add(job['filename'])
+    try:
+        return await run_query(_save_job, job)
+    finally:
+        _state['saving'].discard(job['filename'])
+
+
+@app.get("/contracts")
+async def list_contracts(
+    q: Optional[str] = None,
+    vendor_id: Optional[int] = None,
+    contract_type: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0)
+):
+    """Page through contracts, newest first, filtered by text, vendor or type."""
+    contracts, total = await run_query(
+        lambda: get_db().get_contracts_page(limit, offset, q, vendor_id, contract_type)
+    )
+    return {'total': total, 'limit': limit, 'offset': offset, 'contracts': contracts}
+
+
+@app.get("/contracts/search")
+async def semantic_search(q: str, top_k: int = Query(10, ge=1, le=100)):
+    """Find contracts by meaning of deliverables, type and terms."""
+    def search():
+        from src.semantic_search import get_index
+        db = get_db()
+        results = []
+        for contract_id, score in get_index().search(q, top_k=top_k):
+            contract = db.get_contract_by_id(contract_id)
+            if contract:
+                results.append({**contract, 'score': score})
+        return results
+
+    return await run_query(search)
+
+
+@app.get("/contracts/{contract_id}")
+async def get_contract(contract_id: int):
+    """Get one contract."""
+    contract = await run_query(lambda: get_db().get_contract_by_id(contract_id))
+    if contract is None:
+        raise HTTPException(404, "Contract not found")
+    return contract
+
+
+@app.get("/aggregates")
+async def get_aggregates(top_vendors: int = Query(10, ge=1, le=100)):
+    """Contract counts by vendor, type and upload month."""
+    return await run_query(lambda: get_db().get_aggregates(top_vendors=top_vendors))
+
+
+@app.get("/health")
+async def health():
+    """Liveness check with the number of queued or running jobs."""
+    return {'status': 'ok', 'pending_jobs': await run_query(_state['queue'].count_pending)}
@@ -4,9 +4,15 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
 
-from src.simple_extractor import extract_contract_simple
-from src.database import ContractDatabase
+from src.config import load_environment
+from src.database import open_contract_database
+from src.group_commit import GroupCommitWriter
 from src.contract_validator import validate_contract
+from src.jobs import FAILED, JobQueue, WorkerPool, hash_content, new_session_id
+from src import profiling
+
+# Read .env before checking settings such as PROFILE_DIR below
+load_environment()
 
 st.set_page_config(
     page_title="Contract Intelligence System",
@@ -37,136 +43,265 @@ page = st.sidebar.radio(
 )
 
 st.sidebar.markdown("---")
-db = ContractDatabase("data/contracts.db")
+db = open_contract_database("data/contracts.db")
 total_contracts = db.get_contract_count()
 st.sidebar.metric("Total Contracts", total_contracts)
 
+
+@st.cache_resource
+def get_job_queue():
+    """Shared job queue with its worker pool (one per server process)."""
+    job_queue = JobQueue()
+    WorkerPool(job_queue).start()
+    return job_queue
+
+
+@st.cache_resource
+def get_contract_writer():
+    """Shared writer that group-commits saves from every session (one per server process)."""
+    return GroupCommitWriter("data/contracts.db")
+
+
+if profiling.is_profiling_enabled():
+    st.sidebar.markdown("---")
+    st.sidebar.caption(f"Profiling to: {profiling.get_session().run_dir}")
+    if st.sidebar.button("Write Profile Report"):
+        report_path = profiling.get_session().write_report()
+        st.sidebar.success(f"Report written: {report_path}")
+
 st.markdown("---")
 st.markdown("Powered by OpenAI GPT-4o-mini")
 
 if page == "Upload Contract":
     st.markdown("---")
-    st.subheader("Upload Contract")
+    st.subheader("Upload Contracts")
+
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = new_session_id()
+    job_queue = get_job_queue()
 
-    uploaded_file = st.file_uploader(
-        "Choose a PDF file",
+    uploaded_files = st.file_uploader(
+        "Choose PDF files",
         type=['pdf'],
-        help="Upload a contract in PDF format"
+        accept_multiple_files=True,
+        help="Upload one or more contracts in PDF format"
     )
 
-    if uploaded_file is not None:
-        st.success(f"File uploaded: {uploaded_file.name}")
-        
-        temp_dir = Path("temp_uploads")
-        temp_dir.mkdir(exist_ok=True)
-        temp_path = temp_dir / uploaded_file.name
-        
-        with open(temp_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
+    if uploaded_files:
+        st.success(f"{len(uploaded_files)} file(s) uploaded")
         
         if st.button("Extract Contract Data"):
-            with st.spinner("Extracting data..."):
-                try:
-                    extracted_data = extract_contract_simple(str(temp_path))
-                    st.session_state.extracted_data = extracted_data
-                    st.session_state.uploaded_filename = uploaded_file.name
-                    st.success("Extraction successful!")
-                except Exception as e:
-                    st.error(f"Extraction failed: {str(e)}")
-        
-        if 'extracted_data' in st.session_state:
-            extracted_data = st.session_state.extracted_data
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.markdown("**Vendor Information**")
-                st.info(f"**Vendor:** {extracted_data.get('vendor_name', 'N/A')}")
-                st.info(f"**Contract Number:** {extracted_data.get('contract_number', 'N/A')}")
-                st.info(f"**Contract Type:** {extracted_data.get('contract_type', 'N/A')}")
+            # Uploads stay in memory: each is hashed once per session and handed to
+            # the queue as a buffer, with no temp files and no re-reads on rerun
+            upload_hashes = st.session_state.setdefault('upload_hashes', {})
+            # A failed job does not block retrying the same file
+            queued_hashes = {
+                job['content_hash'] for job in job_queue.get_session_jobs(st.session_state.session_id)
+                if job['status'] != FAILED
+            }
+            queued = 0
             
-            with col2:
-                st.markdown("**Financial & Dates**")
-                st.info(f"**Total Amount:** {extracted_data.get('total_amount', 'N/A')}")
-                st.info(f"**Payment Terms:** {extracted_data.get('payment_terms', 'N/A')}")
-                st.info(f"**Effective Date:** {extracted_data.get('effective_date', 'N/A')}")
-                st.info(f"**Expiration Date:** {extracted_data.get('expiration_date', 'N/A')}")
+            for uploaded_file in uploaded_files:
+                upload_id = getattr(uploaded_file, 'file_id', None) or (uploaded_file.name, uploaded_file.size)
+                if upload_id not in upload_hashes:
+                    upload_hashes[upload_id] = hash_content(uploaded_file.getbuffer())
+                content_hash = upload_hashes[upload_id]
+                
+                if content_hash in queued_hashes:
+                    st.info(f"{uploaded_file.name} is already queued")
+                    continue
+                
+                job_queue.enqueue(
+                    st.session_state.session_id,
+                    uploaded_file.name,
+                    uploaded_file.getbuffer(),
+                    content_hash=content_hash
+                )
+                queued_hashes.add(content_hash)
+                queued += 1
             
-            st.markdown("**Key Deliverables**")
-            st.text_area(
-                "Deliverables",
-                value=extracted_data.get('key_deliverables', 'N/A'),
-                height=100,
-                disabled=True
+            if queued:
+                st.info(f"Queued {queued} file(s). You can keep working while they are processed.")
+
+    def show_extracted_data(job):
+        extracted_data = job['result']['data']
+        
+        for match in job['result']['duplicates']:
+            st.warning(
+                f"Near-duplicate of '{match['filename']}' (ID: {match['id']}, "
+                f"{match['similarity']:.0%} similar)."
             )
+        
+        if job['result'].get('repaired'):
+            st.info(f"Re-checked against the contract and corrected: {', '.join(job['result']['repaired'])}")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("**Vendor Information**")
+            st.info(f"**Vendor:** {extracted_data.get('vendor_name', 'N/A')}")
+            st.info(f"**Contract Number:** {extracted_data.get('contract_number', 'N/A')}")
+            st.info(f"**Contract Type:** {extracted_data.get('contract_type', 'N/A')}")
+        
+        with col2:
+            st.markdown("**Financial & Dates**")
+            st.info(f"**Total Amount:** {extracted_data.get('total_amount', 'N/A')}")
+            st.info(f"**Payment Terms:** {extracted_data.get('payment_terms', 'N/A')}")
+            st.info(f"**Effective Date:** {extracted_data.get('effective_date', 'N/A')}")
+            st.info(f"**Expiration Date:** {extracted_data.get('expiration_date', 'N/A')}")
+        
+        st.markdown("**Key Deliverables**")
+        st.text_area(
+            "Deliverables",
+            value=extracted_data.get('key_deliverables', 'N/A'),
+            height=100,
+            disabled=True,
+            key=f"deliverables_{job['id']}"
+        )
+        
+        if st.button("Save to Database", key=f"save_{job['id']}"):
+            save_job(job)
+
+    def save_job(job):
+        extracted_data = job['result']['data']
+        
+        # Check if file already exists
+        existing_contracts = db.get_all_contracts()
+        already_exists = any(c['filename'] == job['filename'] for c in existing_contracts)
+        
+        if already_exists:
+            st.warning(f"Contract '{job['filename']}' already exists in database!")
+            st.info("This file has already been processed. Use Contract History to view existing data.")
+            return
+        
+        # Validate before saving
+        is_valid, errors, warnings = validate_contract(extracted_data)
+        
+        # Show validation results
+        if errors:
+            st.error("Validation Errors - Cannot Save:")
+            for error in errors:
+                st.error(f"  - {error}")
+        
+        if warnings:
+            st.warning("Validation Warnings:")
+            for warning in warnings:
+                st.warning(f"  - {warning}")
+        
+        # Only save if no critical errors
+        if not errors:
+            if warnings:
+                st.info("Contract has warnings but will be saved. Please review manually.")
             
-            st.markdown("---")
-            
-            if st.button("Save to Database"):
-                # Check if file already exists
-                existing_contracts = db.get_all_contracts()
-                already_exists = any(c['filename'] == st.session_state.uploaded_filename for c in existing_contracts)
+            try:
+                contract_id = get_contract_writer().insert_contract(
+                    filename=job['filename'],
+                    contract_data=extracted_data,
+                    signature=job['result']['signature']
+                )
+                from src.semantic_search import index_contract
+                index_contract(contract_id, extracted_data)
+                job_queue.mark_saved(job['id'], contract_id)
                 
-                if already_exists:
-                    st.warning(f"Contract '{st.session_state.uploaded_filename}' already exists in database!")
-                    st.info("This file has already been processed. Use Contract History to view existing data.")
-                else:
-                    # Validate before saving
-                    is_valid, errors, warnings = validate_contract(extracted_data)
-                    
-                    # Show validation results
-                    if errors:
-                        st.error("Validation Errors - Cannot Save:")
-                        for error in errors:
-                            st.error(f"  - {error}")
-                    
-                    if warnings:
-                        st.warning("Validation Warnings:")
-                        for warning in warnings:
-                            st.warning(f"  - {warning}")
-                    
-                    # Only save if no critical errors
-                    if not errors:
-                        if warnings:
-                            st.info("Contract has warnings but will be saved. Please review manually.")
-                        
-                        try:
-                            contract_id = db.insert_contract(
-                                filename=st.session_state.uploaded_filename,
-                                contract_data=extracted_data
-                            )
-                            st.balloons()
-                            st.success(f"Contract saved successfully! (ID: {contract_id})")
-                            
-                            # Show validation summary
-                            if warnings:
-                                st.info(f"Saved with {len(warnings)} warning(s). Manual review recommended.")
-                            
-                            del st.session_state.extracted_data
-                            del st.session_state.uploaded_filename
-                        except Exception as e:
-                            st.error(f"Error saving: {str(e)}")
-                    else:
-                        st.error("Cannot save contract with critical errors. Please fix issues first.")
+                st.balloons()
+                st.success(f"Contract saved successfully! (ID: {contract_id})")
+                
+                # Show validation summary
+                if warnings:
+                    st.info(f"Saved with {len(warnings)} warning(s). Manual review recommended.")
+            except Exception as e:
+                st.error(f"Error saving: {str(e)}")
+        else:
+            st.error("Cannot save contract with critical errors. Please fix issues first.")
+
+    def job_status_panel():
+        jobs = job_queue.get_session_jobs(st.session_state.session_id)
+        if not jobs:
+            return
+        
+        st.markdown("---")
+        st.markdown("**Extraction Jobs**")
+        
+        for job in jobs:
+            if job['status'] in ('queued', 'running'):
+                label = "Waiting in queue" if job['status'] == 'queued' else job['stage'] or "Starting"
+                st.progress(job['progress'], text=f"{job['filename']}: {label}")
+            elif job['status'] == 'failed':
+                st.error(f"{job['filename']}: Extraction failed: {job['error']}")
+            elif job['status'] == 'saved':
+                st.success(f"{job['filename']}: Saved (ID: {job['contract_id']})")
+            else:
+                with st.expander(f"✅ {job['filename']}", expanded=len(jobs) == 1):
+                    show_extracted_data(job)
+        
+        return any(job['status'] in ('queued', 'running') for job in jobs)
+
+    # Poll job progress without rerunning the whole page when fragments are available
+    session_jobs_pending = job_queue.count_pending(st.session_state.session_id)
+    if session_jobs_pending and hasattr(st, 'fragment'):
+        @st.fragment(run_every=2)
+        def poll_jobs():
+            if not job_status_panel():
+                st.rerun()
+        poll_jobs()
+    elif job_status_panel():
+        st.button("Refresh Status")
 
 elif page == "Contract History":
     st.markdown("---")
     st.subheader("Contract History")
     
-    contracts = db.get_all_contracts()
+    from src.snapshot import load_contracts_dataframe
+    df = load_contracts_dataframe(db)
     
-    if not contracts:
+    if df.empty:
         st.warning("No contracts in database yet. Upload your first contract!")
     else:
         import pandas as pd
-        df = pd.DataFrame(contracts)
+        
+        st.markdown("### Semantic Search")
+        semantic_query = st.text_input(
+            "Describe what you're looking for",
+            placeholder="e.g. cloud migration services",
+            help="Matches contracts by meaning of deliverables and type, not exact words"
+        )
+        
+        if semantic_query:
+            from src.semantic_search import get_index
+            
+            matches = get_index().search(semantic_query, top_k=10)
+            if matches:
+                scores = dict(matches)
+                match_df = df[df['id'].isin(scores)].copy()
+                match_df['score'] = match_df['id'].map(scores)
+                match_df = match_df.sort_values('score', ascending=False)
+                st.dataframe(
+                    match_df[['score', 'id', 'filename', 'vendor_name', 'contract_type', 'key_deliverables']],
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={
+                        "score": st.column_config.ProgressColumn("Relevance", min_value=0.0, max_value=1.0, format="%.2f"),
+                        "id": "ID",
+                        "filename": "File",
+                        "vendor_name": "Vendor",
+                        "contract_type": "Type",
+                        "key_deliverables": "Deliverables"
+                    }
+                )
+            else:
+                st.info("No matching contracts. Run `python -m src.semantic_search --rebuild` if the index is empty.")
         
         st.markdown("### Filters")
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            vendors = ['All'] + sorted(df['vendor_name'].dropna().unique().tolist())
-            selected_vendor = st.selectbox("Filter by Vendor", vendors)
+            vendor_names = {v['id']: v['canonical_name'] for v in db.get_vendors()}
+            vendor_options = ['All'] + sorted(vendor_names, key=lambda vid: vendor_names[vid].lower())
+            selected_vendor = st.selectbox(
+                "Filter by Vendor",
+                vendor_options,
+                format_func=lambda vid: vid if vid == 'All' else vendor_names[vid]
+            )
         
         with col2:
             types = ['All'] + sorted(df['contract_type'].dropna().unique().tolist())
@@ -179,7 +314,7 @@ elif page == "Contract History":
         filtered_df = df.copy()
         
         if selected_vendor != 'All':
-            filtered_df = filtered_df[filtered_df['vendor_name'] == selected_vendor]
+            filtered_df = filtered_df[filtered_df['vendor_id'] == selected_vendor]
         
         if selected_type != 'All':
             filtered_df = filtered_df[filtered_df['contract_type'] == selected_type]
@@ -219,7 +354,7 @@ elif page == "Contract History":
         st.markdown("---")
         st.markdown("### Export Data")
         
-        export_format = st.selectbox("Format", ["CSV", "Excel", "JSON"])
+        export_format = st.selectbox("Format", ["CSV", "Excel", "JSON", "Parquet"])
         
         if st.button("Export Contracts", type="primary"):
             from datetime import datetime
@@ -248,28 +383,38 @@ elif page == "Contract History":
                 )
             
             elif export_format == "JSON":
-                json_str = filtered_df.to_json(orient='records', indent=2)
+                json_str = filtered_df.to_json(orient='records', indent=2, date_format='iso')
                 st.download_button(
                     label="Download JSON",
                     data=json_str,
                     file_name=f"contracts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
                     mime="application/json"
                 )
+            
+            elif export_format == "Parquet":
+                from io import BytesIO
+                output = BytesIO()
+                filtered_df.to_parquet(output, index=False)
+                
+                st.download_button(
+                    label="Download Parquet",
+                    data=output.getvalue(),
+                    file_name=f"contracts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.parquet",
+                    mime="application/vnd.apache.parquet"
+                )
 
 elif page == "Dashboard":
     st.markdown("---")
     st.subheader("Analytics Dashboard")
     
-    contracts = db.get_all_contracts()
+    from src.snapshot import load_contracts_dataframe
+    df = load_contracts_dataframe(db)
     
-    if not contracts:
+    if df.empty:
         st.warning("No contracts to analyze yet. Upload contracts first!")
     else:
-        import pandas as pd
         import plotly.express as px
         
-        df = pd.DataFrame(contracts)
-        
         st.markdown("### Key Metrics")
         col1, col2, col3, col4 = st.columns(4)
         
@@ -281,12 +426,11 @@ elif page == "Dashboard":
             st.metric("With Amount", with_amounts)
         
         with col3:
-            unique_vendors = df['vendor_name'].nunique()
+            unique_vendors = df['vendor_id'].nunique()
             st.metric("Unique Vendors", unique_vendors)
         
         with col4:
             from datetime import datetime, timedelta
-            df['upload_date'] = pd.to_datetime(df['upload_date'])
             recent = df[df['upload_date'] > datetime.now() - timedelta(days=7)].shape[0]
             st.metric("Last 7 Days", recent)
         
@@ -309,7 +453,7 @@ elif page == "Dashboard":
         
         with col2:
             st.markdown("### Top Vendors")
-            vendor_counts = df['vendor_name'].value_counts().head(10).reset_index()
+            vendor_counts = df['vendor_canonical_name'].value_counts().head(10).reset_index()
             vendor_counts.columns = ['Vendor', 'Count']
             
             fig = px.bar(
@@ -1,32 +1,64 @@
 
 import os
+import argparse
 from pathlib import Path
-from src.simple_extractor import extract_contract_simple
-from src.database import ContractDatabase
+from src.backends import extract_with_backend
+from src.artifacts import artifacts_enabled, document_hash, get_artifact_store, load_text_pages
+from src.llm_client import capture_responses
+from src.pdf_text import join_pages
+from src.rate_limiter import get_rate_limiter
+from src.llm_client import latency_stats
+from src.prompts import format_usage, usage_stats
+from src.near_duplicates import compute_signature, get_threshold
+from src.semantic_search import index_contract
+from src.database import open_contract_database
+from src import profiling
 
 # Define the contracts folder
 CONTRACTS_FOLDER = "data/contracts"
 
+parser = argparse.ArgumentParser(description="Extract and store every contract in a folder")
+parser.add_argument("--folder", default=CONTRACTS_FOLDER, help="Folder containing contract PDFs")
+parser.add_argument("--backend", default=None, help="Extraction backend (default: EXTRACTION_BACKEND or 'simple')")
+parser.add_argument(
+    "--allow-duplicates",
+    action="store_true",
+    help="Extract contracts even if a near-duplicate is already stored"
+)
+parser.add_argument(
+    "--profile",
+    nargs="?",
+    const="profiles",
+    metavar="DIR",
+    help="Write cProfile dumps and allocation reports to DIR (default: profiles/)"
+)
+args = parser.parse_args()
+
+if args.profile:
+    profiling.enable_profiling(args.profile)
+
 print("=" * 60)
 print("BATCH CONTRACT PROCESSOR")
 print("=" * 60)
 print()
 
 # Get all PDF files
-pdf_files = list(Path(CONTRACTS_FOLDER).glob("*.pdf"))
+pdf_files = list(Path(args.folder).glob("*.pdf"))
 total_files = len(pdf_files)
 
 print(f"Found {total_files} PDF files to process")
 print()
 
 # Initialize database
-db = ContractDatabase()
+db = open_contract_database()
 
 # Track results
 results = {
     'successful': [],
+    'duplicates': [],
     'failed': []
 }
+threshold = get_threshold()
 
 # Process each contract
 for i, pdf_file in enumerate(pdf_files, 1):
@@ -35,11 +67,32 @@ for i, pdf_file in enumerate(pdf_files, 1):
     print(f"[{i}/{total_files}] Processing: {filename}")
     
     try:
+        # Read text once and check for near-duplicates before paying for the LLM call
+        pages = load_text_pages(str(pdf_file))
+        pdf_text = join_pages(pages)
+        signature = compute_signature(pdf_text)
+        
+        duplicates = db.find_near_duplicates(signature, threshold=threshold)
+        if duplicates and not args.allow_duplicates:
+            match = duplicates[0]
+            results['duplicates'].append({
+                'filename': filename,
+                'match': match['filename'],
+                'similarity': match['similarity']
+            })
+            print(f"Skipped - near-duplicate of {match['filename']} (ID: {match['id']}, {match['similarity']:.0%} similar)")
+            print()
+            continue
+        
         # Extract data
-        data = extract_contract_simple(str(pdf_file))
+        with capture_responses() as responses:
+            data = extract_with_backend(str(pdf_file), backend=args.backend, pdf_text=pdf_text)
+        if artifacts_enabled():
+            get_artifact_store().save_document(document_hash(str(pdf_file)), filename, pages, responses)
         
         # Save to database
-        contract_id = db.insert_contract(filename, data)
+        contract_id = db.insert_contract(filename, data, signature=signature)
+        index_contract(contract_id, data)
         
         # Track success
         results['successful'].append({
@@ -70,6 +123,7 @@ print("BATCH PROCESSING COMPLETE")
 print("=" * 60)
 print()
 print(f"Successful: {len(results['successful'])}")
+print(f"Duplicates: {len(results['duplicates'])}")
 print(f"Failed:     {len(results['failed'])}")
 print(f"Total:      {total_files}")
 print()
@@ -80,6 +134,12 @@ if results['successful']:
         print(f"  • {item['filename']} → {item['vendor']}")
     print()
 
+if results['duplicates']:
+    print("Skipped near-duplicates (use --allow-duplicates to extract anyway):")
+    for item in results['duplicates']:
+        print(f"  • {item['filename']} ≈ {item['match']} ({item['similarity']:.0%})")
+    print()
+
 if results['failed']:
     print("Failed extractions:")
     for item in results['failed']:
@@ -88,10 +148,28 @@ if results['failed']:
     print()
 
 # Final database count
-db = ContractDatabase()
+db = open_contract_database()
 total_in_db = db.get_contract_count()
 db.close()
 
 print(f"Total contracts in database: {total_in_db}")
 print()
+
+limiter_stats = get_rate_limiter().stats()
+if limiter_stats['waits'] or limiter_stats['throttles']:
+    print(f"Rate limiter: waited {limiter_stats['waited_seconds']:.1f}s over {limiter_stats['waits']} calls, "
+          f"{limiter_stats['throttles']} throttled (429)")
+    print()
+
+for model, stats in latency_stats().items():
+    print(f"{model}: {stats['calls']} calls, p50 {stats['p50']:.1f}s, p99 {stats['p99']:.1f}s, "
+          f"{stats['hedge_rate']:.0%} hedged ({stats['hedge_wins']} hedges won)")
+
+for line in format_usage(usage_stats()):
+    print(f"Prompt {line}")
+
+if profiling.is_profiling_enabled():
+    report_path = profiling.disable_profiling()
+    print(f"Profiling report: {report_path}")
+    print()
 print("Batch processing complete!")
@@ -0,0 +1,106 @@
+"""
+Extraction Backend Benchmark
+Runs every selected backend over the sample corpus and compares speed and accuracy
+
+Usage:
+    python benchmark_backends.py
+    python benchmark_backends.py --backends simple,extractthinker --limit 5
+"""
+
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+from src.backends import available_backends, get_pool
+from src.contract_validator import validate_contract
+from src.evaluation import EvaluationStore
+
+parser = argparse.ArgumentParser(description="Compare extraction backends on the sample corpus")
+parser.add_argument("--backends", default=",".join(available_backends()), help="Comma-separated backend names")
+parser.add_argument("--folder", default="data/contracts", help="Folder containing contract PDFs")
+parser.add_argument("--db", default="data/contracts.db", help="Database holding ground truth")
+parser.add_argument("--validation-csv", default="data/validation.csv", help="Imported as ground truth if the database has none")
+parser.add_argument("--limit", type=int, default=None, help="Only process the first N contracts")
+args = parser.parse_args()
+
+print("=" * 60)
+print("EXTRACTION BACKEND BENCHMARK")
+print("=" * 60)
+print()
+
+pdf_files = sorted(Path(args.folder).glob("*.pdf"))
+if args.limit:
+    pdf_files = pdf_files[:args.limit]
+store = EvaluationStore(args.db)
+if store.count() == 0 and Path(args.validation_csv).exists():
+    store.import_validation_csv(args.validation_csv)
+ground_truth = store.get_ground_truth()
+
+print(f"Contracts: {len(pdf_files)} ({sum(1 for p in pdf_files if p.name in ground_truth)} with ground truth)")
+print()
+
+results = {}
+
+for backend_name in [b.strip() for b in args.backends.split(",") if b.strip()]:
+    print(f"Backend: {backend_name}")
+    print("-" * 60)
+
+    stats = {'warmup': None, 'latencies': [], 'failed': 0, 'invalid': 0, 'records': {}, 'accuracy': None}
+    results[backend_name] = stats
+
+    try:
+        pool = get_pool(backend_name)
+        start = time.perf_counter()
+        pool.warm(1)
+        stats['warmup'] = time.perf_counter() - start
+    except Exception as e:
+        print(f"  Could not initialize: {e}")
+        print()
+        continue
+
+    for pdf_file in pdf_files:
+        start = time.perf_counter()
+        try:
+            with pool.acquire() as backend:
+                data = backend.extract(str(pdf_file))
+        except Exception as e:
+            stats['failed'] += 1
+            print(f"  {pdf_file.name:<45} FAILED ({str(e)[:40]})")
+            continue
+
+        elapsed = time.perf_counter() - start
+        stats['latencies'].append(elapsed)
+
+        is_valid, _, _ = validate_contract(data)
+        if not is_valid:
+            stats['invalid'] += 1
+
+        stats['records'][pdf_file.name] = data
+
+        print(f"  {pdf_file.name:<45} {elapsed:6.2f}s")
+
+    report = store.evaluate_records(stats['records'])
+    if report['total']:
+        stats['accuracy'] = report['accuracy']
+    print()
+
+store.close()
+
+# Summary table
+print("=" * 60)
+print("SUMMARY")
+print("=" * 60)
+print(f"{'Backend':<16} {'Warmup':<9} {'Mean':<9} {'Median':<9} {'OK':<5} {'Fail':<5} {'Invalid':<8} {'Accuracy':<9}")
+print("-" * 72)
+
+for backend_name, stats in results.items():
+    latencies = stats['latencies']
+    warmup = f"{stats['warmup']:.2f}s" if stats['warmup'] is not None else "n/a"
+    mean = f"{statistics.mean(latencies):.2f}s" if latencies else "n/a"
+    median = f"{statistics.median(latencies):.2f}s" if latencies else "n/a"
+    accuracy = f"{stats['accuracy']:.1f}%" if stats['accuracy'] is not None else "n/a"
+    print(f"{backend_name:<16} {warmup:<9} {mean:<9} {median:<9} {len(latencies):<5} "
+          f"{stats['failed']:<5} {stats['invalid']:<8} {accuracy:<9}")
+
+print()
@@ -0,0 +1,100 @@
+"""
+Extraction Cascade Benchmark
+Compares a cascade policy with a single-model baseline: accuracy, latency and cost per contract
+
+Usage:
+    python benchmark_cascade.py
+    python benchmark_cascade.py --baseline gpt-4o --policy gpt-4o-mini,reprompt,gpt-4o --limit 10
+    LLM_CACHE_MODE=replay python benchmark_cascade.py    # Offline, from recorded responses
+"""
+
+import argparse
+from pathlib import Path
+
+from src.cascade import DEFAULT_ESCALATE_ON, ExtractionCascade, parse_policy, parse_triggers, summarize_results
+from src.contract_validator import validate_contract
+from src.evaluation import EvaluationStore
+from src.prompts import format_usage, usage_stats
+from src.artifacts import load_text_pages
+from src.pdf_text import join_pages
+
+parser = argparse.ArgumentParser(description="Compare an extraction cascade with a single-model baseline")
+parser.add_argument("--baseline", default="gpt-4o-mini", help="Model used for every contract in the baseline")
+parser.add_argument("--policy", default=None, help="Cascade steps (default: EXTRACTION_CASCADE)")
+parser.add_argument("--escalate-on", default=None, help=f"Escalation triggers (default: {DEFAULT_ESCALATE_ON})")
+parser.add_argument("--folder", default="data/contracts", help="Folder containing contract PDFs")
+parser.add_argument("--db", default="data/contracts.db", help="Database holding ground truth")
+parser.add_argument("--validation-csv", default="data/validation.csv", help="Imported as ground truth if the database has none")
+parser.add_argument("--limit", type=int, default=None, help="Only process the first N contracts")
+
+
+def run(cascade, texts):
+    """Extract every text; returns (records, results, failed)."""
+    records, results, failed = {}, [], 0
+    for filename, text in texts.items():
+        try:
+            result = cascade.extract(text)
+        except Exception as e:
+            failed += 1
+            print(f"  {filename:<45} FAILED ({str(e)[:40]})")
+            continue
+        records[filename] = result.data
+        results.append(result)
+        print(f"  {filename:<45} {' -> '.join(a['step'] for a in result.attempts)}")
+    return records, results, failed
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("EXTRACTION CASCADE BENCHMARK")
+    print("=" * 60)
+    print()
+
+    pdf_files = sorted(Path(args.folder).glob("*.pdf"))
+    if args.limit:
+        pdf_files = pdf_files[:args.limit]
+    store = EvaluationStore(args.db)
+    if store.count() == 0 and Path(args.validation_csv).exists():
+        store.import_validation_csv(args.validation_csv)
+    ground_truth = store.get_ground_truth()
+
+    texts = {p.name: join_pages(load_text_pages(str(p))) for p in pdf_files}
+    policies = [
+        (f"baseline ({args.baseline})", ExtractionCascade([args.baseline], escalate_on=[])),
+        ("cascade", ExtractionCascade(parse_policy(args.policy), escalate_on=parse_triggers(args.escalate_on))),
+    ]
+
+    print(f"Contracts: {len(texts)} ({sum(1 for name in texts if name in ground_truth)} with ground truth)")
+    print(f"Cascade:   {' -> '.join(policies[1][1].steps)} (escalate on {', '.join(policies[1][1].escalate_on)})")
+    print()
+
+    rows = []
+    for label, cascade in policies:
+        print(label)
+        print("-" * 60)
+        records, results, failed = run(cascade, texts)
+        report = store.evaluate_records(records)
+        summary = summarize_results(results)
+        invalid = sum(1 for data in records.values() if not validate_contract(data)[0])
+        rows.append((label, report, summary, failed, invalid))
+        print()
+
+    store.close()
+
+    print("=" * 60)
+    print("SUMMARY")
+    print("=" * 60)
+    print(f"{'Policy':<26} {'Accuracy':>9} {'Latency':>9} {'Cost':>10} {'Escalated':>10} {'Invalid':>8} {'Fail':>5}")
+    print("-" * 82)
+    for label, report, summary, failed, invalid in rows:
+        accuracy = f"{report['accuracy']:.1f}%" if report['total'] else "n/a"
+        print(f"{label:<26} {accuracy:>9} {summary['avg_latency']:>8.2f}s ${summary['avg_cost']:>9.5f} "
+              f"{summary['escalation_rate']:>9.0%} {invalid:>8} {failed:>5}")
+    print()
+    for line in format_usage(usage_stats()):
+        print(f"Prompt {line}")
+    print()
+    print("Latency and cost are per contract. Replayed responses keep their token usage, so cost is")
+    print("exact offline; latency is only meaningful for live runs.")
@@ -0,0 +1,123 @@
+"""
+Group-Commit Benchmark
+Compares ingest throughput with per-worker commits vs the group-commit writer as workers are added
+
+Each worker stores its share of synthetic contracts (with signatures, so
+every insert also writes LSH buckets). In 'direct' mode every worker has
+its own ContractDatabase and commits each contract; in 'group' mode all
+workers hand their contracts to one GroupCommitWriter.
+
+Usage:
+    python benchmark_group_commit.py
+    python benchmark_group_commit.py --contracts 5000 --workers 1,4,16,64 --dir /mnt/disk
+"""
+
+import argparse
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from src.database import ContractDatabase
+from src.group_commit import GroupCommitWriter
+
+parser = argparse.ArgumentParser(description="Benchmark group commit against per-worker commits")
+parser.add_argument("--contracts", type=int, default=2000, help="Contracts stored per run")
+parser.add_argument("--workers", default="1,2,4,8,16,32", help="Comma-separated worker counts")
+parser.add_argument("--vendors", type=int, default=200, help="Distinct vendor names")
+parser.add_argument("--max-batch", type=int, default=None, help="Group size (default: GROUP_COMMIT_MAX_BATCH or 256)")
+parser.add_argument("--max-delay-ms", type=float, default=None,
+                    help="Group wait (default: GROUP_COMMIT_MAX_DELAY_MS or 0)")
+parser.add_argument("--dir", default="data", help="Where the benchmark databases go (use the real database's disk)")
+args = parser.parse_args()
+
+
+def synthetic_contracts(count, seed):
+    rng = random.Random(seed)
+    for i in range(count):
+        data = {
+            'vendor_name': f"Vendor {rng.randrange(args.vendors)} Inc",
+            'contract_number': f"C-{seed}-{i}",
+            'effective_date': "2024-01-01",
+            'expiration_date': "2025-01-01",
+            'total_amount': f"${rng.randrange(1000, 500000):,}",
+            'contract_type': "MSA",
+        }
+        yield f"contract_{seed}_{i}.pdf", data, [rng.getrandbits(32) for _ in range(128)]
+
+
+def run_workers(workers, store):
+    """Run store(worker, contracts) on each worker thread; returns seconds and failed inserts."""
+    per_worker = args.contracts // workers
+    errors = []
+
+    def work(worker):
+        errors.append(store(worker, list(synthetic_contracts(per_worker, worker))))
+
+    threads = [threading.Thread(target=work, args=(w,)) for w in range(workers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, per_worker * workers, sum(errors)
+
+
+def direct(db_path, workers):
+    def store(worker, contracts):
+        db = ContractDatabase(db_path)
+        failed = 0
+        try:
+            for filename, data, signature in contracts:
+                try:
+                    db.insert_contract(filename, data, signature=signature)
+                except sqlite3.Error:
+                    # Lock timeouts, and vendors created by another worker since this one's last look
+                    db.get_connection().rollback()
+                    failed += 1
+        finally:
+            db.close()
+        return failed
+    seconds, count, errors = run_workers(workers, store)
+    return seconds, count, errors, 1.0
+
+
+def group(db_path, workers):
+    writer = GroupCommitWriter(db_path, max_batch=args.max_batch, max_delay_ms=args.max_delay_ms)
+
+    def store(worker, contracts):
+        for filename, data, signature in contracts:
+            writer.insert_contract(filename, data, signature=signature)
+        return 0
+    seconds, count, errors = run_workers(workers, store)
+    writer.close()
+    return seconds, count, errors, writer.stats()['rows_per_commit']
+
+
+if __name__ == "__main__":
+    Path(args.dir).mkdir(parents=True, exist_ok=True)
+    work_dir = Path(tempfile.mkdtemp(prefix="group_commit_", dir=args.dir))
+
+    print("=" * 60)
+    print("GROUP COMMIT BENCHMARK")
+    print("=" * 60)
+    print(f"{args.contracts} contracts per run, databases in {work_dir}")
+    print()
+    print(f"{'Workers':>7} {'Mode':<7} {'Contracts/s':>12} {'Per commit':>11} {'Failed':>7}")
+    print("-" * 48)
+
+    try:
+        for workers in [int(w) for w in args.workers.split(",")]:
+            for mode, run in (("direct", direct), ("group", group)):
+                db_path = str(work_dir / f"{mode}_{workers}.db")
+                ContractDatabase(db_path).close()
+                seconds, count, errors, per_commit = run(db_path, workers)
+                stored = ContractDatabase(db_path)
+                rate = stored.get_contract_count() / seconds
+                stored.close()
+                print(f"{workers:>7} {mode:<7} {rate:>12.0f} {per_commit:>11.1f} {errors:>7}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
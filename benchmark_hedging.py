@@ -0,0 +1,170 @@
+"""
+Hedged Request Benchmark
+Measures tail latency with and without hedging against a local fake OpenAI server
+
+The server answers chat completions after a short delay and injects slow
+responses at a configurable rate, so no API key or quota is used.
+
+Usage:
+    python benchmark_hedging.py
+    python benchmark_hedging.py --requests 1000 --slow-rate 0.05 --slow-seconds 3
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+parser = argparse.ArgumentParser(description="Compare tail latency with and without hedged requests")
+parser.add_argument("--requests", type=int, default=400, help="Measured requests per mode")
+parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests that fill the latency window")
+parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight")
+parser.add_argument("--base-seconds", type=float, default=0.2, help="Typical response time")
+parser.add_argument("--slow-rate", type=float, default=0.03, help="Fraction of responses that are slow")
+parser.add_argument("--slow-seconds", type=float, default=3.0, help="Response time of a slow response")
+parser.add_argument("--deadline", type=float, default=10.0, help="Per-call deadline in seconds")
+
+
+class FakeChatServer:
+    """Local OpenAI-compatible chat completions endpoint with injected slow responses."""
+
+    def __init__(self, base_seconds=0.2, slow_rate=0.0, slow_seconds=3.0, seed=0):
+        self.base_seconds = base_seconds
+        self.slow_rate = slow_rate
+        self.slow_seconds = slow_seconds
+        self.requests = 0
+        self.abandoned = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def next_delay(self):
+        with self._lock:
+            self.requests += 1
+            if self._rng.random() < self.slow_rate:
+                return self.slow_seconds
+            return self.base_seconds * self._rng.uniform(0.5, 1.5)
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                time.sleep(fake.next_delay())
+                body = json.dumps({
+                    'id': 'chatcmpl-fake', 'object': 'chat.completion', 'created': int(time.time()),
+                    'model': request['model'],
+                    'choices': [{'index': 0, 'finish_reason': 'stop',
+                                 'message': {'role': 'assistant', 'content': '{"vendor_name": "Acme"}'}}],
+                    'usage': {'prompt_tokens': 100, 'completion_tokens': 10, 'total_tokens': 110}
+                }).encode()
+                try:
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client cancelled this request (a hedge won)
+                    with fake._lock:
+                        fake.abandoned += 1
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * q / 100), len(ordered) - 1)]
+
+
+def run_mode(client, model, hedge, count, concurrency, deadline):
+    """Send count requests; returns (latencies, deadline misses)."""
+    from src import llm_client
+
+    os.environ["LLM_HEDGE"] = "on" if hedge else "off"
+    messages = [{'role': 'user', 'content': 'Extract the vendor.'}]
+    misses = 0
+
+    def one(_):
+        nonlocal misses
+        start = time.perf_counter()
+        try:
+            llm_client.chat_completion(client, model, messages, deadline=deadline, max_tokens=50)
+        except llm_client.DeadlineExceeded:
+            misses += 1
+            return None
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = [t for t in executor.map(one, range(count)) if t is not None]
+    return latencies, misses
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    from openai import OpenAI
+    from src import llm_client
+
+    # Local fake server: bypass the shared quota and the response cache
+    os.environ["LLM_RATE_LIMIT"] = "off"
+    llm_client.set_cache_mode("off")
+
+    print("=" * 60)
+    print("HEDGED REQUEST BENCHMARK")
+    print("=" * 60)
+    print(f"Fake server: ~{args.base_seconds * 1000:.0f} ms responses, "
+          f"{args.slow_rate:.0%} slow ({args.slow_seconds:.1f}s)")
+    print(f"Requests:    {args.requests} per mode, {args.concurrency} in flight, {args.deadline:.0f}s deadline")
+    print()
+
+    rows = []
+    for label, hedge in (("no hedging", False), ("hedged", True)):
+        with FakeChatServer(args.base_seconds, args.slow_rate, args.slow_seconds) as server:
+            client = OpenAI(api_key="fake", base_url=server.base_url, max_retries=0)
+            model = f"fake-{label.replace(' ', '-')}"
+            run_mode(client, model, hedge, args.warmup, args.concurrency, args.deadline)
+            before = server.requests
+            stats_before = llm_client.latency_stats()[model]
+            latencies, misses = run_mode(client, model, hedge, args.requests, args.concurrency, args.deadline)
+            stats = llm_client.latency_stats()[model]
+            sent = server.requests - before
+            hedged = stats['hedged'] - stats_before['hedged']
+            wins = stats['hedge_wins'] - stats_before['hedge_wins']
+            rows.append((label, latencies, misses, sent, hedged, wins))
+
+    print(f"{'Mode':<12} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'Hedged':>8} {'Won':>6} {'Extra load':>11} {'Missed':>7}")
+    print("-" * 84)
+    for label, latencies, misses, sent, hedged, wins in rows:
+        print(f"{label:<12} "
+              + " ".join(f"{percentile(latencies, q) * 1000:>6.0f}ms" for q in (50, 95, 99))
+              + f" {max(latencies) * 1000:>6.0f}ms {hedged / args.requests:>8.1%} {wins:>6}"
+              f" {sent / args.requests - 1:>+10.1%} {misses:>7}")
+    print()
+
+    baseline, hedged_run = rows[0][1], rows[1][1]
+    p99_gain = 1 - percentile(hedged_run, 99) / percentile(baseline, 99)
+    print(f"p99 improvement: {p99_gain:.0%} (mean {statistics.mean(baseline) * 1000:.0f} ms -> "
+          f"{statistics.mean(hedged_run) * 1000:.0f} ms)")
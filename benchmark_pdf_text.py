@@ -0,0 +1,133 @@
+"""
+PDF Text Engine Benchmark
+Compares local text engines on the sample corpus: speed, memory and accuracy
+
+Usage:
+    python benchmark_pdf_text.py
+    python benchmark_pdf_text.py --accuracy    # Also run LLM extraction per engine
+"""
+
+import argparse
+import re
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from src.evaluation import NULL_VALUES, EvaluationStore
+from src.pdf_text import EngineUnavailable, available_engines, extract_pages
+
+# Fields whose ground truth should appear verbatim in the PDF text
+VERBATIM_FIELDS = ['vendor_name', 'contract_number']
+
+parser = argparse.ArgumentParser(description="Compare PDF text engines on the sample corpus")
+parser.add_argument("--engines", default=",".join(available_engines()), help="Comma-separated engine names")
+parser.add_argument("--folder", default="data/contracts", help="Folder containing contract PDFs")
+parser.add_argument("--db", default="data/contracts.db", help="Database holding ground truth")
+parser.add_argument("--validation-csv", default="data/validation.csv", help="Imported as ground truth if the database has none")
+parser.add_argument("--accuracy", action="store_true", help="Run LLM extraction on each engine's text (uses LLM_CACHE_MODE)")
+
+
+def squash(text):
+    return re.sub(r'\s+', ' ', text).strip().lower()
+
+
+def run_engine(engine, pdf_paths):
+    """Extract every PDF in a fresh process so peak RSS belongs to this engine alone."""
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    texts = {}
+    pages = 0
+    start = time.perf_counter()
+    try:
+        for path in pdf_paths:
+            page_texts = extract_pages(path, engine)
+            pages += len(page_texts)
+            texts[Path(path).name] = "".join(page + "\n" for page in page_texts)
+    except EngineUnavailable as e:
+        return {'engine': engine, 'error': str(e)}
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        'engine': engine,
+        'pages': pages,
+        'elapsed': elapsed,
+        'peak_mb': max(peak_kb - baseline_kb, 0) / 1024,
+        'texts': texts
+    }
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("PDF TEXT ENGINE BENCHMARK")
+    print("=" * 60)
+    print()
+
+    pdf_paths = [str(p) for p in sorted(Path(args.folder).glob("*.pdf"))]
+    store = EvaluationStore(args.db)
+    if store.count() == 0 and Path(args.validation_csv).exists():
+        store.import_validation_csv(args.validation_csv)
+    ground_truth = store.get_ground_truth()
+
+    print(f"Contracts: {len(pdf_paths)} ({sum(1 for p in pdf_paths if Path(p).name in ground_truth)} with ground truth)")
+    print()
+
+    results = []
+    for engine in args.engines.split(","):
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            results.append(executor.submit(run_engine, engine, pdf_paths).result())
+
+    print(f"{'Engine':<12} {'Pages/sec':>10} {'Peak RSS':>10} {'Empty':>6} {'Verbatim fields':>16}")
+    print("-" * 60)
+    for result in results:
+        if 'error' in result:
+            print(f"{result['engine']:<12} skipped ({result['error']})")
+            continue
+
+        texts = result['texts']
+        empty = sum(1 for text in texts.values() if not text.strip())
+        found = total = 0
+        for filename, fields in ground_truth.items():
+            if filename not in texts:
+                continue
+            text = squash(texts[filename])
+            for field in VERBATIM_FIELDS:
+                value = fields.get(field)
+                if value is None or value.strip().lower() in NULL_VALUES:
+                    continue
+                total += 1
+                found += squash(value) in text
+
+        pages_per_sec = result['pages'] / result['elapsed'] if result['elapsed'] else 0
+        coverage = f"{found}/{total} ({found / total:.0%})" if total else "n/a"
+        print(f"{result['engine']:<12} {pages_per_sec:>10.0f} {result['peak_mb']:>8.1f}MB {empty:>6} {coverage:>16}")
+    print()
+
+    if args.accuracy:
+        from src import llm_client
+        from src.simple_extractor import create_client, extract_contract_from_text
+
+        client = None if llm_client.get_cache_mode() == "replay" else create_client()
+
+        print(" EXTRACTION ACCURACY")
+        print("-" * 60)
+        for result in results:
+            if 'error' in result:
+                continue
+            records = {}
+            failed = 0
+            for filename, text in result['texts'].items():
+                try:
+                    records[filename] = extract_contract_from_text(text, client=client)
+                except Exception:
+                    failed += 1
+            report = store.evaluate_records(records)
+            if report['total']:
+                print(f"{result['engine']:<12} {report['correct']}/{report['total']} ({report['accuracy']:.1f}%)"
+                      f"{f', {failed} failed' if failed else ''}")
+            else:
+                print(f"{result['engine']:<12} no extracted contracts have ground truth")
+        print()
+
+    store.close()
@@ -0,0 +1,144 @@
+"""
+Analytics Snapshot Benchmark
+Compares loading contracts for the dashboard from SQLite rows vs the Arrow snapshot
+
+Usage:
+    python benchmark_snapshot.py
+    python benchmark_snapshot.py --contracts 200000
+"""
+
+import argparse
+import gc
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+from src.database import ContractDatabase
+from src.snapshot import ContractSnapshot
+
+parser = argparse.ArgumentParser(description="Benchmark the columnar analytics snapshot")
+parser.add_argument("--contracts", type=int, default=50_000, help="Synthetic contracts to generate")
+parser.add_argument("--vendors", type=int, default=500, help="Distinct vendor names")
+parser.add_argument("--append", type=int, default=100, help="Contracts inserted before the incremental append")
+parser.add_argument("--runs", type=int, default=5, help="Timed runs per measurement (best is reported)")
+args = parser.parse_args()
+
+TYPES = ["Service Agreement", "MSA", "Purchase Order", "Amendment", "SOW"]
+TERMS = ["Net 30", "Net 45", "Net 60", "Due on receipt"]
+
+
+def synthetic_rows(count, start):
+    rng = random.Random(start)
+    for i in range(start, start + count):
+        yield (
+            f"contract_{i}.pdf", "2024-05-01 12:00:00", f"Vendor {rng.randrange(args.vendors)} Inc",
+            f"C-{i}", "2024-01-01", "2025-01-01", f"${rng.randrange(1000, 500000):,}",
+            rng.choice(TERMS), rng.choice(TYPES), "Consulting services and quarterly reports", None
+        )
+
+
+def insert_rows(db, count, start):
+    # Bulk insert directly; insert_contract's per-row vendor resolution is not what we measure
+    db.get_connection().executemany("""
+        INSERT INTO contracts (filename, upload_date, vendor_name, contract_number, effective_date,
+            expiration_date, total_amount, payment_terms, contract_type, key_deliverables, vendor_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, synthetic_rows(count, start))
+    db.get_connection().commit()
+
+
+def measure(func):
+    """Best wall time over args.runs, and Python + Arrow peak memory of one run."""
+    times = []
+    for _ in range(args.runs):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    arrow_before = pa.total_allocated_bytes()
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    arrow_bytes = pa.total_allocated_bytes() - arrow_before
+    del result
+    return min(times), peak + arrow_bytes
+
+
+def row_path():
+    return pd.DataFrame(db.get_all_contracts())
+
+
+def arrow_load():
+    snapshot._table = None
+    return snapshot.load()
+
+
+def arrow_dataframe():
+    snapshot._table = None
+    return snapshot.to_dataframe()
+
+
+def row_type_counts():
+    return pd.DataFrame(db.get_all_contracts())['contract_type'].value_counts()
+
+
+def arrow_type_counts():
+    snapshot._table = None
+    return snapshot.load().column('contract_type').value_counts()
+
+
+print("=" * 60)
+print("ANALYTICS SNAPSHOT BENCHMARK")
+print("=" * 60)
+print()
+
+work_dir = Path(tempfile.mkdtemp(prefix="snapshot_bench_"))
+try:
+    db = ContractDatabase(str(work_dir / "contracts.db"))
+    insert_rows(db, args.contracts, 0)
+    snapshot = ContractSnapshot(str(work_dir / "snapshot"))
+
+    start = time.perf_counter()
+    snapshot.sync(db)
+    build_time = time.perf_counter() - start
+
+    insert_rows(db, args.append, args.contracts)
+    start = time.perf_counter()
+    appended = snapshot.sync(db)
+    append_time = time.perf_counter() - start
+
+    size_mb = sum(f.stat().st_size for f in (work_dir / "snapshot").glob("*.arrow")) / 1024 / 1024
+
+    print(f"Contracts:           {db.get_contract_count():,} ({args.vendors} vendors)")
+    print(f"Initial build:       {build_time * 1000:.0f} ms")
+    print(f"Incremental append:  {append_time * 1000:.1f} ms ({appended} contracts)")
+    print(f"Snapshot size:       {size_mb:.1f} MiB in {len(snapshot.segments)} segment(s)")
+    print()
+
+    rows = [
+        ("SQLite rows -> DataFrame", row_path),
+        ("Snapshot mmap -> Table", arrow_load),
+        ("Snapshot mmap -> DataFrame", arrow_dataframe),
+        ("Type counts via rows", row_type_counts),
+        ("Type counts via snapshot", arrow_type_counts),
+    ]
+
+    print(f"{'Path':<30} {'Time':>10} {'Peak memory':>14}")
+    print("-" * 60)
+    for label, func in rows:
+        elapsed, peak = measure(func)
+        print(f"{label:<30} {elapsed * 1000:>8.1f}ms {peak / 1024 / 1024:>11.1f}MiB")
+    print()
+
+    db.close()
+finally:
+    shutil.rmtree(work_dir, ignore_errors=True)
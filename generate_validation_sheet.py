@@ -4,7 +4,8 @@ Creates CSV with all extracted data ready for manual verification
 Supports appending new contracts without overwriting existing data
 """
 
-from src.database import ContractDatabase
+from src.changefeed import ChangeFeed
+from src.database import open_contract_database
 import csv
 from pathlib import Path
 
@@ -14,11 +15,18 @@ print("=" * 60)
 print()
 
 # Connect to database
-db = ContractDatabase()
+db = open_contract_database()
 
-# Get all contracts from database
-contracts = db.get_all_contracts()
-print(f"Found {len(contracts)} contracts in database")
+# Only contracts inserted since the last run (via the change feed)
+feed = ChangeFeed(db, "validation_sheet")
+changes = feed.read_all()
+if feed.is_new:
+    # First run: contracts stored before the feed existed are not in the changelog
+    contracts = db.get_all_contracts()
+    print(f"Found {len(contracts)} contracts in database")
+else:
+    contracts = [c['contract'] for c in changes if c['op'] == 'insert']
+    print(f"Found {len(contracts)} contracts added since the last run")
 
 # Check if validation.csv already exists
 csv_path = 'data/validation.csv'
@@ -41,6 +49,7 @@ print()
 if len(new_contracts) == 0:
     print("✓ All contracts already in validation.csv")
     print("✓ No new contracts to add")
+    feed.commit()
     db.close()
     exit()
 
@@ -107,4 +116,5 @@ print(f" Added {len(new_rows)} rows to validation.csv")
 print(f" New contracts added: {len(new_contracts)}")
 print()
 
+feed.commit()
 db.close()
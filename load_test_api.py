@@ -0,0 +1,79 @@
+"""
+API Load Test
+Hammers the read endpoints of a running API and reports throughput and latency
+
+Usage:
+    uvicorn api:app --port 8000
+    python load_test_api.py --requests 2000 --concurrency 32
+"""
+
+import argparse
+import json
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+parser = argparse.ArgumentParser(description="Load test the contract API")
+parser.add_argument("--url", default="http://127.0.0.1:8000", help="API base URL")
+parser.add_argument("--requests", type=int, default=1000, help="Total requests to send")
+parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight at once")
+parser.add_argument(
+    "--paths",
+    default="/contracts?limit=20,/contracts?q=tech&limit=20,/aggregates,/health",
+    help="Comma-separated endpoints, requested round-robin"
+)
+args = parser.parse_args()
+
+paths = args.paths.split(",")
+
+
+def fetch(i):
+    url = args.url + paths[i % len(paths)]
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=30) as response:
+            json.loads(response.read())
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = None
+    return status, time.perf_counter() - start
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+print("=" * 60)
+print("API LOAD TEST")
+print("=" * 60)
+print()
+print(f"Target:       {args.url}")
+print(f"Requests:     {args.requests} ({args.concurrency} concurrent)")
+print()
+
+# Warm up connections and server-side caches
+fetch(0)
+
+start = time.perf_counter()
+with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+    results = list(executor.map(fetch, range(args.requests)))
+elapsed = time.perf_counter() - start
+
+latencies = sorted(latency * 1000 for status, latency in results if status == 200)
+errors = [status for status, _ in results if status != 200]
+
+print(" RESULTS")
+print("-" * 60)
+print(f"Elapsed:      {elapsed:.2f}s")
+print(f"Throughput:   {len(results) / elapsed:.1f} req/s")
+print(f"Errors:       {len(errors)}")
+if latencies:
+    print(f"Latency p50:  {statistics.median(latencies):.1f} ms")
+    print(f"Latency p95:  {percentile(latencies, 95):.1f} ms")
+    print(f"Latency p99:  {percentile(latencies, 99):.1f} ms")
+    print(f"Latency max:  {latencies[-1]:.1f} ms")
+print()
@@ -0,0 +1,308 @@
+"""
+App Load Test
+Simulates concurrent web app sessions against the storage layer and reports latency per operation
+
+Each session repeats what a Streamlit user's reruns do: open the
+database and count contracts (the sidebar), then one of history
+browsing, filtering, searching, the dashboard or an upload. Uploads go
+through the real job queue and worker pool with the LLM replaced by a
+mock backend that sleeps for --llm-seconds, then are saved the way the
+app saves them. Nothing calls the API.
+
+Usage:
+    python load_test_app.py
+    python load_test_app.py --sessions 50 --contracts 20000 --duration 60
+    CONTRACT_SHARD_BY=year python load_test_app.py --sessions 50    # Compare storage layouts
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from src.backends import ExtractionBackend, register_backend
+
+parser = argparse.ArgumentParser(description="Load test the app's data paths with simulated sessions")
+parser.add_argument("--sessions", type=int, default=20, help="Concurrent user sessions")
+parser.add_argument("--contracts", type=int, default=5000, help="Contracts seeded before the run")
+parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+parser.add_argument("--think-seconds", type=float, default=0.5, help="Average pause between a session's actions")
+parser.add_argument("--llm-seconds", type=float, default=1.0, help="Mocked extraction latency per upload")
+parser.add_argument("--workers", type=int, default=None, help="Extraction workers (default: EXTRACTION_WORKERS or 2)")
+parser.add_argument("--mix", default="history=30,filter=25,search=20,dashboard=20,upload=5",
+                    help="Relative weight of each operation")
+parser.add_argument("--work-dir", default=None, help="Where to put the test databases (default: a temp dir)")
+parser.add_argument("--sample-pdf", default="data/contracts/Contract_445.pdf",
+                    help="PDF uploaded (made unique per upload)")
+parser.add_argument("--seed", type=int, default=0, help="Random seed")
+
+OPERATIONS = ("history", "filter", "search", "dashboard", "upload")
+
+VENDORS = ["TechCorp Inc", "DataFlow Systems", "Acme Corporation", "Globex LLC", "Initech", "Umbrella Services",
+           "Stark Industries", "Wayne Enterprises", "Cyberdyne Systems", "Soylent Corp"]
+TYPES = ["Master Services Agreement", "Purchase Order", "Software License", "Statement of Work", "Amendment"]
+
+
+class MockLLMBackend(ExtractionBackend):
+    """Returns canned fields after a fixed delay instead of calling a model."""
+
+    name = "mock"
+    delay = 1.0
+
+    def extract(self, pdf_path, pdf_text=None) -> dict:
+        time.sleep(self.delay)
+        rng = random.Random(hash(pdf_text))
+        return {
+            'vendor_name': rng.choice(VENDORS),
+            'contract_number': f"LT-{rng.randint(1000, 9999)}",
+            'effective_date': '2025-01-01',
+            'expiration_date': '2026-01-01',
+            'total_amount': f"${rng.randint(1, 500) * 1000:,}",
+            'payment_terms': 'Net 30',
+            'contract_type': rng.choice(TYPES),
+            'key_deliverables': 'Load test deliverables'
+        }
+
+
+register_backend(MockLLMBackend)
+
+
+def seed_contracts(db, count: int, seed: int = 0):
+    """Insert generated contracts (bulk for a single file, one by one for shards)."""
+    from src.database import ContractDatabase
+
+    rng = random.Random(seed)
+    rows = [{
+        'vendor_name': rng.choice(VENDORS),
+        'contract_number': f"C-{i:06d}",
+        'effective_date': f"20{rng.randint(18, 25)}-{rng.randint(1, 12):02d}-01",
+        'expiration_date': f"20{rng.randint(26, 30)}-{rng.randint(1, 12):02d}-01",
+        'total_amount': f"${rng.randint(1, 900) * 1000:,}",
+        'payment_terms': rng.choice(['Net 30', 'Net 45', 'Net 60']),
+        'contract_type': rng.choice(TYPES),
+        'key_deliverables': 'Seeded contract'
+    } for i in range(count)]
+
+    if not isinstance(db, ContractDatabase):
+        for i, row in enumerate(rows):
+            db.insert_contract(f"seed_{i:06d}.pdf", row)
+        return
+
+    vendor_ids = {name: db.resolve_vendor(name) for name in VENDORS}
+    conn = db.get_connection()
+    conn.executemany("""
+        INSERT INTO contracts (filename, upload_date, vendor_name, contract_number, effective_date,
+                               expiration_date, total_amount, payment_terms, contract_type,
+                               key_deliverables, vendor_id)
+        VALUES (?, datetime('now', ?), ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, [
+        (f"seed_{i:06d}.pdf", f"-{count - i} minutes", r['vendor_name'], r['contract_number'],
+         r['effective_date'], r['expiration_date'], r['total_amount'], r['payment_terms'],
+         r['contract_type'], r['key_deliverables'], vendor_ids[r['vendor_name']])
+        for i, r in enumerate(rows)
+    ])
+    conn.commit()
+
+
+class Session:
+    """One simulated user: picks weighted actions and records their latency."""
+
+    def __init__(self, index, args, weights, queue, writer, pdf_bytes, stats):
+        self.index = index
+        self.args = args
+        self.weights = weights
+        self.queue = queue
+        self.writer = writer
+        self.pdf_bytes = pdf_bytes
+        self.stats = stats
+        self.rng = random.Random(args.seed * 1000 + index)
+        self.session_id = f"load-{index}"
+        self.uploads = 0
+
+    def rerun(self):
+        """What every Streamlit rerun does before the page body."""
+        from src.database import open_contract_database
+        db = open_contract_database(self.args.db_path)
+        db.get_contract_count()
+        return db
+
+    def history(self, db):
+        from src.snapshot import load_contracts_dataframe
+        df = load_contracts_dataframe(db)
+        df.head(100)
+
+    def filter(self, db):
+        from src.snapshot import load_contracts_dataframe
+        df = load_contracts_dataframe(db)
+        vendors = db.get_vendors()
+        vendor_id = self.rng.choice(vendors)['id'] if vendors else None
+        filtered = df[(df['vendor_id'] == vendor_id) & (df['contract_type'] == self.rng.choice(TYPES))]
+        filtered.sort_values('total_amount')
+
+    def search(self, db):
+        term = self.rng.choice(VENDORS).split()[0][:4]
+        db.search_contracts(term)
+        db.get_contracts_page(limit=50, search_term=term)
+
+    def dashboard(self, db):
+        from src.snapshot import load_contracts_dataframe
+        df = load_contracts_dataframe(db)
+        df.groupby('contract_type', observed=True).size()
+        df.groupby(df['upload_date'].dt.to_period('M')).size()
+        db.get_aggregates()
+
+    def upload(self, db):
+        from src.jobs import DONE, FAILED, wait_for_jobs
+        self.uploads += 1
+        filename = f"upload_{self.index}_{self.uploads}.pdf"
+        # Trailing comment bytes give each upload its own hash
+        content = self.pdf_bytes + f"\n% {filename}\n".encode()
+        job_id = self.queue.enqueue(self.session_id, filename, content)
+        job = wait_for_jobs(self.queue, [job_id], timeout=self.args.duration + 120, poll_interval=0.2)[0]
+        if job['status'] == FAILED:
+            raise RuntimeError(job.get('error') or "extraction job failed")
+        if job['status'] == DONE:
+            # Same steps as the app's save_job
+            existing = db.get_all_contracts()
+            if not any(c['filename'] == filename for c in existing):
+                contract_id = self.writer.insert_contract(filename, job['result']['data'],
+                                                          signature=job['result']['signature'])
+                self.queue.mark_saved(job_id, contract_id)
+
+    def run(self, stop_at: float):
+        while time.monotonic() < stop_at:
+            op = self.rng.choices(OPERATIONS, weights=self.weights)[0]
+            start = time.perf_counter()
+            error = None
+            db = None
+            try:
+                db = self.rerun()
+                getattr(self, op)(db)
+            except sqlite3.OperationalError as e:
+                error = ("locked" if "locked" in str(e) or "busy" in str(e) else "error", str(e))
+            except Exception as e:
+                error = ("error", f"{type(e).__name__}: {e}")
+            finally:
+                if db is not None:
+                    db.close()
+            self.stats.record(op, time.perf_counter() - start, error)
+            time.sleep(self.rng.expovariate(1 / self.args.think_seconds) if self.args.think_seconds else 0)
+
+
+class Stats:
+    """Latencies of successful actions and error counts per operation."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(lambda: defaultdict(int))
+        self.messages = {}
+        self._lock = threading.Lock()
+
+    def record(self, op, seconds, error=None):
+        """Record an action; error is (kind, message) with kind 'locked' or 'error'."""
+        with self._lock:
+            if error:
+                kind, message = error
+                self.errors[op][kind] += 1
+                self.messages.setdefault(op, message)
+            else:
+                self.latencies[op].append(seconds)
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def parse_mix(spec):
+    weights = dict.fromkeys(OPERATIONS, 0)
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in weights:
+            raise ValueError(f"Unknown operation '{name}'. Use: {', '.join(OPERATIONS)}")
+        weights[name.strip()] = float(weight or 1)
+    return [weights[op] for op in OPERATIONS]
+
+
+def run_load_test(args) -> Stats:
+    """Seed the database, run the sessions for args.duration and return their stats."""
+    from src.database import open_contract_database
+    from src.group_commit import GroupCommitWriter
+    from src.jobs import JobQueue, WorkerPool, process_contract_job
+
+    work_dir = Path(args.work_dir or tempfile.mkdtemp(prefix="load_test_app_"))
+    work_dir.mkdir(parents=True, exist_ok=True)
+    args.db_path = str(work_dir / "contracts.db")
+    os.environ["EXTRACTION_BACKEND"] = MockLLMBackend.name
+    os.environ["FIELD_REPAIR"] = "off"
+    os.environ["SHARD_DIR"] = str(work_dir / "shards")
+    os.environ["SNAPSHOT_DIR"] = str(work_dir / "snapshot")
+    os.environ["ARTIFACT_STORE_PATH"] = str(work_dir / "artifacts.db")
+    MockLLMBackend.delay = args.llm_seconds
+
+    db = open_contract_database(args.db_path)
+    if db.get_contract_count() < args.contracts:
+        seed_contracts(db, args.contracts - db.get_contract_count(), args.seed)
+    db.close()
+
+    queue = JobQueue(str(work_dir / "jobs.db"))
+    pool = WorkerPool(queue, lambda job, report: process_contract_job(job, report, db_path=args.db_path),
+                      workers=args.workers, poll_interval=0.1)
+    pool.start()
+    writer = GroupCommitWriter(args.db_path)
+
+    pdf_bytes = Path(args.sample_pdf).read_bytes()
+    weights = parse_mix(args.mix)
+    stats = Stats()
+    sessions = [Session(i, args, weights, queue, writer, pdf_bytes, stats) for i in range(args.sessions)]
+    stop_at = time.monotonic() + args.duration
+    threads = [threading.Thread(target=s.run, args=(stop_at,), daemon=True) for s in sessions]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    pool.stop(timeout=5)
+    writer.close(timeout=5)
+    return stats
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("APP LOAD TEST")
+    print("=" * 60)
+    print()
+    print(f"Sessions:     {args.sessions} (think time ~{args.think_seconds}s)")
+    print(f"Contracts:    {args.contracts} seeded")
+    print(f"Storage:      {'sharded by ' + os.environ['CONTRACT_SHARD_BY'] if os.getenv('CONTRACT_SHARD_BY') else 'single file'}")
+    print(f"Duration:     {args.duration:.0f}s, mocked LLM {args.llm_seconds}s per upload")
+    print()
+
+    stats = run_load_test(args)
+
+    print(f"{'Operation':<11} {'Count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'Locked':>7} {'Errors':>7}")
+    print("-" * 74)
+    for op in OPERATIONS:
+        latencies = sorted(s * 1000 for s in stats.latencies[op])
+        errors = stats.errors[op]
+        if not latencies and not errors:
+            continue
+        if latencies:
+            timings = (f"{statistics.median(latencies):>9.1f} {percentile(latencies, 95):>9.1f} "
+                       f"{percentile(latencies, 99):>9.1f} {latencies[-1]:>9.1f}")
+        else:
+            timings = f"{'n/a':>9} {'n/a':>9} {'n/a':>9} {'n/a':>9}"
+        print(f"{op:<11} {len(latencies):>6} {timings} {errors['locked']:>7} {errors['error']:>7}")
+    for op, message in stats.messages.items():
+        print(f"  first {op} error: {message[:100]}")
+    print()
+    total = sum(len(v) for v in stats.latencies.values())
+    print(f"Completed actions: {total} ({total / args.duration:.1f}/s)")
+    print("Upload latency includes the queue wait and the mocked extraction; 'Locked' counts")
+    print("'database is locked' errors, the sign of write contention.")
@@ -0,0 +1,99 @@
+"""
+Corpus Re-extraction
+Re-runs extraction over every stored contract as a versioned campaign, then diffs and promotes it
+
+Usage:
+    python reextract.py run prompt-v2                       # Start or resume a campaign
+    PROMPT_VERSION=extraction-v1 python reextract.py run v1-baseline --model gpt-4o --workers 16
+    python reextract.py diff prompt-v2                      # Field-by-field changes vs current values
+    python reextract.py promote prompt-v2                   # Apply the changes in one transaction
+    python reextract.py list
+"""
+
+import argparse
+import sys
+
+from src.campaigns import CampaignStore, ReextractionCampaign
+
+parser = argparse.ArgumentParser(description="Versioned re-extraction campaigns over the stored corpus")
+parser.add_argument("command", choices=["run", "diff", "promote", "list"])
+parser.add_argument("name", nargs="?", help="Campaign name")
+parser.add_argument("--db", default="data/contracts.db", help="Contracts database")
+parser.add_argument("--backend", default=None, help="Extraction backend (default: EXTRACTION_BACKEND or 'simple')")
+parser.add_argument("--model", default=None, help="Model (default: MODEL_NAME)")
+parser.add_argument("--workers", type=int, default=None, help="Contracts extracted at once (default: CAMPAIGN_WORKERS or 8)")
+parser.add_argument("--folder", default="data/contracts", help="PDFs for contracts with no stored page text")
+parser.add_argument("--limit", type=int, default=None, help="Stop after N contracts (resume later)")
+parser.add_argument("--examples", type=int, default=3, help="Example changes shown per field")
+
+
+def print_diff(report):
+    statuses = ", ".join(f"{count} {status}" for status, count in sorted(report['statuses'].items()))
+    print(f"Records: {report['records']} ({statuses or 'none'})")
+    print(f"Contracts with changes: {report['changed_contracts']}")
+    print()
+    print(f"{'Field':<20} {'Changed':>8} {'Added':>6} {'Removed':>8}")
+    print("-" * 46)
+    for field, entry in report['fields'].items():
+        print(f"{field:<20} {entry['changed']:>8} {entry['added']:>6} {entry['removed']:>8}")
+    for field, entry in report['fields'].items():
+        for example in entry['examples']:
+            print(f"  {field} in {example['filename']}: {str(example['old'])[:40]!r} -> {str(example['new'])[:40]!r}")
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    try:
+        store = CampaignStore(args.db)
+    except RuntimeError as e:
+        print(e)
+        sys.exit(1)
+
+    if args.command == "list":
+        for c in store.list_campaigns():
+            print(f"{c['name']:<24} {c['status']:<9} {c['backend']}/{c['model']} ({c['prompt_version']}) "
+                  f"{c['records']} records, {c['changed'] or 0} changed")
+        store.close()
+        sys.exit(0)
+
+    if not args.name:
+        parser.error(f"'{args.command}' needs a campaign name")
+
+    exists = store.get_campaign(args.name) is not None
+    store.close()
+    if args.command != "run" and not exists:
+        print(f"No campaign named '{args.name}'")
+        sys.exit(1)
+
+    campaign = ReextractionCampaign(args.name, args.db, backend=args.backend, model_name=args.model,
+                                    workers=args.workers, pdf_folder=args.folder)
+    settings = campaign.campaign
+    print("=" * 60)
+    print(f"CAMPAIGN {args.name}: {settings['backend']}/{settings['model']} ({settings['prompt_version']})")
+    print("=" * 60)
+    print()
+
+    if args.command == "run":
+        try:
+            counts = campaign.run(
+                limit=args.limit,
+                progress=lambda done, c: print(f"  {done} contracts: {c['ok']} ok, {c['changed']} changed, "
+                                               f"{c['failed']} failed, {c['no_text']} without text")
+            )
+        except ValueError as e:
+            # Resuming with a different PROMPT_VERSION would mix templates
+            print(e)
+            sys.exit(1)
+        rate = (counts['ok'] + counts['failed']) / counts['seconds'] if counts['seconds'] else 0.0
+        print()
+        print(f"Done in {counts['seconds']:.1f}s ({rate:.1f} contracts/s)")
+        print()
+        print_diff(campaign.diff(args.examples))
+    elif args.command == "diff":
+        print_diff(campaign.diff(args.examples))
+    elif args.command == "promote":
+        updated = campaign.promote()
+        print(f"Promoted: {updated} contracts updated")
+
+    campaign.close()
@@ -0,0 +1,111 @@
+"""
+Accuracy Regression Run
+Re-runs extraction + validation + accuracy over the corpus from recorded LLM responses
+
+Usage:
+    python replay_regression.py --record     # Call the API once and record responses
+    python replay_regression.py              # Replay offline (no network, deterministic)
+"""
+
+import argparse
+import os
+import time
+from pathlib import Path
+
+from src import llm_client
+from src.backends import extract_with_backend
+from src.contract_validator import validate_contract
+from src.evaluation import EvaluationStore
+
+parser = argparse.ArgumentParser(description="Offline accuracy regression over the sample corpus")
+parser.add_argument("--record", action="store_true", help="Call the API and record responses")
+parser.add_argument("--folder", default="data/contracts", help="Folder containing contract PDFs")
+parser.add_argument("--db", default="data/contracts.db", help="Database holding ground truth")
+parser.add_argument("--validation-csv", default="data/validation.csv", help="Imported as ground truth if the database has none")
+parser.add_argument("--cache", default=None, help="Response store (default: LLM_CACHE_PATH or data/llm_cache.db)")
+args = parser.parse_args()
+
+if args.cache:
+    os.environ["LLM_CACHE_PATH"] = args.cache
+
+mode = "record" if args.record else "replay"
+llm_client.set_cache_mode(mode)
+
+print("=" * 60)
+print(f"ACCURACY REGRESSION RUN ({mode.upper()})")
+print("=" * 60)
+print()
+
+pdf_files = sorted(Path(args.folder).glob("*.pdf"))
+store = EvaluationStore(args.db)
+if store.count() == 0 and Path(args.validation_csv).exists():
+    store.import_validation_csv(args.validation_csv)
+
+records = {}
+failed = []
+invalid = []
+missed = []
+
+start = time.perf_counter()
+
+for pdf_file in pdf_files:
+    try:
+        data = extract_with_backend(str(pdf_file), backend="simple")
+    except llm_client.CacheMissError:
+        missed.append(pdf_file.name)
+        continue
+    except Exception as e:
+        failed.append((pdf_file.name, str(e)))
+        continue
+
+    records[pdf_file.name] = data
+    is_valid, errors, _ = validate_contract(data)
+    if not is_valid:
+        invalid.append((pdf_file.name, errors))
+
+report = store.evaluate_records(records)
+elapsed = time.perf_counter() - start
+store.close()
+
+cache_stats = llm_client.get_cache().stats()
+
+print(f"Contracts:           {len(pdf_files)}")
+print(f"Extracted:           {len(records)}")
+print(f"Failed:              {len(failed)}")
+print(f"Validation errors:   {len(invalid)}")
+print(f"Elapsed:             {elapsed:.2f}s")
+print()
+
+print(" CACHE")
+print("-" * 60)
+print(f"Hits:                {cache_stats['hits']}")
+print(f"Misses:              {cache_stats['misses']}")
+print(f"Stored responses:    {cache_stats['entries']} ({cache_stats['stored_bytes'] / 1024:.1f} KiB)")
+if missed:
+    print()
+    print("Not recorded (run with --record):")
+    for filename in missed:
+        print(f"  • {filename}")
+print()
+
+print(" ACCURACY")
+print("-" * 60)
+if report['total']:
+    print(f"Overall:             {report['correct']}/{report['total']} ({report['accuracy']:.1f}%)")
+    for field, stats in sorted(report['per_field'].items()):
+        print(f"  {field:<22} {stats['correct']}/{stats['total']} ({stats['accuracy']:.1f}%)")
+else:
+    print("No extracted contracts have ground truth")
+print()
+
+if failed:
+    print("Failed extractions:")
+    for filename, error in failed:
+        print(f"  • {filename}: {error[:80]}")
+    print()
+
+if invalid:
+    print("Validation errors:")
+    for filename, errors in invalid:
+        print(f"  • {filename}: {errors[0]}")
+    print()
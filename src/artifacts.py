@@ -0,0 +1,327 @@
+"""
+Artifact Store
+Content-addressed, compressed store of page text and raw LLM responses per contract
+
+Each artifact is stored once under the SHA-256 of its content, compressed
+with zstd (zlib when the zstandard package is not installed); the codec
+is recorded per blob, so both kinds stay readable. A document row links
+a PDF (by the hash of its bytes) and its filename to the page text and
+the responses of its latest extraction, so re-extraction, re-validation
+and index backfills read text from here instead of re-parsing PDFs.
+
+Usage:
+    python -m src.artifacts            # Footprint and read throughput
+"""
+
+import os
+import json
+import zlib
+import sqlite3
+import hashlib
+import threading
+import time
+import logging
+from typing import Dict, List, Optional
+
+from src.pdf_text import PdfSource, extract_text_pages
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARTIFACT_PATH = "data/artifacts.db"
+
+ZSTD_LEVEL = 10
+ZLIB_LEVEL = 6
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def document_hash(source: PdfSource) -> str:
+    """Hash of a PDF's bytes (reads the file for a path)."""
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            return content_hash(f.read())
+    return content_hash(bytes(source))
+
+
+def compress(data: bytes) -> tuple:
+    """Compress with the best available codec; returns (codec, payload)."""
+    zstandard = _zstd()
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return "zlib", zlib.compress(data, ZLIB_LEVEL)
+
+
+def decompress(codec: str, payload: bytes) -> bytes:
+    """
+    Decompress a stored payload.
+
+    Raises:
+        RuntimeError: If the blob is zstd-compressed and zstandard is not installed
+    """
+    if codec == "zlib":
+        return zlib.decompress(payload)
+    if codec == "zstd":
+        zstandard = _zstd()
+        if zstandard is None:
+            raise RuntimeError("Artifact is zstd-compressed; install zstandard to read it")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    raise ValueError(f"Unknown artifact codec '{codec}'")
+
+
+class ArtifactStore:
+    """
+    Compressed blobs keyed by content hash, plus a per-document index.
+
+    Identical content (a re-uploaded PDF's text, a replayed response) is
+    stored once however many documents reference it.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Open (or create) the store.
+
+        Args:
+            db_path: Path to SQLite file (reads ARTIFACT_STORE_PATH if not provided)
+        """
+        self.db_path = db_path or os.getenv("ARTIFACT_STORE_PATH", DEFAULT_ARTIFACT_PATH)
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                codec TEXT NOT NULL,
+                raw_size INTEGER NOT NULL,
+                data BLOB NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                doc_hash TEXT PRIMARY KEY,
+                filename TEXT,
+                pages_hash TEXT REFERENCES blobs(hash),
+                page_count INTEGER,
+                responses_hash TEXT REFERENCES blobs(hash),
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_filename ON documents(filename)")
+        self.conn.commit()
+
+    def put(self, data: bytes) -> str:
+        """Store bytes (once per content); returns their hash."""
+        digest = content_hash(data)
+        with self._lock:
+            exists = self.conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        if exists:
+            return digest
+        codec, payload = compress(data)
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO blobs (hash, codec, raw_size, data) VALUES (?, ?, ?, ?)",
+                (digest, codec, len(data), payload)
+            )
+            self.conn.commit()
+        return digest
+
+    def get(self, digest: str) -> Optional[bytes]:
+        """Get stored bytes by hash (None if missing)."""
+        with self._lock:
+            row = self.conn.execute("SELECT codec, data FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        return decompress(row[0], row[1]) if row else None
+
+    def put_json(self, value) -> str:
+        return self.put(json.dumps(value, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+
+    def get_json(self, digest: str):
+        data = self.get(digest)
+        return json.loads(data.decode('utf-8')) if data is not None else None
+
+    def save_document(
+        self,
+        doc_hash: str,
+        filename: str,
+        pages: Optional[List[str]] = None,
+        responses: Optional[List[dict]] = None
+    ):
+        """
+        Record a document's page text and the raw responses of its latest extraction.
+
+        Args:
+            doc_hash: Hash of the PDF bytes (see document_hash)
+            filename: Original file name
+            pages: Text per page (kept if not provided)
+            responses: Raw LLM responses (kept if not provided)
+        """
+        pages_hash = self.put_json(pages) if pages is not None else None
+        responses_hash = self.put_json(responses) if responses is not None else None
+        with self._lock:
+            self.conn.execute("""
+                INSERT INTO documents (doc_hash, filename, pages_hash, page_count, responses_hash)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(doc_hash) DO UPDATE SET
+                    filename = excluded.filename,
+                    pages_hash = COALESCE(excluded.pages_hash, documents.pages_hash),
+                    page_count = COALESCE(excluded.page_count, documents.page_count),
+                    responses_hash = COALESCE(excluded.responses_hash, documents.responses_hash),
+                    updated_at = CURRENT_TIMESTAMP
+            """, (doc_hash, filename, pages_hash, len(pages) if pages is not None else None, responses_hash))
+            self.conn.commit()
+
+    def get_document(self, doc_hash: Optional[str] = None, filename: Optional[str] = None) -> Optional[Dict]:
+        """
+        Get a document's artifacts by PDF hash, or the latest stored under a filename.
+
+        Returns:
+            Dictionary with doc_hash, filename, pages and responses (None if not stored)
+        """
+        with self._lock:
+            if doc_hash is not None:
+                row = self.conn.execute(
+                    "SELECT doc_hash, filename, pages_hash, responses_hash FROM documents WHERE doc_hash = ?",
+                    (doc_hash,)
+                ).fetchone()
+            else:
+                row = self.conn.execute("""
+                    SELECT doc_hash, filename, pages_hash, responses_hash FROM documents
+                    WHERE filename = ? ORDER BY updated_at DESC LIMIT 1
+                """, (filename,)).fetchone()
+        if row is None:
+            return None
+        return {
+            'doc_hash': row[0],
+            'filename': row[1],
+            'pages': self.get_json(row[2]) if row[2] else None,
+            'responses': self.get_json(row[3]) if row[3] else None,
+        }
+
+    def get_pages(self, doc_hash: Optional[str] = None, filename: Optional[str] = None) -> Optional[List[str]]:
+        """Stored page text of a document (None if not stored)."""
+        document = self.get_document(doc_hash, filename)
+        return document['pages'] if document else None
+
+    def filenames(self) -> List[str]:
+        """Filenames of all documents with stored page text."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT DISTINCT filename FROM documents WHERE pages_hash IS NOT NULL ORDER BY filename"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def stats(self) -> dict:
+        """Blob and document counts with raw and stored sizes."""
+        with self._lock:
+            blobs, raw_bytes, stored_bytes = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM blobs"
+            ).fetchone()
+            documents, references = self.conn.execute(
+                "SELECT COUNT(*), COUNT(pages_hash) + COUNT(responses_hash) FROM documents"
+            ).fetchone()
+            codecs = dict(self.conn.execute("SELECT codec, COUNT(*) FROM blobs GROUP BY codec").fetchall())
+        return {
+            'documents': documents,
+            'blobs': blobs,
+            'deduplicated': references - blobs,
+            'raw_bytes': raw_bytes,
+            'stored_bytes': stored_bytes,
+            'compression_ratio': raw_bytes / stored_bytes if stored_bytes else 0.0,
+            'codecs': codecs,
+        }
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def artifacts_enabled() -> bool:
+    """Whether extractions keep their page text and responses (ARTIFACT_STORE, on by default)."""
+    return os.getenv("ARTIFACT_STORE", "on").lower() not in ("off", "0", "false", "no")
+
+
+_stores: Dict[str, ArtifactStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_artifact_store(db_path: Optional[str] = None) -> ArtifactStore:
+    """Get the shared store for a path (defaults to ARTIFACT_STORE_PATH)."""
+    db_path = db_path or os.getenv("ARTIFACT_STORE_PATH", DEFAULT_ARTIFACT_PATH)
+    with _stores_lock:
+        if db_path not in _stores:
+            _stores[db_path] = ArtifactStore(db_path)
+        return _stores[db_path]
+
+
+def load_text_pages(source: PdfSource, filename: Optional[str] = None) -> List[str]:
+    """
+    Page text of a PDF, from the artifact store when it was parsed before.
+
+    Parsed text is stored for next time (unless ARTIFACT_STORE=off).
+
+    Args:
+        source: PDF path or content
+        filename: Name recorded with newly stored text (default: the path's base name)
+
+    Returns:
+        Text per page
+    """
+    if not artifacts_enabled():
+        return extract_text_pages(source)
+    store = get_artifact_store()
+    doc_hash = document_hash(source)
+    pages = store.get_pages(doc_hash)
+    if pages is None:
+        pages = extract_text_pages(source)
+        if pages:
+            name = filename or (os.path.basename(source) if isinstance(source, str) else doc_hash[:12])
+            store.save_document(doc_hash, name, pages=pages)
+    return pages
+
+
+def measure_reads(store: ArtifactStore) -> dict:
+    """Read every stored document's page text; returns counts and throughput."""
+    with store._lock:
+        hashes = [row[0] for row in store.conn.execute(
+            "SELECT doc_hash FROM documents WHERE pages_hash IS NOT NULL"
+        ).fetchall()]
+    start = time.perf_counter()
+    text_bytes = sum(len("".join(store.get_pages(h)).encode('utf-8')) for h in hashes)
+    elapsed = time.perf_counter() - start
+    return {
+        'documents': len(hashes),
+        'text_bytes': text_bytes,
+        'seconds': elapsed,
+        'docs_per_second': len(hashes) / elapsed if elapsed else 0.0,
+        'mb_per_second': text_bytes / 1e6 / elapsed if elapsed else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    store = get_artifact_store()
+    stats = store.stats()
+    reads = measure_reads(store)
+
+    print(f"Artifact store: {store.db_path}")
+    print(f"  Documents:   {stats['documents']}")
+    print(f"  Blobs:       {stats['blobs']} ({stats['deduplicated']} duplicate references saved)")
+    print(f"  Codecs:      {', '.join(f'{c} x{n}' for c, n in stats['codecs'].items()) or 'n/a'}")
+    print(f"  Raw size:    {stats['raw_bytes'] / 1e6:.2f} MB")
+    print(f"  Stored size: {stats['stored_bytes'] / 1e6:.2f} MB ({stats['compression_ratio']:.1f}x)")
+    print(f"  Reads:       {reads['documents']} documents in {reads['seconds']:.3f}s "
+          f"({reads['docs_per_second']:.0f} docs/s, {reads['mb_per_second']:.1f} MB/s of text)")
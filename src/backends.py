@@ -0,0 +1,274 @@
+"""
+Extraction Backends
+Common interface, registry and warm instance pool for extraction engines
+"""
+
+import os
+import queue
+import threading
+import logging
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Type
+
+from src.config import load_environment
+from src.pdf_text import PdfSource
+from src.profiling import profiled
+
+logger = logging.getLogger(__name__)
+
+# Backend used when none is requested explicitly
+DEFAULT_BACKEND = "simple"
+DEFAULT_POOL_SIZE = 4
+
+
+class ExtractionBackend(ABC):
+    """
+    Base class for extraction backends.
+
+    Subclasses do their expensive setup (API clients, LLM loading) in
+    __init__ so a pooled instance can be reused across documents.
+    Backends with needs_pdf set read the PDF itself and cannot work from
+    pdf_text alone.
+    """
+
+    name = "base"
+    needs_pdf = False
+
+    def __init__(self, model_name: Optional[str] = None):
+        """
+        Initialize the backend.
+
+        Args:
+            model_name: Model to use (reads MODEL_NAME from env if not provided)
+        """
+        load_environment()
+        self.model_name = model_name or os.getenv("MODEL_NAME", "gpt-4o-mini")
+
+    @abstractmethod
+    def extract(self, pdf_path: PdfSource, pdf_text: Optional[str] = None) -> dict:
+        """
+        Extract contract fields from a PDF.
+
+        Args:
+            pdf_path: Path to the PDF file, or its content as bytes
+            pdf_text: Already extracted text (skips parsing the PDF again)
+
+        Returns:
+            Dictionary with extracted fields
+        """
+
+
+class SimpleOpenAIBackend(ExtractionBackend):
+    """Direct OpenAI chat completion (see simple_extractor.py)."""
+
+    name = "simple"
+
+    def __init__(self, model_name: Optional[str] = None):
+        super().__init__(model_name)
+        from src.llm_client import get_cache_mode
+        from src.simple_extractor import create_client
+        # Replayed runs never touch the network, so no API key is needed
+        self.client = None if get_cache_mode() == "replay" else create_client()
+
+    def extract(self, pdf_path: PdfSource, pdf_text: Optional[str] = None) -> dict:
+        from src.simple_extractor import extract_contract_simple
+        return extract_contract_simple(pdf_path, client=self.client, model_name=self.model_name, pdf_text=pdf_text)
+
+
+class ExtractThinkerBackend(ExtractionBackend):
+    """ExtractThinker pipeline (see extractor.py)."""
+
+    name = "extractthinker"
+    needs_pdf = True
+
+    def __init__(self, model_name: Optional[str] = None):
+        super().__init__(model_name)
+        from src.extractor import ContractExtractor
+        self.extractor = ContractExtractor(model_name=self.model_name)
+
+    def extract(self, pdf_path: PdfSource, pdf_text: Optional[str] = None) -> dict:
+        # pdf_text only sizes the document; ExtractThinker parses the PDF itself
+        if not pdf_path:
+            raise ValueError("The extractthinker backend needs the PDF, not just its text")
+        return self.extractor.extract_to_dict(pdf_path, pdf_text=pdf_text)
+
+
+class CascadeBackend(ExtractionBackend):
+    """Cheap model first, escalating on validation problems (see cascade.py)."""
+
+    name = "cascade"
+
+    def __init__(self, model_name: Optional[str] = None):
+        super().__init__(model_name)
+        from src.cascade import ExtractionCascade
+        self.cascade = ExtractionCascade()
+
+    def extract(self, pdf_path: PdfSource, pdf_text: Optional[str] = None) -> dict:
+        from src.simple_extractor import extract_text_from_pdf
+        if pdf_text is None:
+            pdf_text = extract_text_from_pdf(pdf_path)
+        result = self.cascade.extract(pdf_text)
+        logger.info(f"Cascade used {' -> '.join(a['step'] for a in result.attempts)} "
+                    f"({result.latency:.1f}s, ${result.cost:.4f})")
+        return result.data
+
+
+# Registry of backend name -> class
+_REGISTRY: Dict[str, Type[ExtractionBackend]] = {}
+
+
+def register_backend(backend_cls: Type[ExtractionBackend]) -> Type[ExtractionBackend]:
+    """
+    Register a backend class under its name (usable as a decorator).
+
+    Args:
+        backend_cls: ExtractionBackend subclass
+
+    Returns:
+        The same class
+    """
+    _REGISTRY[backend_cls.name] = backend_cls
+    return backend_cls
+
+
+register_backend(SimpleOpenAIBackend)
+register_backend(ExtractThinkerBackend)
+register_backend(CascadeBackend)
+
+
+def available_backends() -> List[str]:
+    """Get names of all registered backends."""
+    return sorted(_REGISTRY)
+
+
+def get_backend_name(name: Optional[str] = None) -> str:
+    """Resolve a backend name from the argument or EXTRACTION_BACKEND."""
+    name = name or os.getenv("EXTRACTION_BACKEND", DEFAULT_BACKEND)
+    if name not in _REGISTRY:
+        raise ValueError(f"Unknown extraction backend '{name}'. Available: {', '.join(available_backends())}")
+    return name
+
+
+class BackendPool:
+    """
+    Bounded pool of initialized backend instances.
+
+    Instances are created on demand up to max_size and handed back after
+    each document, so callers never pay client/LLM setup twice.
+    """
+
+    def __init__(self, name: str, max_size: int = DEFAULT_POOL_SIZE, model_name: Optional[str] = None):
+        """
+        Initialize the pool.
+
+        Args:
+            name: Registered backend name
+            max_size: Maximum number of live instances
+            model_name: Model passed to each instance
+        """
+        self.name = name
+        self.backend_cls = _REGISTRY[name]
+        self.max_size = max_size
+        self.model_name = model_name
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _create(self) -> ExtractionBackend:
+        backend = self.backend_cls(model_name=self.model_name)
+        logger.info(f"Initialized {self.name} backend instance ({self._created}/{self.max_size})")
+        return backend
+
+    def warm(self, count: int = 1):
+        """
+        Pre-create idle instances so the first documents skip setup.
+
+        Args:
+            count: Number of instances to have ready (capped at max_size)
+        """
+        while True:
+            with self._lock:
+                if self._created >= min(count, self.max_size):
+                    return
+                self._created += 1
+            try:
+                self._idle.put(self._create())
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+    @contextmanager
+    def acquire(self):
+        """Borrow an instance, blocking if max_size are already in use."""
+        backend = None
+        try:
+            backend = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.max_size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    backend = self._create()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                backend = self._idle.get()
+
+        try:
+            yield backend
+        finally:
+            self._idle.put(backend)
+
+    def size(self) -> int:
+        """Get the number of instances created so far."""
+        return self._created
+
+
+# One pool per (backend, model)
+_pools: Dict[tuple, BackendPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name: Optional[str] = None, model_name: Optional[str] = None) -> BackendPool:
+    """
+    Get the shared pool for a backend, creating it on first use.
+
+    Args:
+        name: Backend name (reads EXTRACTION_BACKEND from env if not provided)
+        model_name: Model override for this pool
+
+    Returns:
+        BackendPool for the backend
+    """
+    load_environment()
+    name = get_backend_name(name)
+    key = (name, model_name)
+
+    with _pools_lock:
+        if key not in _pools:
+            max_size = int(os.getenv("EXTRACTION_POOL_SIZE", DEFAULT_POOL_SIZE))
+            _pools[key] = BackendPool(name, max_size=max_size, model_name=model_name)
+        return _pools[key]
+
+
+@profiled("extract_with_backend")
+def extract_with_backend(pdf_path: PdfSource, backend: Optional[str] = None, pdf_text: Optional[str] = None) -> dict:
+    """
+    Extract a contract with a pooled backend instance.
+
+    Args:
+        pdf_path: Path to contract PDF, or its content as bytes
+        backend: Backend name (reads EXTRACTION_BACKEND from env if not provided)
+        pdf_text: Already extracted text, if the caller has it
+
+    Returns:
+        Dictionary with extracted fields
+    """
+    with get_pool(backend).acquire() as instance:
+        return instance.extract(pdf_path, pdf_text=pdf_text)
@@ -0,0 +1,457 @@
+"""
+Re-extraction Campaigns
+Versioned re-runs of extraction over the stored corpus, with field diffs and bulk promotion
+
+A campaign re-extracts every stored contract with one backend, model and
+prompt version, reading page text from the artifact store (or the PDF
+folder when a contract has none). Each result is kept as a versioned
+record next to the contract, with the fields that differ from the
+current values. Runs go in batches, so an interrupted campaign resumes
+from the contracts it has not recorded yet (retrying failed ones). Promotion copies a
+campaign's changed fields into the contracts table in one transaction.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from src.evaluation import FIELDS, compare_field, normalize_text
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CAMPAIGN_WORKERS = 8
+DEFAULT_BATCH_SIZE = 200
+
+# Version record statuses
+OK = "ok"
+FAILED = "failed"
+NO_TEXT = "no_text"
+
+# Campaign statuses
+RUNNING = "running"
+COMPLETE = "complete"
+PROMOTED = "promoted"
+
+
+def diff_fields(current: Dict, new: Dict) -> List[str]:
+    """Fields whose new value differs from the current one after normalization (see compare_field)."""
+    return [field for field in FIELDS if not compare_field(field, new.get(field), current.get(field))]
+
+
+class CampaignStore:
+    """
+    Campaigns and their version records, stored next to the contracts table.
+
+    One row per (campaign, contract) holds the re-extracted fields, so a
+    campaign's diff and promotion are single queries.
+    """
+
+    def __init__(self, db_path: str = "data/contracts.db"):
+        """
+        Initialize the store.
+
+        Args:
+            db_path: Path to SQLite database file (the contracts database)
+
+        Raises:
+            RuntimeError: If contracts are sharded (CONTRACT_SHARD_BY), which campaigns do not support yet
+        """
+        if os.getenv("CONTRACT_SHARD_BY"):
+            raise RuntimeError(
+                "Re-extraction campaigns only work on the single-file contracts database; "
+                "unset CONTRACT_SHARD_BY to use them"
+            )
+        self.db_path = db_path
+        self.conn = None
+        self.create_tables()
+
+    def get_connection(self) -> sqlite3.Connection:
+        """Get database connection (creates if needed)."""
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.db_path, timeout=30)
+            self.conn.row_factory = sqlite3.Row
+        return self.conn
+
+    def create_tables(self):
+        """Create campaign tables if they don't exist."""
+        conn = self.get_connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS extraction_campaigns (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE,
+                backend TEXT NOT NULL,
+                model TEXT,
+                prompt_version TEXT,
+                status TEXT NOT NULL DEFAULT 'running',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                promoted_at TIMESTAMP
+            )
+        """)
+        columns = ",\n".join(f"                {field} TEXT" for field in FIELDS)
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS extraction_versions (
+                campaign_id INTEGER NOT NULL REFERENCES extraction_campaigns(id),
+                contract_id INTEGER NOT NULL,
+{columns},
+                status TEXT NOT NULL,
+                error TEXT,
+                changed_fields TEXT,
+                latency REAL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (campaign_id, contract_id)
+            )
+        """)
+        conn.commit()
+
+    def create_campaign(self, name: str, backend: str, model: Optional[str], prompt_version: Optional[str]) -> Dict:
+        """
+        Get a campaign by name, creating it if new.
+
+        An existing campaign keeps its original settings so a resumed run
+        stays comparable.
+        """
+        conn = self.get_connection()
+        conn.execute(
+            "INSERT OR IGNORE INTO extraction_campaigns (name, backend, model, prompt_version) VALUES (?, ?, ?, ?)",
+            (name, backend, model, prompt_version)
+        )
+        conn.commit()
+        return self.get_campaign(name)
+
+    def get_campaign(self, name: str) -> Optional[Dict]:
+        row = self.get_connection().execute("SELECT * FROM extraction_campaigns WHERE name = ?", (name,)).fetchone()
+        return dict(row) if row else None
+
+    def list_campaigns(self) -> List[Dict]:
+        """Get all campaigns with their record counts, newest first."""
+        rows = self.get_connection().execute("""
+            SELECT c.*, COUNT(v.contract_id) AS records,
+                   SUM(v.status = 'ok' AND v.changed_fields != '[]') AS changed
+            FROM extraction_campaigns c
+            LEFT JOIN extraction_versions v ON v.campaign_id = c.id
+            GROUP BY c.id
+            ORDER BY c.id DESC
+        """).fetchall()
+        return [dict(row) for row in rows]
+
+    def pending_contracts(self, campaign_id: int, limit: int, retry_failed_before: Optional[str] = None) -> List[Dict]:
+        """
+        Contracts still to extract in the campaign, in ID order.
+
+        Args:
+            campaign_id: Campaign ID
+            limit: Maximum contracts
+            retry_failed_before: Also return contracts whose record failed before
+                this time ('%Y-%m-%d %H:%M:%S'), so a resumed run retries them once
+        """
+        rows = self.get_connection().execute(f"""
+            SELECT c.id, c.filename, {', '.join('c.' + f for f in FIELDS)}
+            FROM contracts c
+            LEFT JOIN extraction_versions v ON v.campaign_id = ? AND v.contract_id = c.id
+            WHERE v.contract_id IS NULL OR (v.status = ? AND v.created_at < ?)
+            ORDER BY c.id
+            LIMIT ?
+        """, (campaign_id, FAILED, retry_failed_before or '', limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def record_versions(self, campaign_id: int, records: List[Dict]):
+        """Store a batch of version records in one transaction."""
+        conn = self.get_connection()
+        placeholders = ", ".join("?" * (len(FIELDS) + 7))
+        conn.executemany(f"""
+            INSERT OR REPLACE INTO extraction_versions (
+                campaign_id, contract_id, {', '.join(FIELDS)}, status, error, changed_fields, latency, created_at
+            ) VALUES ({placeholders})
+        """, [
+            (campaign_id, r['contract_id'], *[(r['data'] or {}).get(f) for f in FIELDS],
+             r['status'], r.get('error'), json.dumps(r.get('changed', [])), r.get('latency'),
+             time.strftime('%Y-%m-%d %H:%M:%S'))
+            for r in records
+        ])
+        conn.commit()
+
+    def set_status(self, campaign_id: int, status: str):
+        conn = self.get_connection()
+        conn.execute("UPDATE extraction_campaigns SET status = ? WHERE id = ?", (status, campaign_id))
+        conn.commit()
+
+    def diff(self, campaign_id: int, examples: int = 3) -> Dict:
+        """
+        Summarize how a campaign's records differ from the current contracts.
+
+        Changes are recomputed against the contracts as they are now, so
+        edits made since the run are taken into account.
+
+        Returns:
+            Dictionary with record counts by status, contracts changed and,
+            per field, how many values changed, appeared or disappeared,
+            with a few examples
+        """
+        rows = self.get_connection().execute(f"""
+            SELECT v.contract_id, c.filename, v.status,
+                   {', '.join(f'v.{f} AS new_{f}, c.{f} AS old_{f}' for f in FIELDS)}
+            FROM extraction_versions v
+            JOIN contracts c ON c.id = v.contract_id
+            WHERE v.campaign_id = ?
+            ORDER BY v.contract_id
+        """, (campaign_id,)).fetchall()
+
+        statuses: Dict[str, int] = {}
+        fields = {f: {'changed': 0, 'added': 0, 'removed': 0, 'examples': []} for f in FIELDS}
+        changed_contracts = 0
+        for row in rows:
+            statuses[row['status']] = statuses.get(row['status'], 0) + 1
+            if row['status'] != OK:
+                continue
+            old = {f: row[f'old_{f}'] for f in FIELDS}
+            new = {f: row[f'new_{f}'] for f in FIELDS}
+            changed = diff_fields(old, new)
+            changed_contracts += bool(changed)
+            for field in changed:
+                entry = fields[field]
+                if not normalize_text(old[field]):
+                    entry['added'] += 1
+                elif not normalize_text(new[field]):
+                    entry['removed'] += 1
+                else:
+                    entry['changed'] += 1
+                if len(entry['examples']) < examples:
+                    entry['examples'].append({'filename': row['filename'], 'old': old[field], 'new': new[field]})
+
+        return {
+            'records': len(rows),
+            'statuses': statuses,
+            'changed_contracts': changed_contracts,
+            'fields': fields
+        }
+
+    def promote(self, campaign_id: int) -> int:
+        """
+        Make a campaign's values current, in one transaction.
+
+        Only successful records with changed fields are applied, and only
+        the changed fields; vendor IDs are re-resolved for new vendor names
+        and the updated contracts are re-indexed for semantic search.
+
+        Returns:
+            Number of contracts updated
+        """
+        from src.database import ContractDatabase
+
+        db = ContractDatabase(self.db_path)
+        conn = db.get_connection()
+        try:
+            rows = conn.execute(f"""
+                SELECT v.contract_id, {', '.join(f'v.{f} AS new_{f}, c.{f} AS old_{f}' for f in FIELDS)}
+                FROM extraction_versions v
+                JOIN contracts c ON c.id = v.contract_id
+                WHERE v.campaign_id = ? AND v.status = ?
+            """, (campaign_id, OK)).fetchall()
+
+            promoted = []
+            for row in rows:
+                old = {f: row[f'old_{f}'] for f in FIELDS}
+                new = {f: row[f'new_{f}'] for f in FIELDS}
+                changed = diff_fields(old, new)
+                if not changed:
+                    continue
+                assignments = {f: new[f] for f in changed}
+                if 'vendor_name' in changed:
+                    assignments['vendor_id'] = db.resolve_vendor(new['vendor_name'])
+                conn.execute(
+                    f"UPDATE contracts SET {', '.join(f'{c} = ?' for c in assignments)} WHERE id = ?",
+                    [*assignments.values(), row['contract_id']]
+                )
+                promoted.append((row['contract_id'], {**old, **{f: new[f] for f in changed}}))
+
+            conn.execute(
+                "UPDATE extraction_campaigns SET status = ?, promoted_at = CURRENT_TIMESTAMP WHERE id = ?",
+                (PROMOTED, campaign_id)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            db.close()
+
+        # Search must find contracts by their new text, not the replaced one
+        from src.semantic_search import index_contract, unindex_contract
+        for contract_id, values in promoted:
+            unindex_contract(contract_id)
+            index_contract(contract_id, values)
+
+        logger.info(f"Promoted campaign {campaign_id}: {len(promoted)} contracts updated")
+        return len(promoted)
+
+    def close(self):
+        """Close database connection."""
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+
+class ReextractionCampaign:
+    """
+    Runs one campaign over the corpus.
+
+    Contracts are processed in batches: each batch is extracted by a
+    thread pool and its records are written in one transaction before the
+    next batch starts, so at most one batch of work is lost on interrupt.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        db_path: str = "data/contracts.db",
+        backend: Optional[str] = None,
+        model_name: Optional[str] = None,
+        workers: Optional[int] = None,
+        pdf_folder: Optional[str] = "data/contracts",
+        extract_fn: Optional[Callable[[str, List[str]], dict]] = None
+    ):
+        """
+        Initialize (or resume) a campaign.
+
+        Args:
+            name: Campaign name (reusing a name resumes that campaign)
+            db_path: Contracts database
+            backend: Extraction backend (reads EXTRACTION_BACKEND if not provided)
+            model_name: Model override (reads MODEL_NAME if not provided)
+            workers: Contracts extracted at once (reads CAMPAIGN_WORKERS if not provided)
+            pdf_folder: Where to parse PDFs with no stored page text (None to skip them)
+            extract_fn: Replaces the backend: takes (filename, pages) and returns fields
+        """
+        from src.backends import get_backend_name
+        from src.prompts import get_template
+
+        self.store = CampaignStore(db_path)
+        self.campaign = self.store.create_campaign(
+            name,
+            get_backend_name(backend),
+            model_name or os.getenv("MODEL_NAME", "gpt-4o-mini"),
+            get_template().name
+        )
+        self.workers = workers or int(os.getenv("CAMPAIGN_WORKERS", DEFAULT_CAMPAIGN_WORKERS))
+        self.pdf_folder = pdf_folder
+        self.extract_fn = extract_fn
+
+    @property
+    def campaign_id(self) -> int:
+        return self.campaign['id']
+
+    def _pages(self, filename: str) -> Optional[List[str]]:
+        from src.artifacts import get_artifact_store, load_text_pages
+
+        pages = get_artifact_store().get_pages(filename=filename)
+        if pages is None and self.pdf_folder:
+            path = Path(self.pdf_folder) / filename
+            if path.exists():
+                pages = load_text_pages(str(path))
+        return pages
+
+    def _extract(self, filename: str, pages: List[str]) -> dict:
+        if self.extract_fn is not None:
+            return self.extract_fn(filename, pages)
+
+        from src.backends import get_pool
+        from src.pdf_text import join_pages
+
+        path = Path(self.pdf_folder or "") / filename
+        source = str(path) if self.pdf_folder and path.exists() else b""
+        pool = get_pool(self.campaign['backend'], self.campaign['model'])
+        if not source and pool.backend_cls.needs_pdf:
+            raise FileNotFoundError(f"The {self.campaign['backend']} backend reads the PDF itself; "
+                                    f"{filename} is not in {self.pdf_folder or 'a --folder'}")
+        with pool.acquire() as instance:
+            return instance.extract(source, pdf_text=join_pages(pages))
+
+    def _process(self, contract: Dict) -> Dict:
+        record = {'contract_id': contract['id'], 'data': None, 'status': OK}
+        start = time.perf_counter()
+        try:
+            pages = self._pages(contract['filename'])
+            if not pages:
+                record['status'] = NO_TEXT
+                return record
+            record['data'] = self._extract(contract['filename'], pages)
+            record['changed'] = diff_fields(contract, record['data'])
+        except Exception as e:
+            logger.warning(f"Re-extraction failed for {contract['filename']}: {e}")
+            record['status'] = FAILED
+            record['error'] = str(e)[:500]
+        finally:
+            record['latency'] = time.perf_counter() - start
+        return record
+
+    def run(
+        self,
+        limit: Optional[int] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        progress: Optional[Callable[[int, Dict], None]] = None
+    ) -> Dict:
+        """
+        Re-extract every contract without a record in this campaign, and
+        retry those that failed in earlier runs.
+
+        Args:
+            limit: Stop after this many contracts (None for all)
+            batch_size: Contracts per batch (records are committed per batch)
+            progress: Called with (contracts done, counts) after each batch
+
+        Returns:
+            Counts of records written this run by status, plus changed and seconds
+
+        Raises:
+            ValueError: If PROMPT_VERSION differs from the campaign's prompt version
+        """
+        from src.prompts import get_template
+
+        prompt_version = get_template().name
+        if self.campaign['prompt_version'] and prompt_version != self.campaign['prompt_version']:
+            raise ValueError(
+                f"Campaign '{self.campaign['name']}' uses prompt version {self.campaign['prompt_version']} "
+                f"but PROMPT_VERSION is {prompt_version}; set PROMPT_VERSION={self.campaign['prompt_version']} "
+                f"to resume it"
+            )
+
+        # Records failed before now are retried once; those failing again wait for the next run
+        started_at = time.strftime('%Y-%m-%d %H:%M:%S')
+        counts = {OK: 0, FAILED: 0, NO_TEXT: 0, 'changed': 0}
+        done = 0
+        start = time.perf_counter()
+        self.store.set_status(self.campaign_id, RUNNING)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while limit is None or done < limit:
+                size = batch_size if limit is None else min(batch_size, limit - done)
+                contracts = self.store.pending_contracts(self.campaign_id, size, started_at)
+                if not contracts:
+                    self.store.set_status(self.campaign_id, COMPLETE)
+                    break
+                records = list(executor.map(self._process, contracts))
+                self.store.record_versions(self.campaign_id, records)
+
+                done += len(records)
+                for record in records:
+                    counts[record['status']] += 1
+                    counts['changed'] += bool(record.get('changed'))
+                if progress:
+                    progress(done, counts)
+
+        counts['seconds'] = time.perf_counter() - start
+        return counts
+
+    def diff(self, examples: int = 3) -> Dict:
+        return self.store.diff(self.campaign_id, examples)
+
+    def promote(self) -> int:
+        return self.store.promote(self.campaign_id)
+
+    def close(self):
+        self.store.close()
@@ -0,0 +1,259 @@
+"""
+Extraction Cascade
+Cheap model first, escalating only when validation finds problems
+
+A policy is a comma-separated list of steps (EXTRACTION_CASCADE):
+
+    gpt-4o-mini     - extract with this model
+    repair          - re-ask the repair model (see repair.py) for just the
+                      flagged fields, from the pages likely to hold them
+    reprompt        - show the previous model its answer and the problems
+                      found, and ask it to correct them
+    gpt-4o          - extract again with a stronger model
+
+Steps run in order until an answer has no problems. Problems are
+validator errors and low-confidence fields (see find_issues); which of
+them trigger escalation is set by CASCADE_ESCALATE_ON.
+"""
+
+import os
+import json
+import time
+import logging
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+from src.chunking import split_text
+from src.contract_validator import validate_contract, validation_issues
+from src.llm_client import call_cost, chat_completion, get_cache_mode
+from src.prompts import count_tokens, get_template, record_usage
+from src.repair import FIELD_HINTS, FieldRepairer, is_null
+from src.simple_extractor import build_extraction_messages, create_client, parse_extraction_result
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CASCADE = "gpt-4o-mini,reprompt,gpt-4o"
+REPROMPT = "reprompt"
+REPAIR = "repair"
+
+# Problem kinds: validator errors, and fields that look wrong or missing
+ESCALATION_TRIGGERS = ("errors", "low_confidence")
+DEFAULT_ESCALATE_ON = "errors,low_confidence"
+
+
+def parse_policy(spec: Optional[str] = None) -> List[str]:
+    """
+    Parse a cascade policy (reads EXTRACTION_CASCADE if not provided).
+
+    Raises:
+        ValueError: If the policy is empty or starts with a re-prompt or repair
+    """
+    spec = spec if spec is not None else os.getenv("EXTRACTION_CASCADE", DEFAULT_CASCADE)
+    steps = [s.strip() for s in spec.split(",") if s.strip()]
+    if not steps:
+        raise ValueError("Extraction cascade needs at least one model")
+    if steps[0] in (REPROMPT, REPAIR):
+        raise ValueError(f"Extraction cascade must start with a model, not '{steps[0]}'")
+    return steps
+
+
+def parse_triggers(spec: Optional[str] = None) -> List[str]:
+    """Parse the escalation triggers (reads CASCADE_ESCALATE_ON if not provided)."""
+    spec = spec if spec is not None else os.getenv("CASCADE_ESCALATE_ON", DEFAULT_ESCALATE_ON)
+    triggers = [t.strip() for t in spec.split(",") if t.strip()]
+    unknown = [t for t in triggers if t not in ESCALATION_TRIGGERS]
+    if unknown:
+        raise ValueError(f"Unknown escalation trigger(s) {unknown}. Use: {', '.join(ESCALATION_TRIGGERS)}")
+    return triggers
+
+
+def _flagged(data: dict, pdf_text: str, triggers: Optional[List[str]]) -> List[dict]:
+    """Validation issues and suspicious nulls enabled by the triggers, as structured issues."""
+    triggers = ESCALATION_TRIGGERS if triggers is None else triggers
+    flagged = [
+        issue for issue in validation_issues(data)
+        if ("errors" in triggers and issue['severity'] == 'error')
+        or ("low_confidence" in triggers and issue['severity'] == 'warning')
+    ]
+    if "low_confidence" in triggers:
+        for field, hint in FIELD_HINTS.items():
+            if is_null(data.get(field)) and hint.search(pdf_text):
+                flagged.append({'severity': 'warning', 'fields': [field],
+                                'message': f"{field}: Missing, but the contract appears to state it"})
+    return flagged
+
+
+def find_issues(data: dict, pdf_text: str, triggers: Optional[List[str]] = None) -> List[str]:
+    """
+    Problems in an extraction that warrant escalation.
+
+    Args:
+        data: Extracted fields
+        pdf_text: Contract text the fields came from
+        triggers: Kinds of problem to report (default: all)
+
+    Returns:
+        Human-readable problems (empty if the answer is acceptable)
+    """
+    return [issue['message'] for issue in _flagged(data, pdf_text, triggers)]
+
+
+def find_issue_fields(data: dict, pdf_text: str, triggers: Optional[List[str]] = None) -> List[str]:
+    """Fields involved in the problems find_issues reports."""
+    return list(dict.fromkeys(field for issue in _flagged(data, pdf_text, triggers) for field in issue['fields']))
+
+
+def build_reprompt_messages(pdf_text: str, previous: dict, issues: List[str]) -> List[dict]:
+    """Extraction messages followed by the previous answer and a request to fix its problems."""
+    problems = "\n".join(f"- {issue}" for issue in issues)
+    return build_extraction_messages(pdf_text) + [
+        {"role": "assistant", "content": json.dumps(previous, ensure_ascii=False)},
+        {"role": "user", "content": (
+            f"Your answer has these problems:\n{problems}\n\n"
+            "Re-read the contract and return the corrected JSON object with the same field names. "
+            "Use null only if the contract really does not state a value."
+        )}
+    ]
+
+
+class CascadeResult:
+    """Outcome of one cascaded extraction."""
+
+    def __init__(self, data: dict, attempts: List[dict]):
+        self.data = data
+        self.attempts = attempts
+
+    @property
+    def latency(self) -> float:
+        return sum(a['latency'] for a in self.attempts)
+
+    @property
+    def cost(self) -> float:
+        return sum(a['cost'] for a in self.attempts)
+
+    @property
+    def escalated(self) -> bool:
+        return len(self.attempts) > 1
+
+    @property
+    def issues(self) -> List[str]:
+        """Problems left in the chosen answer."""
+        return next(a['issues'] for a in self.attempts if a['chosen'])
+
+
+class ExtractionCascade:
+    """
+    Runs a cascade policy over contract text.
+
+    Each step's answer is checked with find_issues; the first answer
+    without problems is returned. If every step leaves problems, the
+    answer with the fewest validator errors (then fewest problems) wins,
+    later steps breaking ties.
+    """
+
+    def __init__(
+        self,
+        steps: Optional[List[str]] = None,
+        escalate_on: Optional[List[str]] = None,
+        client: Optional["OpenAI"] = None
+    ):
+        """
+        Initialize the cascade.
+
+        Args:
+            steps: Policy steps (reads EXTRACTION_CASCADE if not provided)
+            escalate_on: Escalation triggers (reads CASCADE_ESCALATE_ON if not provided)
+            client: Reusable OpenAI client (created unless replaying)
+        """
+        self.steps = steps or parse_policy()
+        self.escalate_on = escalate_on if escalate_on is not None else parse_triggers()
+        if client is None and get_cache_mode() != "replay":
+            client = create_client()
+        self.client = client
+        self._repairer = None
+
+    def _call(self, model: str, messages: List[dict], pdf_text: str) -> tuple:
+        template = get_template()
+        segments = template.segment_tokens(pdf_text, model)
+        # Re-prompts append the previous answer and the problems after the document
+        segments['followup'] = sum(count_tokens(m['content'], model) for m in messages[2:])
+        start = time.perf_counter()
+        response = chat_completion(self.client, model=model, messages=messages, max_tokens=1000, temperature=0.1)
+        latency = time.perf_counter() - start
+        record_usage(template, segments, response, latency)
+        return parse_extraction_result(response.content), latency, call_cost(model, response.usage)
+
+    def _repair(self, previous: dict, pdf_text: str) -> tuple:
+        if self._repairer is None:
+            self._repairer = FieldRepairer(client=self.client)
+        fields = find_issue_fields(previous['data'], pdf_text, self.escalate_on)
+        result = self._repairer.repair(previous['data'], split_text(pdf_text), fields, previous['issues'])
+        return result.data, result.latency, result.cost
+
+    def extract(self, pdf_text: str) -> CascadeResult:
+        """
+        Extract contract fields, escalating through the policy as needed.
+
+        Raises:
+            Exception: The last step's error if no step produced an answer
+        """
+        attempts = []
+        model = None
+        last_error = None
+
+        for step in self.steps:
+            answered = [a for a in attempts if a['data'] is not None]
+            if step in (REPROMPT, REPAIR):
+                if not answered:
+                    continue
+                previous = answered[-1]
+            else:
+                model = step
+
+            attempt = {'step': step, 'model': model, 'data': None, 'issues': [], 'latency': 0.0, 'cost': 0.0,
+                       'chosen': False}
+            attempts.append(attempt)
+            try:
+                if step == REPAIR:
+                    attempt['data'], attempt['latency'], attempt['cost'] = self._repair(previous, pdf_text)
+                    attempt['model'] = self._repairer.model_name
+                else:
+                    messages = (build_reprompt_messages(pdf_text, previous['data'], previous['issues'])
+                                if step == REPROMPT else build_extraction_messages(pdf_text))
+                    attempt['data'], attempt['latency'], attempt['cost'] = self._call(model, messages, pdf_text)
+            except Exception as e:
+                logger.warning(f"Cascade step '{step}' failed: {e}")
+                last_error = e
+                continue
+
+            attempt['issues'] = find_issues(attempt['data'], pdf_text, self.escalate_on)
+            if not attempt['issues']:
+                break
+            logger.info(f"Cascade step '{step}' left {len(attempt['issues'])} problem(s); escalating")
+
+        answered = [a for a in attempts if a['data'] is not None]
+        if not answered:
+            raise last_error or ValueError("Extraction cascade produced no answer")
+
+        best = min(
+            reversed(answered),
+            key=lambda a: (validate_contract(a['data'])[0] is False, len(a['issues']))
+        )
+        best['chosen'] = True
+        return CascadeResult(best['data'], attempts)
+
+
+def summarize_results(results: List[CascadeResult]) -> Dict:
+    """Average latency, cost and escalation rate over cascade results."""
+    count = len(results)
+    if not count:
+        return {'contracts': 0, 'avg_latency': 0.0, 'avg_cost': 0.0, 'escalation_rate': 0.0, 'calls_per_contract': 0.0}
+    return {
+        'contracts': count,
+        'avg_latency': sum(r.latency for r in results) / count,
+        'avg_cost': sum(r.cost for r in results) / count,
+        'escalation_rate': sum(r.escalated for r in results) / count,
+        'calls_per_contract': sum(len(r.attempts) for r in results) / count,
+    }
@@ -0,0 +1,283 @@
+"""
+Adaptive Chunking
+Token-budgeted splitting of large contracts, parallel chunk extraction and field-level merging
+
+Documents whose text fits EXTRACTION_TOKEN_BUDGET are extracted in one
+call. Larger ones are split on page boundaries (oversized pages on
+paragraph boundaries), the chunks are extracted concurrently, and the
+answers are merged field by field. At most EXTRACTION_MAX_CHUNKS chunks
+are sent, the opening chunk plus those that best match the schema
+fields, so latency stays bounded whatever the page count.
+"""
+
+import os
+import re
+import time
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from src.llm_client import chat_completion
+from src.prompts import count_tokens, get_template, record_usage
+from src.repair import PAGE_HINTS, is_null
+from src.simple_extractor import parse_extraction_result
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+logger = logging.getLogger(__name__)
+
+# Document tokens sent per call
+DEFAULT_TOKEN_BUDGET = 12_000
+DEFAULT_MAX_CHUNKS = 8
+DEFAULT_CHUNK_WORKERS = 4
+
+# Tokens per character when sizing paragraph splits
+CHARS_PER_TOKEN = 4
+
+# Chunk size when only joined text (no page breaks) is available
+CHUNK_CHARS = 3000
+
+FIELDS = ['vendor_name', 'contract_number', 'effective_date', 'expiration_date',
+          'total_amount', 'payment_terms', 'contract_type', 'key_deliverables']
+
+# Longest merged key_deliverables value
+MAX_DELIVERABLES_CHARS = 1000
+
+
+def get_token_budget() -> int:
+    """Document tokens per call (EXTRACTION_TOKEN_BUDGET)."""
+    return int(os.getenv("EXTRACTION_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET))
+
+
+class Chunk:
+    """A run of consecutive pages sent in one call."""
+
+    def __init__(self, first_page: int, last_page: int, text: str, tokens: int):
+        self.first_page = first_page
+        self.last_page = last_page
+        self.text = text
+        self.tokens = tokens
+
+    def label(self, total_pages: int) -> str:
+        if self.first_page == self.last_page:
+            return f"page {self.first_page + 1} of {total_pages}"
+        return f"pages {self.first_page + 1}-{self.last_page + 1} of {total_pages}"
+
+
+def split_text(text: str, chunk_chars: int = CHUNK_CHARS) -> List[str]:
+    """Split joined text into page-sized chunks on paragraph boundaries."""
+    chunks, current = [], ""
+    for paragraph in re.split(r'(\n\s*\n)', text):
+        if current and len(current) + len(paragraph) > chunk_chars:
+            chunks.append(current)
+            current = ""
+        current += paragraph
+    if current.strip():
+        chunks.append(current)
+    return chunks
+
+
+def _split_page(page: str, budget: int, model: str) -> List[str]:
+    """Split one page over the budget on paragraph boundaries."""
+    pieces = []
+    for piece in split_text(page, budget * CHARS_PER_TOKEN):
+        if count_tokens(piece, model) <= budget:
+            pieces.append(piece)
+        else:
+            # A single paragraph over the budget: cut on characters
+            step = budget * CHARS_PER_TOKEN // 2
+            pieces.extend(piece[i:i + step] for i in range(0, len(piece), step))
+    return pieces
+
+
+def plan_chunks(pages: List[str], budget: Optional[int] = None, model: str = "gpt-4o-mini") -> List[Chunk]:
+    """
+    Group pages into chunks of at most `budget` tokens.
+
+    Args:
+        pages: Text per page
+        budget: Document tokens per chunk (reads EXTRACTION_TOKEN_BUDGET if not provided)
+        model: Model whose tokenizer counts the tokens
+
+    Returns:
+        Chunks in document order (one chunk if everything fits)
+    """
+    budget = budget or get_token_budget()
+    chunks = []
+    current, current_tokens, first = [], 0, 0
+
+    def flush(last):
+        if current:
+            chunks.append(Chunk(first, last, "".join(text + "\n" for text in current), current_tokens))
+
+    for index, page in enumerate(pages):
+        tokens = count_tokens(page, model)
+        if tokens > budget:
+            flush(index - 1)
+            for piece in _split_page(page, budget, model):
+                chunks.append(Chunk(index, index, piece + "\n", count_tokens(piece, model)))
+            current, current_tokens, first = [], 0, index + 1
+            continue
+        if current and current_tokens + tokens > budget:
+            flush(index - 1)
+            current, current_tokens, first = [], 0, index
+        current.append(page)
+        current_tokens += tokens
+    flush(len(pages) - 1)
+    return chunks
+
+
+def select_chunks(chunks: List[Chunk], max_chunks: int) -> List[Chunk]:
+    """
+    Keep the opening chunk and the chunks that best match the schema fields.
+
+    Returns:
+        At most max_chunks chunks, in document order
+    """
+    if len(chunks) <= max_chunks:
+        return chunks
+
+    def score(chunk: Chunk) -> float:
+        hits = sum(len(hint.findall(chunk.text)) for hint in PAGE_HINTS.values())
+        return hits / max(chunk.tokens, 1)
+
+    rest = sorted(range(1, len(chunks)), key=lambda i: (-score(chunks[i]), i))[:max_chunks - 1]
+    return [chunks[i] for i in [0] + sorted(rest)]
+
+
+def _normalize(value) -> str:
+    return re.sub(r'\s+', ' ', str(value)).strip().lower()
+
+
+def _is_iso_date(value) -> bool:
+    try:
+        datetime.strptime(str(value), '%Y-%m-%d')
+        return True
+    except ValueError:
+        return False
+
+
+def _amount(value) -> float:
+    digits = re.sub(r'[^\d.]', '', str(value).replace(',', ''))
+    try:
+        return float(digits)
+    except ValueError:
+        return 0.0
+
+
+def merge_results(results: List[Optional[dict]]) -> Tuple[Dict, List[str]]:
+    """
+    Merge per-chunk answers field by field.
+
+    For each field the value stated by the most chunks wins; ties go to
+    the earliest chunk (the parties and number are on the first pages),
+    except total_amount, where the largest amount wins. Dates in
+    YYYY-MM-DD format beat unparseable ones. key_deliverables collects
+    the distinct values of all chunks.
+
+    Args:
+        results: Answers in chunk order (None for failed chunks)
+
+    Returns:
+        (merged fields, fields the chunks disagreed on)
+    """
+    merged = {}
+    conflicts = []
+    for field in FIELDS:
+        values = [(i, r[field]) for i, r in enumerate(results) if r and not is_null(r.get(field))]
+        if field in ('effective_date', 'expiration_date') and any(_is_iso_date(v) for _, v in values):
+            values = [(i, v) for i, v in values if _is_iso_date(v)]
+        if not values:
+            merged[field] = None
+            continue
+
+        if field == 'key_deliverables':
+            distinct = list(dict.fromkeys(str(v).strip() for _, v in values))
+            merged[field] = "; ".join(distinct)[:MAX_DELIVERABLES_CHARS]
+            continue
+
+        votes: Dict[str, dict] = {}
+        for index, value in values:
+            entry = votes.setdefault(_normalize(value), {'value': value, 'count': 0, 'first': index})
+            entry['count'] += 1
+        if len(votes) > 1:
+            conflicts.append(field)
+        if field == 'total_amount':
+            best = max(votes.values(), key=lambda e: (e['count'], _amount(e['value']), -e['first']))
+        else:
+            best = max(votes.values(), key=lambda e: (e['count'], -e['first']))
+        merged[field] = best['value']
+
+    return merged, conflicts
+
+
+def extract_chunk(chunk: Chunk, total_pages: int, client: Optional["OpenAI"], model_name: str) -> dict:
+    """Extract fields from one chunk with the current prompt template."""
+    template = get_template()
+    # The note goes in the document slot so the static prefix stays shared
+    document = (f"[Excerpt: {chunk.label(total_pages)}. Use null for fields these pages do not state.]\n"
+                + chunk.text)
+    segments = template.segment_tokens(document, model_name)
+    start = time.perf_counter()
+    response = chat_completion(client, model=model_name, messages=template.render(document),
+                               max_tokens=1000, temperature=0.1)
+    record_usage(template, segments, response, time.perf_counter() - start)
+    return parse_extraction_result(response.content)
+
+
+def extract_in_chunks(
+    pages: List[str],
+    client: Optional["OpenAI"],
+    model_name: str = "gpt-4o-mini",
+    budget: Optional[int] = None,
+    max_chunks: Optional[int] = None,
+    workers: Optional[int] = None
+) -> dict:
+    """
+    Extract a large document chunk by chunk, in parallel, and merge the answers.
+
+    Args:
+        pages: Text per page
+        client: OpenAI client (may be None in replay mode)
+        model_name: Model to use
+        budget: Document tokens per chunk (reads EXTRACTION_TOKEN_BUDGET if not provided)
+        max_chunks: Most chunks sent (reads EXTRACTION_MAX_CHUNKS if not provided)
+        workers: Chunks extracted at once (reads EXTRACTION_CHUNK_WORKERS if not provided)
+
+    Returns:
+        Merged fields (see merge_results)
+
+    Raises:
+        Exception: The first chunk error if every chunk failed
+    """
+    max_chunks = max_chunks or int(os.getenv("EXTRACTION_MAX_CHUNKS", DEFAULT_MAX_CHUNKS))
+    workers = workers or int(os.getenv("EXTRACTION_CHUNK_WORKERS", DEFAULT_CHUNK_WORKERS))
+
+    planned = plan_chunks(pages, budget, model_name)
+    chunks = select_chunks(planned, max_chunks)
+    logger.info(f"Extracting {len(pages)} pages in {len(chunks)} chunk(s)"
+                f"{f' (skipped {len(planned) - len(chunks)} low-signal chunks)' if len(chunks) < len(planned) else ''}")
+
+    def run(chunk):
+        try:
+            return extract_chunk(chunk, len(pages), client, model_name), None
+        except Exception as e:
+            logger.warning(f"Chunk {chunk.label(len(pages))} failed: {e}")
+            return None, e
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(chunks)) or 1) as executor:
+        # Each chunk runs in a copy of the caller's context so response capture follows it
+        futures = [executor.submit(contextvars.copy_context().run, run, chunk) for chunk in chunks]
+        outcomes = [future.result() for future in futures]
+
+    results = [result for result, _ in outcomes]
+    if not any(results):
+        raise outcomes[0][1]
+
+    merged, conflicts = merge_results(results)
+    if conflicts:
+        logger.info(f"Chunks disagreed on: {', '.join(conflicts)}")
+    return merged
@@ -0,0 +1,32 @@
+"""
+Configuration Loading
+Deferred .env loading shared by all entry points
+"""
+
+import threading
+
+_loaded = False
+_lock = threading.Lock()
+
+
+def load_environment():
+    """
+    Load variables from .env once per process.
+
+    Called on first use of anything that needs configuration, so plain
+    imports of the package stay free of file I/O and python-dotenv.
+    """
+    global _loaded
+
+    if _loaded:
+        return
+
+    with _lock:
+        if not _loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+
+            # PROFILE_DIR may have come from .env
+            from src.profiling import enable_from_env
+            enable_from_env()
+            _loaded = True
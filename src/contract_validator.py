@@ -6,6 +6,8 @@ Validates extracted contract data for common errors and format issues
 from datetime import datetime
 import re
 
+from src.profiling import profiled
+
 
 class ContractValidator:
     """Validates extracted contract data"""
@@ -13,7 +15,9 @@ class ContractValidator:
     def __init__(self):
         self.errors = []
         self.warnings = []
+        self.issues = []
     
+    @profiled("validator.validate")
     def validate(self, contract_data):
         """
         Validate all fields in contract data
@@ -21,6 +25,7 @@ class ContractValidator:
         """
         self.errors = []
         self.warnings = []
+        self.issues = []
         
         # Run all validation checks
         self._validate_required_fields(contract_data)
@@ -31,10 +36,20 @@ class ContractValidator:
         is_valid = len(self.errors) == 0
         return is_valid, self.errors, self.warnings
     
+    def _error(self, message, fields):
+        """Record an error about the given fields"""
+        self.errors.append(message)
+        self.issues.append({'severity': 'error', 'fields': fields, 'message': message})
+    
+    def _warning(self, message, fields):
+        """Record a warning about the given fields"""
+        self.warnings.append(message)
+        self.issues.append({'severity': 'warning', 'fields': fields, 'message': message})
+    
     def _validate_required_fields(self, data):
         """Check required fields are present"""
         if not data.get('vendor_name') or data['vendor_name'] == 'NULL':
-            self.errors.append("CRITICAL: Missing vendor name (required field)")
+            self._error("CRITICAL: Missing vendor name (required field)", ['vendor_name'])
     
     def _validate_dates(self, data):
         """Validate date formats"""
@@ -45,7 +60,7 @@ class ContractValidator:
             if date_value and date_value != 'NULL':
                 # Check if it's in YYYY-MM-DD format
                 if not self._is_valid_date_format(date_value):
-                    self.warnings.append(f"{field}: Invalid format '{date_value}' (expected YYYY-MM-DD)")
+                    self._warning(f"{field}: Invalid format '{date_value}' (expected YYYY-MM-DD)", [field])
     
     def _validate_amount(self, data):
         """Validate amount field"""
@@ -54,15 +69,15 @@ class ContractValidator:
         if amount and amount != 'NULL':
             # Check if amount contains at least one number
             if not re.search(r'\d', amount):
-                self.warnings.append(f"total_amount: No numeric value found in '{amount}'")
+                self._warning(f"total_amount: No numeric value found in '{amount}'", ['total_amount'])
             
             # Check if amount is suspiciously low or high
             numeric_amount = self._extract_numeric_amount(amount)
             if numeric_amount:
                 if numeric_amount < 100:
-                    self.warnings.append(f"total_amount: Unusually low amount ${numeric_amount}")
+                    self._warning(f"total_amount: Unusually low amount ${numeric_amount}", ['total_amount'])
                 elif numeric_amount > 10000000:
-                    self.warnings.append(f"total_amount: Unusually high amount ${numeric_amount}")
+                    self._warning(f"total_amount: Unusually high amount ${numeric_amount}", ['total_amount'])
     
     def _validate_date_logic(self, data):
         """Validate date relationships"""
@@ -75,7 +90,10 @@ class ContractValidator:
                 expiration_dt = datetime.strptime(expiration, '%Y-%m-%d')
                 
                 if expiration_dt <= effective_dt:
-                    self.errors.append(f"DATE LOGIC ERROR: Expiration date ({expiration}) is before or equal to effective date ({effective})")
+                    self._error(
+                        f"DATE LOGIC ERROR: Expiration date ({expiration}) is before or equal to effective date ({effective})",
+                        ['effective_date', 'expiration_date']
+                    )
             except ValueError:
                 # Already caught in format validation
                 pass
@@ -107,7 +125,8 @@ class ContractValidator:
             'error_count': len(self.errors),
             'warning_count': len(self.warnings),
             'errors': self.errors,
-            'warnings': self.warnings
+            'warnings': self.warnings,
+            'issues': self.issues
         }
 
 
@@ -125,6 +144,22 @@ def validate_contract(contract_data):
     return validator.validate(contract_data)
 
 
+def validation_issues(contract_data):
+    """
+    Validate contract data and return structured issues
+    
+    Args:
+        contract_data: Dictionary with extracted contract fields
+    
+    Returns:
+        list of dicts with 'severity' ('error' or 'warning'), 'fields'
+        (the fields involved) and 'message'
+    """
+    validator = ContractValidator()
+    validator.validate(contract_data)
+    return validator.issues
+
+
 # Example usage
 if __name__ == "__main__":
     # Test with sample data
@@ -3,13 +3,37 @@ Database Module
 SQLite database operations for storing and querying contract data
 """
 
+import os
 import sqlite3
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import logging
 
+from src.profiling import profiled
+from src.vendors import VendorIndex, vendor_match_key
+from src.near_duplicates import (
+    DEFAULT_THRESHOLD, band_hashes, estimate_similarity,
+    signature_from_bytes, signature_to_bytes
+)
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_DB_PATH = "data/contracts.db"
+
+
+class PartialInsertError(Exception):
+    """
+    Raised when a multi-transaction batch insert stored only some contracts.
+
+    contract_ids holds the ID of each stored contract and None for those
+    rolled back; error is the exception that rolled them back.
+    """
+
+    def __init__(self, contract_ids: List[Optional[int]], error: Exception):
+        super().__init__(f"{contract_ids.count(None)} of {len(contract_ids)} contracts not stored: {error}")
+        self.contract_ids = contract_ids
+        self.error = error
+
 
 class ContractDatabase:
     """
@@ -25,6 +49,8 @@ class ContractDatabase:
         """
         self.db_path = db_path
         self.conn = None
+        self._vendor_index = None
+        self._vendor_index_max_id = 0
         self.create_tables()
     
     def get_connection(self) -> sqlite3.Connection:
@@ -56,29 +82,249 @@ class ContractDatabase:
             )
         """)
         
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS vendors (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                canonical_name TEXT NOT NULL,
+                match_key TEXT NOT NULL UNIQUE,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        # Exact raw-name lookups skip the similarity index entirely
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS vendor_aliases (
+                alias TEXT PRIMARY KEY,
+                vendor_id INTEGER NOT NULL REFERENCES vendors(id)
+            )
+        """)
+        
+        # Older databases predate vendor_id
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(contracts)")}
+        if 'vendor_id' not in columns:
+            cursor.execute("ALTER TABLE contracts ADD COLUMN vendor_id INTEGER REFERENCES vendors(id)")
+        
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_contracts_vendor_id ON contracts(vendor_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_contracts_upload_date ON contracts(upload_date)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_contracts_filename ON contracts(filename)")
+        
+        # MinHash signature per contract plus one LSH bucket row per band
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS contract_signatures (
+                contract_id INTEGER PRIMARY KEY REFERENCES contracts(id),
+                signature BLOB NOT NULL
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS contract_lsh (
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                contract_id INTEGER NOT NULL
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_contract_lsh_bucket ON contract_lsh(band, bucket)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_contract_lsh_contract ON contract_lsh(contract_id)")
+        
+        # Change-data feed: one row per insert/update/delete, read by consumers
+        # from their last offset (see changefeed.py)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS contract_changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                contract_id INTEGER NOT NULL,
+                op TEXT NOT NULL,
+                changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS change_consumers (
+                consumer TEXT PRIMARY KEY,
+                last_seq INTEGER NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        for op, row in (('insert', 'NEW'), ('update', 'NEW'), ('delete', 'OLD')):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS contracts_changelog_{op}
+                AFTER {op.upper()} ON contracts
+                BEGIN
+                    INSERT INTO contract_changes (contract_id, op) VALUES ({row}.id, '{op}');
+                END
+            """)
+        
         conn.commit()
+        
+        self.backfill_vendor_ids()
         logger.info(f"Database initialized: {self.db_path}")
     
-    def insert_contract(self, filename: str, contract_data: dict) -> int:
+    def _get_vendor_index(self) -> VendorIndex:
+        """Get the vendor similarity index, loading vendors added since last use."""
+        if self._vendor_index is None:
+            self._vendor_index = VendorIndex()
+        
+        cursor = self.get_connection().cursor()
+        cursor.execute(
+            "SELECT id, match_key FROM vendors WHERE id > ? ORDER BY id",
+            (self._vendor_index_max_id,)
+        )
+        for vendor_id, match_key in cursor.fetchall():
+            self._vendor_index.add(vendor_id, match_key)
+            self._vendor_index_max_id = vendor_id
+        
+        return self._vendor_index
+    
+    def resolve_vendor(self, vendor_name: Optional[str]) -> Optional[int]:
+        """
+        Map a raw vendor name to a canonical vendor ID (creates the vendor if new).
+        
+        Does not commit; callers commit together with the contract row.
+        
+        Args:
+            vendor_name: Vendor name as extracted
+            
+        Returns:
+            Vendor ID, or None if the name is empty
+        """
+        if not vendor_name or vendor_name == 'NULL':
+            return None
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        alias = vendor_name.strip()
+        cursor.execute("SELECT vendor_id FROM vendor_aliases WHERE alias = ?", (alias,))
+        row = cursor.fetchone()
+        if row:
+            return row[0]
+        
+        match_key = vendor_match_key(alias)
+        if not match_key:
+            return None
+        
+        match = self._get_vendor_index().lookup(match_key)
+        if match:
+            vendor_id = match[0]
+        else:
+            cursor.execute(
+                "INSERT INTO vendors (canonical_name, match_key) VALUES (?, ?)",
+                (alias, match_key)
+            )
+            vendor_id = cursor.lastrowid
+            self._get_vendor_index()
+            logger.info(f"New vendor: {alias} (ID: {vendor_id})")
+        
+        cursor.execute(
+            "INSERT OR IGNORE INTO vendor_aliases (alias, vendor_id) VALUES (?, ?)",
+            (alias, vendor_id)
+        )
+        return vendor_id
+    
+    def backfill_vendor_ids(self) -> int:
+        """
+        Resolve vendor IDs for contracts stored before vendor resolution existed.
+        
+        Returns:
+            Number of contracts updated
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, vendor_name FROM contracts
+            WHERE vendor_id IS NULL AND vendor_name IS NOT NULL
+        """)
+        rows = cursor.fetchall()
+        
+        updates = [(self.resolve_vendor(row['vendor_name']), row['id']) for row in rows]
+        cursor.executemany("UPDATE contracts SET vendor_id = ? WHERE id = ?", updates)
+        conn.commit()
+        
+        if updates:
+            logger.info(f"Backfilled vendor IDs for {len(updates)} contracts")
+        return len(updates)
+    
+    @profiled("db.insert_contract")
+    def insert_contract(
+        self,
+        filename: str,
+        contract_data: dict,
+        signature: Optional[List[int]] = None,
+        vendor_id: Optional[int] = None
+    ) -> int:
         """
         Insert a new contract into the database.
         
         Args:
             filename: Name of the contract file
             contract_data: Dictionary with extracted fields
+            signature: MinHash signature of the contract text (for near-duplicate lookup)
+            vendor_id: Already resolved vendor ID (resolved here if not provided)
             
         Returns:
             ID of inserted row
         """
         conn = self.get_connection()
-        cursor = conn.cursor()
+        contract_id = self._insert_row(filename, contract_data, signature, vendor_id)
+        conn.commit()
+        logger.info(f"Inserted contract: {filename} (ID: {contract_id})")
+        
+        return contract_id
+    
+    @profiled("db.insert_contracts")
+    def insert_contracts(
+        self,
+        contracts: List[Tuple[str, dict, Optional[List[int]]]],
+        vendor_ids: Optional[List[Optional[int]]] = None
+    ) -> List[int]:
+        """
+        Insert several contracts in one transaction (one commit for all of them).
+        
+        Either every contract is stored or, if any insert fails, none is.
+        
+        Args:
+            contracts: (filename, contract_data, signature) per contract
+            vendor_ids: Already resolved vendor ID per contract (resolved here if not provided)
+            
+        Returns:
+            IDs of inserted rows, in the order of contracts
+        """
+        conn = self.get_connection()
+        vendor_ids = vendor_ids or [None] * len(contracts)
+        try:
+            contract_ids = [
+                self._insert_row(filename, contract_data, signature, vendor_id)
+                for (filename, contract_data, signature), vendor_id in zip(contracts, vendor_ids)
+            ]
+        except Exception:
+            conn.rollback()
+            # Vendors created by the rolled-back inserts are gone too
+            self._vendor_index = None
+            self._vendor_index_max_id = 0
+            raise
+        conn.commit()
+        if contract_ids:
+            logger.info(f"Inserted {len(contract_ids)} contracts (IDs {contract_ids[0]}-{contract_ids[-1]})")
+        
+        return contract_ids
+    
+    def _insert_row(
+        self,
+        filename: str,
+        contract_data: dict,
+        signature: Optional[List[int]] = None,
+        vendor_id: Optional[int] = None
+    ) -> int:
+        """Insert a contract row with its vendor and signature (does not commit)."""
+        cursor = self.get_connection().cursor()
+        
+        if vendor_id is None:
+            vendor_id = self.resolve_vendor(contract_data.get('vendor_name'))
         
         cursor.execute("""
             INSERT INTO contracts (
                 filename, vendor_name, contract_number,
                 effective_date, expiration_date, total_amount,
-                payment_terms, contract_type, key_deliverables
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                payment_terms, contract_type, key_deliverables,
+                vendor_id
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
             filename,
             contract_data.get('vendor_name'),
@@ -88,15 +334,94 @@ class ContractDatabase:
             contract_data.get('total_amount'),
             contract_data.get('payment_terms'),
             contract_data.get('contract_type'),
-            contract_data.get('key_deliverables')
+            contract_data.get('key_deliverables'),
+            vendor_id
         ))
         
-        conn.commit()
         contract_id = cursor.lastrowid
-        logger.info(f"Inserted contract: {filename} (ID: {contract_id})")
-        
+        if signature is not None:
+            self._store_signature(contract_id, signature)
         return contract_id
     
+    def _store_signature(self, contract_id: int, signature: List[int]):
+        """Store a signature and its LSH buckets (does not commit)."""
+        cursor = self.get_connection().cursor()
+        cursor.execute(
+            "INSERT OR REPLACE INTO contract_signatures (contract_id, signature) VALUES (?, ?)",
+            (contract_id, signature_to_bytes(signature))
+        )
+        cursor.execute("DELETE FROM contract_lsh WHERE contract_id = ?", (contract_id,))
+        cursor.executemany(
+            "INSERT INTO contract_lsh (band, bucket, contract_id) VALUES (?, ?, ?)",
+            [(band, bucket, contract_id) for band, bucket in enumerate(band_hashes(signature))]
+        )
+    
+    def add_signature(self, contract_id: int, signature: List[int]):
+        """
+        Attach a MinHash signature to an existing contract.
+        
+        Args:
+            contract_id: Contract ID
+            signature: MinHash signature of the contract text
+        """
+        self._store_signature(contract_id, signature)
+        self.get_connection().commit()
+    
+    @profiled("db.find_near_duplicates")
+    def find_near_duplicates(
+        self,
+        signature: Optional[List[int]],
+        threshold: float = DEFAULT_THRESHOLD,
+        limit: int = 5
+    ) -> List[Dict]:
+        """
+        Find stored contracts whose text is nearly identical.
+        
+        Only contracts sharing an LSH bucket are compared, so the cost
+        depends on the number of candidates, not the corpus size.
+        
+        Args:
+            signature: MinHash signature of the new contract's text
+                (None for text without words, which matches nothing)
+            threshold: Minimum estimated Jaccard similarity
+            limit: Maximum number of matches
+            
+        Returns:
+            List of dictionaries with id, filename, vendor_name and similarity
+        """
+        if signature is None:
+            return []
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        buckets = list(enumerate(band_hashes(signature)))
+        clauses = " OR ".join(["(l.band = ? AND l.bucket = ?)"] * len(buckets))
+        params = [value for pair in buckets for value in pair]
+        
+        cursor.execute(f"""
+            SELECT DISTINCT c.id, c.filename, c.vendor_name, s.signature
+            FROM contract_lsh l
+            JOIN contract_signatures s ON s.contract_id = l.contract_id
+            JOIN contracts c ON c.id = l.contract_id
+            WHERE {clauses}
+        """, params)
+        
+        matches = []
+        for row in cursor.fetchall():
+            similarity = estimate_similarity(signature, signature_from_bytes(row['signature']))
+            if similarity >= threshold:
+                matches.append({
+                    'id': row['id'],
+                    'filename': row['filename'],
+                    'vendor_name': row['vendor_name'],
+                    'similarity': similarity
+                })
+        
+        matches.sort(key=lambda m: m['similarity'], reverse=True)
+        return matches[:limit]
+    
+    @profiled("db.get_all_contracts")
     def get_all_contracts(self) -> List[Dict]:
         """
         Get all contracts from database.
@@ -108,13 +433,130 @@ class ContractDatabase:
         cursor = conn.cursor()
         
         cursor.execute("""
-            SELECT * FROM contracts
-            ORDER BY upload_date DESC
+            SELECT c.*, v.canonical_name AS vendor_canonical_name
+            FROM contracts c
+            LEFT JOIN vendors v ON v.id = c.vendor_id
+            ORDER BY c.upload_date DESC
         """)
         
         rows = cursor.fetchall()
         return [dict(row) for row in rows]
     
+    @profiled("db.get_contracts_since")
+    def get_contracts_since(self, last_id: int = 0) -> List[Dict]:
+        """
+        Get contracts inserted after a given ID, oldest first.
+        
+        Args:
+            last_id: Highest contract ID already seen
+            
+        Returns:
+            List of dictionaries with contract data
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT c.*, v.canonical_name AS vendor_canonical_name
+            FROM contracts c
+            LEFT JOIN vendors v ON v.id = c.vendor_id
+            WHERE c.id > ?
+            ORDER BY c.id
+        """, (last_id,))
+        
+        rows = cursor.fetchall()
+        return [dict(row) for row in rows]
+    
+    @profiled("db.get_contracts_by_vendor")
+    def get_contracts_by_vendor(self, vendor_id: int) -> List[Dict]:
+        """
+        Get all contracts for a canonical vendor (indexed lookup).
+        
+        Args:
+            vendor_id: Vendor ID
+            
+        Returns:
+            List of dictionaries with contract data
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT c.*, v.canonical_name AS vendor_canonical_name
+            FROM contracts c
+            JOIN vendors v ON v.id = c.vendor_id
+            WHERE c.vendor_id = ?
+            ORDER BY c.upload_date DESC
+        """, (vendor_id,))
+        
+        rows = cursor.fetchall()
+        return [dict(row) for row in rows]
+    
+    @profiled("db.get_vendors")
+    def get_vendors(self, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Get canonical vendors with their contract counts, most contracts first.
+        
+        Args:
+            limit: Maximum number of vendors (None for all)
+            
+        Returns:
+            List of dictionaries with id, canonical_name and contract_count
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT v.id, v.canonical_name, COUNT(c.id) AS contract_count
+            FROM vendors v
+            JOIN contracts c ON c.vendor_id = v.id
+            GROUP BY v.id
+            ORDER BY contract_count DESC, v.canonical_name
+            LIMIT ?
+        """, (limit if limit is not None else -1,))
+        
+        rows = cursor.fetchall()
+        return [dict(row) for row in rows]
+    
+    @profiled("db.get_aggregates")
+    def get_aggregates(self, top_vendors: int = 10) -> Dict:
+        """
+        Get summary counts for dashboards and the API.
+        
+        Args:
+            top_vendors: Number of vendors to include
+            
+        Returns:
+            Dictionary with total_contracts, top_vendors, by_contract_type
+            and by_upload_month
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT COALESCE(contract_type, 'Unknown') AS contract_type, COUNT(*) AS contract_count
+            FROM contracts
+            GROUP BY 1
+            ORDER BY contract_count DESC
+        """)
+        by_type = [dict(row) for row in cursor.fetchall()]
+        
+        cursor.execute("""
+            SELECT substr(upload_date, 1, 7) AS month, COUNT(*) AS contract_count
+            FROM contracts
+            GROUP BY 1
+            ORDER BY 1
+        """)
+        by_month = [dict(row) for row in cursor.fetchall()]
+        
+        return {
+            'total_contracts': self.get_contract_count(),
+            'top_vendors': self.get_vendors(limit=top_vendors),
+            'by_contract_type': by_type,
+            'by_upload_month': by_month
+        }
+    
+    @profiled("db.get_contract_by_id")
     def get_contract_by_id(self, contract_id: int) -> Optional[Dict]:
         """
         Get a specific contract by ID.
@@ -133,6 +575,29 @@ class ContractDatabase:
         
         return dict(row) if row else None
     
+    @profiled("db.get_contract_by_filename")
+    def get_contract_by_filename(self, filename: str) -> Optional[Dict]:
+        """
+        Get the most recent contract stored under a filename.
+        
+        Args:
+            filename: Original PDF file name
+            
+        Returns:
+            Dictionary with contract data or None
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            "SELECT * FROM contracts WHERE filename = ? ORDER BY upload_date DESC LIMIT 1",
+            (filename,)
+        )
+        row = cursor.fetchone()
+        
+        return dict(row) if row else None
+    
+    @profiled("db.search_contracts")
     def search_contracts(self, search_term: str) -> List[Dict]:
         """
         Search contracts by vendor name or contract number.
@@ -156,6 +621,61 @@ class ContractDatabase:
         rows = cursor.fetchall()
         return [dict(row) for row in rows]
     
+    @profiled("db.get_contracts_page")
+    def get_contracts_page(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        search_term: Optional[str] = None,
+        vendor_id: Optional[int] = None,
+        contract_type: Optional[str] = None
+    ) -> Tuple[List[Dict], int]:
+        """
+        Get one page of contracts, newest first, with optional filters.
+        
+        Args:
+            limit: Page size
+            offset: Number of contracts to skip
+            search_term: Match vendor name or contract number
+            vendor_id: Canonical vendor ID
+            contract_type: Exact contract type
+            
+        Returns:
+            (contracts on this page, total matching contracts)
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        conditions = []
+        params = []
+        if search_term:
+            search_pattern = f"%{search_term}%"
+            conditions.append("(c.vendor_name LIKE ? OR c.contract_number LIKE ?)")
+            params.extend([search_pattern, search_pattern])
+        if vendor_id is not None:
+            conditions.append("c.vendor_id = ?")
+            params.append(vendor_id)
+        if contract_type:
+            conditions.append("c.contract_type = ?")
+            params.append(contract_type)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        cursor.execute(f"SELECT COUNT(*) FROM contracts c {where}", params)
+        total = cursor.fetchone()[0]
+        
+        cursor.execute(f"""
+            SELECT c.*, v.canonical_name AS vendor_canonical_name
+            FROM contracts c
+            LEFT JOIN vendors v ON v.id = c.vendor_id
+            {where}
+            ORDER BY c.upload_date DESC, c.id DESC
+            LIMIT ? OFFSET ?
+        """, params + [limit, offset])
+        
+        rows = cursor.fetchall()
+        return [dict(row) for row in rows], total
+    
+    @profiled("db.get_contract_count")
     def get_contract_count(self) -> int:
         """Get total number of contracts."""
         conn = self.get_connection()
@@ -163,12 +683,15 @@ class ContractDatabase:
         cursor.execute("SELECT COUNT(*) FROM contracts")
         return cursor.fetchone()[0]
     
-    def delete_contract(self, contract_id: int) -> bool:
+    @profiled("db.delete_contract")
+    def delete_contract(self, contract_id: int, unindex: bool = True) -> bool:
         """
         Delete a contract by ID.
         
         Args:
             contract_id: Contract ID to delete
+            unindex: Also drop it from the semantic index (sharded storage
+                passes False and drops the global ID itself)
             
         Returns:
             True if deleted, False if not found
@@ -176,17 +699,123 @@ class ContractDatabase:
         conn = self.get_connection()
         cursor = conn.cursor()
         
+        cursor.execute("DELETE FROM contract_lsh WHERE contract_id = ?", (contract_id,))
+        cursor.execute("DELETE FROM contract_signatures WHERE contract_id = ?", (contract_id,))
         cursor.execute("DELETE FROM contracts WHERE id = ?", (contract_id,))
         conn.commit()
         
         deleted = cursor.rowcount > 0
         if deleted:
             logger.info(f"Deleted contract ID: {contract_id}")
+            if unindex:
+                from src.semantic_search import unindex_contract
+                unindex_contract(contract_id)
         
         return deleted
     
+    @profiled("db.get_changes")
+    def get_changes(self, offset: int = 0, limit: Optional[int] = None) -> Tuple[List[Dict], int]:
+        """
+        Get changelog entries after an offset, oldest first.
+        
+        Args:
+            offset: Last change sequence number already processed
+            limit: Maximum number of entries (None for all)
+            
+        Returns:
+            (changes, offset after them). Each change has seq, op
+            ('insert', 'update' or 'delete'), contract_id, changed_at and
+            contract: the row as it is now (None once deleted)
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT ch.seq, ch.op, ch.contract_id, ch.changed_at,
+                   c.*, v.canonical_name AS vendor_canonical_name
+            FROM contract_changes ch
+            LEFT JOIN contracts c ON c.id = ch.contract_id
+            LEFT JOIN vendors v ON v.id = c.vendor_id
+            WHERE ch.seq > ?
+            ORDER BY ch.seq
+            LIMIT ?
+        """, (offset, limit if limit is not None else -1))
+        
+        changes = []
+        for row in cursor.fetchall():
+            row = dict(row)
+            change = {key: row.pop(key) for key in ('seq', 'op', 'contract_id', 'changed_at')}
+            change['contract'] = row if row['id'] is not None else None
+            changes.append(change)
+        
+        return changes, (changes[-1]['seq'] if changes else offset)
+    
+    def get_consumer_offset(self, consumer: str) -> Optional[int]:
+        """
+        Get a change-feed consumer's committed offset.
+        
+        Returns:
+            Last processed change sequence number, or None for a new consumer
+        """
+        cursor = self.get_connection().cursor()
+        cursor.execute("SELECT last_seq FROM change_consumers WHERE consumer = ?", (consumer,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+    
+    def set_consumer_offset(self, consumer: str, offset: int):
+        """Commit a change-feed consumer's offset."""
+        conn = self.get_connection()
+        conn.execute("""
+            INSERT INTO change_consumers (consumer, last_seq) VALUES (?, ?)
+            ON CONFLICT(consumer) DO UPDATE SET last_seq = excluded.last_seq, updated_at = CURRENT_TIMESTAMP
+        """, (consumer, offset))
+        conn.commit()
+    
+    def prune_changes(self, up_to: Optional[int] = None) -> int:
+        """
+        Delete changelog entries every registered consumer has processed.
+        
+        Args:
+            up_to: Delete through this sequence number instead (consumers
+                tracked elsewhere, as with sharded storage)
+        
+        Returns:
+            Number of entries deleted
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        low = up_to
+        if low is None:
+            cursor.execute("SELECT MIN(last_seq) FROM change_consumers")
+            low = cursor.fetchone()[0]
+        if low is None:
+            return 0
+        cursor.execute("DELETE FROM contract_changes WHERE seq <= ?", (low,))
+        conn.commit()
+        return cursor.rowcount
+    
     def close(self):
         """Close database connection."""
         if self.conn:
             self.conn.close()
-            self.conn = None
\ No newline at end of file
+            self.conn = None
+
+
+def open_contract_database(db_path: Optional[str] = None):
+    """
+    Open contract storage: a single file, or shards when CONTRACT_SHARD_BY is set.
+    
+    Both expose the ContractDatabase API (see sharding.py).
+    
+    Args:
+        db_path: Single-file database path (default: data/contracts.db;
+            unused when sharded, see SHARD_DIR)
+        
+    Returns:
+        ContractDatabase or ShardedContractDatabase
+    """
+    shard_by = os.getenv("CONTRACT_SHARD_BY")
+    if shard_by:
+        from src.sharding import ShardedContractDatabase
+        return ShardedContractDatabase(shard_by=shard_by)
+    return ContractDatabase(db_path or DEFAULT_DB_PATH)
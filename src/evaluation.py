@@ -0,0 +1,404 @@
+"""
+Evaluation Engine
+Ground truth storage and normalized bulk comparison of extracted contract fields
+"""
+
+import csv
+import os
+import re
+import sqlite3
+import logging
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.vendors import normalize_vendor_name
+
+logger = logging.getLogger(__name__)
+
+FIELDS = [
+    'vendor_name',
+    'contract_number',
+    'effective_date',
+    'expiration_date',
+    'total_amount',
+    'payment_terms',
+    'contract_type',
+    'key_deliverables'
+]
+
+# Values that mean "no value" in extractions and ground truth
+NULL_VALUES = {'', 'none', 'null', 'n/a', 'na'}
+
+# Above this many comparisons the work is split across processes
+PARALLEL_THRESHOLD = 50_000
+
+DATE_FORMATS = [
+    '%Y-%m-%d', '%Y/%m/%d', '%d.%m.%Y', '%m/%d/%Y', '%d/%m/%Y',
+    '%B %d, %Y', '%b %d, %Y', '%d %B %Y', '%d %b %Y', '%B %d %Y'
+]
+
+
+@lru_cache(maxsize=65536)
+def normalize_text(value: Optional[str]) -> str:
+    """Lowercase, strip punctuation at the edges and collapse whitespace."""
+    if value is None:
+        return ''
+    text = ' '.join(str(value).lower().split())
+    text = text.strip(' .,;:"\'')
+    return '' if text in NULL_VALUES else text
+
+
+@lru_cache(maxsize=65536)
+def normalize_date(value: Optional[str]) -> str:
+    """Convert common date formats to YYYY-MM-DD (unparseable dates fall back to text)."""
+    text = normalize_text(value)
+    if not text:
+        return ''
+
+    cleaned = re.sub(r'(\d)(st|nd|rd|th)\b', r'\1', text)
+    cleaned = cleaned.title()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(cleaned, fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return text
+
+
+@lru_cache(maxsize=65536)
+def normalize_amount(value: Optional[str]) -> Optional[float]:
+    """
+    Parse an amount string to a number.
+
+    Handles currency symbols, thousands separators in US and European
+    style ('$125,000', '85.500,00 €') and k/m suffixes ('$20k').
+    """
+    text = normalize_text(value)
+    match = re.search(r'\d[\d.,]*', text)
+    if not match:
+        return None
+
+    number = match.group(0).rstrip('.,')
+    if ',' in number and '.' in number:
+        if number.rfind(',') > number.rfind('.'):
+            number = number.replace('.', '').replace(',', '.')
+        else:
+            number = number.replace(',', '')
+    elif ',' in number:
+        # '1,50' is a decimal comma, '1,500' is a thousands separator
+        head, _, tail = number.rpartition(',')
+        number = f"{head.replace(',', '')}.{tail}" if len(tail) == 2 else number.replace(',', '')
+    elif number.count('.') > 1 or re.fullmatch(r'\d{1,3}(\.\d{3})+', number):
+        number = number.replace('.', '')
+
+    try:
+        amount = float(number)
+    except ValueError:
+        return None
+
+    suffix = text[match.end():match.end() + 2].strip()
+    if suffix.startswith('k'):
+        amount *= 1_000
+    elif suffix.startswith('m') and not suffix.startswith('mo'):
+        amount *= 1_000_000
+    return amount
+
+
+@lru_cache(maxsize=65536)
+def normalize_vendor(value: Optional[str]) -> str:
+    """Normalize a vendor name for fuzzy matching (drops punctuation and legal suffixes)."""
+    return normalize_vendor_name(normalize_text(value))
+
+
+def _similarity(a: str, b: str) -> float:
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def _token_recall(extracted: str, actual: str) -> float:
+    """Fraction of the actual value's words found in the extracted value."""
+    actual_tokens = set(re.findall(r'\w+', actual))
+    if not actual_tokens:
+        return 0.0
+    return len(actual_tokens & set(re.findall(r'\w+', extracted))) / len(actual_tokens)
+
+
+def compare_field(field: str, extracted: Optional[str], actual: Optional[str]) -> bool:
+    """
+    Compare one extracted value against ground truth.
+
+    Args:
+        field: Field name (selects the normalization rule)
+        extracted: Value produced by extraction
+        actual: Verified value
+
+    Returns:
+        True if the values match after normalization
+    """
+    extracted_text = normalize_text(extracted)
+    actual_text = normalize_text(actual)
+
+    if not actual_text or not extracted_text:
+        return actual_text == extracted_text
+
+    if field in ('effective_date', 'expiration_date'):
+        return normalize_date(extracted) == normalize_date(actual)
+
+    if field == 'total_amount':
+        extracted_amount = normalize_amount(extracted)
+        actual_amount = normalize_amount(actual)
+        if extracted_amount is None or actual_amount is None:
+            return extracted_text == actual_text
+        return abs(extracted_amount - actual_amount) <= max(0.005 * actual_amount, 0.01)
+
+    if field == 'vendor_name':
+        extracted_vendor = normalize_vendor(extracted)
+        actual_vendor = normalize_vendor(actual)
+        return extracted_vendor == actual_vendor or _similarity(extracted_vendor, actual_vendor) >= 0.9
+
+    if field == 'contract_number':
+        return re.sub(r'\s+', '', extracted_text) == re.sub(r'\s+', '', actual_text)
+
+    if field == 'contract_type':
+        return extracted_text == actual_text or _similarity(extracted_text, actual_text) >= 0.9
+
+    # Free-text fields: the extraction must cover most of the verified wording
+    return extracted_text == actual_text or _token_recall(extracted_text, actual_text) >= 0.6
+
+
+def _compare_chunk(rows: List[Tuple]) -> List[bool]:
+    return [compare_field(field, extracted, actual) for _, field, extracted, actual in rows]
+
+
+def compare_bulk(rows: List[Tuple], workers: Optional[int] = None) -> List[bool]:
+    """
+    Compare many (key, field, extracted, actual) rows.
+
+    Large inputs are split into chunks and compared in worker processes.
+
+    Args:
+        rows: List of (contract_key, field, extracted, actual)
+        workers: Process count (defaults to CPU count; 1 disables parallelism)
+
+    Returns:
+        List of match results in input order
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(rows) < PARALLEL_THRESHOLD:
+        return _compare_chunk(rows)
+
+    chunk_size = max(len(rows) // (workers * 4), 1000)
+    chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk_result in executor.map(_compare_chunk, chunks):
+            results.extend(chunk_result)
+    return results
+
+
+def summarize(rows: List[Tuple], matches: List[bool]) -> Dict:
+    """
+    Aggregate comparison results into overall, per-field and per-contract accuracy.
+
+    Returns:
+        Dictionary with 'total', 'correct', 'accuracy', 'per_field',
+        'per_contract' and 'mismatches'
+    """
+    per_field = defaultdict(lambda: {'total': 0, 'correct': 0})
+    per_contract = defaultdict(lambda: {'total': 0, 'correct': 0})
+    mismatches = []
+
+    for (key, field, extracted, actual), match in zip(rows, matches):
+        per_field[field]['total'] += 1
+        per_contract[key]['total'] += 1
+        if match:
+            per_field[field]['correct'] += 1
+            per_contract[key]['correct'] += 1
+        else:
+            mismatches.append({'contract': key, 'field': field, 'extracted': extracted, 'actual': actual})
+
+    for stats in list(per_field.values()) + list(per_contract.values()):
+        stats['accuracy'] = stats['correct'] / stats['total'] * 100
+
+    total = len(rows)
+    correct = sum(1 for m in matches if m)
+
+    return {
+        'total': total,
+        'correct': correct,
+        'accuracy': correct / total * 100 if total else 0.0,
+        'per_field': dict(per_field),
+        'per_contract': dict(per_contract),
+        'mismatches': mismatches
+    }
+
+
+class EvaluationStore:
+    """
+    Ground truth stored next to the contracts table.
+
+    One row per (filename, field) holds the verified value, so
+    evaluation is a single join against the latest extraction per file.
+    """
+
+    def __init__(self, db_path: str = "data/contracts.db"):
+        """
+        Initialize the store.
+
+        Args:
+            db_path: Path to SQLite database file (usually the contracts database)
+        """
+        self.db_path = db_path
+        self.conn = None
+        self.create_tables()
+
+    def get_connection(self) -> sqlite3.Connection:
+        """Get database connection (creates if needed)."""
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.db_path)
+        return self.conn
+
+    def create_tables(self):
+        """Create ground truth table if it doesn't exist."""
+        conn = self.get_connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS ground_truth (
+                filename TEXT NOT NULL,
+                field_name TEXT NOT NULL,
+                actual_value TEXT,
+                notes TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (filename, field_name)
+            )
+        """)
+        conn.commit()
+
+    def set_ground_truth(self, filename: str, values: Dict[str, Optional[str]], notes: Optional[str] = None):
+        """
+        Store verified values for one contract (replaces existing values for those fields).
+
+        Args:
+            filename: Contract file name
+            values: {field_name: actual_value} (None for "no value")
+            notes: Optional reviewer note
+        """
+        self.set_ground_truth_bulk(
+            (filename, field, value, notes) for field, value in values.items()
+        )
+
+    def set_ground_truth_bulk(self, rows: Iterable[Tuple]) -> int:
+        """
+        Store many (filename, field, actual_value, notes) rows in one transaction.
+
+        Returns:
+            Number of rows written
+        """
+        conn = self.get_connection()
+        cursor = conn.executemany("""
+            INSERT INTO ground_truth (filename, field_name, actual_value, notes)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(filename, field_name) DO UPDATE SET
+                actual_value = excluded.actual_value,
+                notes = excluded.notes,
+                updated_at = CURRENT_TIMESTAMP
+        """, list(rows))
+        conn.commit()
+        return cursor.rowcount
+
+    def import_validation_csv(self, csv_path: str = "data/validation.csv") -> int:
+        """
+        Load reviewed rows from the legacy validation.csv.
+
+        Rows without a Match verdict are skipped. When Actual_Value is blank
+        on a TRUE row, the extracted value is the verified value.
+
+        Returns:
+            Number of ground truth rows imported
+        """
+        rows = []
+        with open(csv_path, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                if not row['Match']:
+                    continue
+                actual = row['Actual_Value']
+                if not actual and row['Match'].upper() == 'TRUE':
+                    actual = row['Extracted_Value']
+                rows.append((row['Filename'], row['Field_Name'], actual or None, row['Notes'] or None))
+
+        self.set_ground_truth_bulk(rows)
+        logger.info(f"Imported {len(rows)} ground truth rows from {csv_path}")
+        return len(rows)
+
+    def get_ground_truth(self) -> Dict[str, Dict[str, Optional[str]]]:
+        """Get all ground truth as {filename: {field: actual_value}}."""
+        truth = defaultdict(dict)
+        for filename, field, actual in self.get_connection().execute(
+            "SELECT filename, field_name, actual_value FROM ground_truth"
+        ):
+            truth[filename][field] = actual
+        return dict(truth)
+
+    def count(self) -> int:
+        """Get number of ground truth rows."""
+        return self.get_connection().execute("SELECT COUNT(*) FROM ground_truth").fetchone()[0]
+
+    def evaluate(self, workers: Optional[int] = None) -> Dict:
+        """
+        Evaluate the latest extraction of every contract that has ground truth.
+
+        Returns:
+            Summary dictionary (see summarize)
+        """
+        conn = self.get_connection()
+        has_contracts = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'contracts'"
+        ).fetchone()
+        if not has_contracts:
+            return summarize([], [])
+
+        # One pass: unpivot the latest row per filename and join ground truth
+        unpivot = " UNION ALL ".join(
+            f"SELECT filename, '{field}' AS field_name, {field} AS value FROM latest" for field in FIELDS
+        )
+        rows = conn.execute(f"""
+            WITH latest AS (
+                SELECT c.* FROM contracts c
+                JOIN (SELECT filename, MAX(id) AS id FROM contracts GROUP BY filename) m
+                ON c.id = m.id
+            ),
+            extracted AS ({unpivot})
+            SELECT g.filename, g.field_name, e.value, g.actual_value
+            FROM ground_truth g
+            JOIN extracted e ON e.filename = g.filename AND e.field_name = g.field_name
+            ORDER BY g.filename
+        """).fetchall()
+
+        return summarize(rows, compare_bulk(rows, workers=workers))
+
+    def evaluate_records(self, records: Dict[str, dict], workers: Optional[int] = None) -> Dict:
+        """
+        Evaluate in-memory extractions against ground truth.
+
+        Args:
+            records: {filename: extracted_fields_dict}
+
+        Returns:
+            Summary dictionary (see summarize)
+        """
+        truth = self.get_ground_truth()
+        rows = [
+            (filename, field, data.get(field), actual)
+            for filename, data in records.items()
+            for field, actual in truth.get(filename, {}).items()
+        ]
+        return summarize(rows, compare_bulk(rows, workers=workers))
+
+    def close(self):
+        """Close database connection."""
+        if self.conn:
+            self.conn.close()
+            self.conn = None
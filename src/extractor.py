@@ -3,18 +3,21 @@ Contract Extraction Module
 Handles PDF processing and data extraction using ExtractThinker + GPT-4o-mini
 """
 
+import io
 import os
-from typing import Optional
-from extract_thinker import Extractor, DocumentLoaderPyPdf, SplittingStrategy
-from dotenv import load_dotenv
-from src.schema import ContractData
+from typing import Optional, TYPE_CHECKING
 import logging
 
-# Load environment variables
-load_dotenv()
+from src.config import load_environment
+from src.chunking import get_token_budget
+from src.pdf_text import PdfSource, describe_source, extract_text_pages
+from src.prompts import count_tokens
+from src.rate_limiter import DEFAULT_REQUEST_TOKENS, get_rate_limiter, rate_limiting_enabled
+
+# extract_thinker (and the schema built on it) is imported on first use
+if TYPE_CHECKING:
+    from src.schema import ContractData
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -22,7 +25,8 @@ class ContractExtractor:
     """
     Main class for extracting data from contract PDFs.
     
-    Uses ExtractThinker with GPT-4o-mini, configured for small documents.
+    Uses ExtractThinker with GPT-4o-mini for documents within the token
+    budget, and parallel chunked extraction (see chunking.py) for larger ones.
     """
     
     def __init__(
@@ -37,6 +41,9 @@ class ContractExtractor:
             model_name: OpenAI model to use (default: gpt-4o-mini)
             api_key: OpenAI API key (reads from .env if not provided)
         """
+        from extract_thinker import Extractor, DocumentLoaderPyPdf, SplittingStrategy
+        
+        load_environment()
         self.model_name = model_name
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         
@@ -53,20 +60,60 @@ class ContractExtractor:
         self.extractor = Extractor()
         self.extractor.load_document_loader(DocumentLoaderPyPdf())
         
-        # Use NO_SPLIT strategy for small contracts (process in single call)
-        # This avoids chunking and concatenation which causes token issues
+        # ExtractThinker only sees documents within the token budget, in a single call;
+        # larger ones are split by extract() itself
         self.extractor.load_splitting_strategy(SplittingStrategy.NO_SPLIT)
         
         self.extractor.load_llm(self.model_name)
+        self.token_budget = get_token_budget()
+        self._client = None
+        
+        logger.info(f"ContractExtractor initialized with model: {self.model_name}, "
+                    f"splitting above {self.token_budget} tokens")
+    
+    def _chat_client(self):
+        """OpenAI client for chunked extraction (created on first use; None when replaying)."""
+        from src.llm_client import get_cache_mode
+        from src.simple_extractor import create_client
+        
+        if self._client is None and get_cache_mode() != "replay":
+            self._client = create_client()
+        return self._client
+    
+    def _extract_large(self, pdf_path: PdfSource, label: str, pdf_text: Optional[str] = None) -> Optional["ContractData"]:
+        """Chunked extraction if the document is over the token budget, else None."""
+        from src.chunking import extract_in_chunks, split_text
+        from src.schema import ContractData
+        
+        if pdf_text is not None:
+            # The caller already parsed the PDF; its text is enough to size it
+            pages = split_text(pdf_text)
+        else:
+            try:
+                pages = extract_text_pages(pdf_path)
+            except Exception as e:
+                logger.warning(f"Could not estimate size of {label} ({e}); extracting in one call")
+                return None
         
-        logger.info(f"ContractExtractor initialized with model: {self.model_name}, splitting: NO_SPLIT")
+        tokens = sum(count_tokens(page, self.model_name) for page in pages)
+        if tokens <= self.token_budget:
+            return None
+        
+        logger.info(f"{label}: ~{tokens} tokens over {len(pages)} pages exceeds the {self.token_budget} budget; splitting")
+        data = extract_in_chunks(pages, self._chat_client(), self.model_name, budget=self.token_budget)
+        values = {field: None if value is None else str(value) for field, value in data.items()}
+        # The schema requires a vendor; a missing one is left for the validator to flag
+        values['vendor_name'] = values['vendor_name'] or ''
+        return ContractData(**values)
     
-    def extract(self, pdf_path: str) -> ContractData:
+    def extract(self, pdf_path: PdfSource, pdf_text: Optional[str] = None) -> "ContractData":
         """
         Extract data from a contract PDF.
         
         Args:
-            pdf_path: Path to the PDF file
+            pdf_path: Path to the PDF file, or its content as bytes
+            pdf_text: Already extracted text (sizes the document without
+                parsing it again; ExtractThinker still reads the PDF itself)
             
         Returns:
             ContractData object with extracted fields
@@ -75,36 +122,54 @@ class ContractExtractor:
             FileNotFoundError: If PDF file doesn't exist
             Exception: If extraction fails
         """
-        # Validate file exists
-        if not os.path.exists(pdf_path):
-            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+        from src.schema import ContractData
+        
+        label = describe_source(pdf_path)
+        
+        if isinstance(pdf_path, str):
+            # Validate file exists
+            if not os.path.exists(pdf_path):
+                raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+            source = pdf_path
+        else:
+            # ExtractThinker reads in-memory PDFs from a stream
+            source = io.BytesIO(pdf_path)
+        
+        logger.info(f"Processing contract: {label}")
         
-        logger.info(f"Processing contract: {pdf_path}")
+        large = self._extract_large(pdf_path, label, pdf_text)
+        if large is not None:
+            return large
+        
+        # ExtractThinker calls the API itself, so take a slot from the shared limiter first
+        if rate_limiting_enabled():
+            get_rate_limiter().acquire(self.model_name, DEFAULT_REQUEST_TOKENS)
         
         try:
             # Extract data using ExtractThinker
-            result = self.extractor.extract(pdf_path, ContractData)
+            result = self.extractor.extract(source, ContractData)
             
-            logger.info(f"Successfully extracted data from: {pdf_path}")
+            logger.info(f"Successfully extracted data from: {label}")
             logger.info(f"Vendor: {result.vendor_name}")
             
             return result
             
         except Exception as e:
-            logger.error(f"Extraction failed for {pdf_path}: {str(e)}")
+            logger.error(f"Extraction failed for {label}: {str(e)}")
             raise Exception(f"Failed to extract data: {str(e)}")
     
-    def extract_to_dict(self, pdf_path: str) -> dict:
+    def extract_to_dict(self, pdf_path: PdfSource, pdf_text: Optional[str] = None) -> dict:
         """
         Extract data and return as dictionary.
         
         Args:
-            pdf_path: Path to the PDF file
+            pdf_path: Path to the PDF file, or its content as bytes
+            pdf_text: Already extracted text (see extract)
             
         Returns:
             Dictionary with extracted fields
         """
-        result = self.extract(pdf_path)
+        result = self.extract(pdf_path, pdf_text)
         return result.model_dump()
 
 
@@ -112,14 +177,17 @@ def extract_contract(pdf_path: str) -> dict:
     """
     Convenience function for quick extraction.
     
+    Reuses a warm ContractExtractor from the backend pool instead of
+    rebuilding the ExtractThinker pipeline on every call.
+    
     Args:
         pdf_path: Path to contract PDF
         
     Returns:
         Dictionary with extracted data
     """
-    extractor = ContractExtractor()
-    return extractor.extract_to_dict(pdf_path)
+    from src.backends import extract_with_backend
+    return extract_with_backend(pdf_path, backend="extractthinker")
 
 
 # Example usage
@@ -127,6 +195,8 @@ if __name__ == "__main__":
     # Test extraction on a sample contract
     import sys
     
+    logging.basicConfig(level=logging.INFO)
+    
     if len(sys.argv) < 2:
         print("Usage: python extractor.py <path_to_contract.pdf>")
         sys.exit(1)
@@ -0,0 +1,210 @@
+"""
+Group-Commit Writer
+One background thread that stores contracts for many producers, committing them in groups
+
+SQLite lets one connection write at a time, and every commit waits for
+the disk. When workers insert and commit on their own they queue on the
+write lock and pay one sync per contract, so ingest stops scaling with
+the worker count. Producers here put contracts on a queue instead; the
+writer thread takes whatever is waiting (up to GROUP_COMMIT_MAX_BATCH
+contracts) and stores it with a single commit, so contracts that arrive
+during one commit share the next. GROUP_COMMIT_MAX_DELAY_MS makes it
+wait that long for more before committing (0 by default: with several
+producers the queue refills during each commit anyway). Each producer
+gets a future that resolves to its contract ID once its group is
+committed.
+
+    writer = GroupCommitWriter("data/contracts.db")
+    contract_id = writer.insert_contract(filename, data, signature=signature)
+    writer.close()
+"""
+
+import os
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future
+from typing import List, Optional
+
+from src.database import PartialInsertError, open_contract_database
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH = 256
+DEFAULT_MAX_DELAY_MS = 0.0
+
+_STOP = object()
+
+
+class GroupCommitWriter:
+    """
+    Queue-fed writer thread that batches contract inserts into shared commits.
+
+    Owns its own database connection (from open_contract_database, so
+    shards work too). If a group fails, its contracts are retried one by
+    one so only the bad ones fail.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_batch: Optional[int] = None,
+        max_delay_ms: Optional[float] = None
+    ):
+        """
+        Start the writer thread.
+
+        Args:
+            db_path: Contracts database (default: data/contracts.db, or shards if CONTRACT_SHARD_BY is set)
+            max_batch: Most contracts per commit (reads GROUP_COMMIT_MAX_BATCH if not provided)
+            max_delay_ms: Longest wait for more contracts before committing
+                (reads GROUP_COMMIT_MAX_DELAY_MS if not provided)
+
+        Raises:
+            Exception: Whatever opening the database raised
+        """
+        self.db_path = db_path
+        self.max_batch = max_batch or int(os.getenv("GROUP_COMMIT_MAX_BATCH", DEFAULT_MAX_BATCH))
+        if max_delay_ms is None:
+            max_delay_ms = float(os.getenv("GROUP_COMMIT_MAX_DELAY_MS", DEFAULT_MAX_DELAY_MS))
+        self.max_delay = max_delay_ms / 1000
+
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._ready = threading.Event()
+        self._error: Optional[Exception] = None
+        self._stats = {'rows': 0, 'commits': 0, 'failed': 0}
+
+        self._thread = threading.Thread(target=self._run, name="contract-writer", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    def submit(self, filename: str, contract_data: dict, signature: Optional[List[int]] = None) -> Future:
+        """
+        Queue a contract for the next group commit.
+
+        Returns:
+            Future resolving to the contract ID (or raising the insert's error)
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Group-commit writer is closed")
+            self._queue.put((filename, contract_data, signature, future))
+        return future
+
+    def insert_contract(
+        self,
+        filename: str,
+        contract_data: dict,
+        signature: Optional[List[int]] = None,
+        timeout: Optional[float] = None
+    ) -> int:
+        """
+        Store a contract and wait for its commit (same arguments as ContractDatabase.insert_contract).
+
+        Returns:
+            ID of inserted row
+        """
+        return self.submit(filename, contract_data, signature).result(timeout)
+
+    def stats(self) -> dict:
+        """Contracts stored, commits made, failed inserts and contracts per commit."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['rows_per_commit'] = stats['rows'] / stats['commits'] if stats['commits'] else 0.0
+        return stats
+
+    def close(self, timeout: Optional[float] = None):
+        """Commit everything already queued, then stop the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self):
+        try:
+            db = open_contract_database(self.db_path)
+        except Exception as e:
+            self._error = e
+            self._ready.set()
+            return
+        self._ready.set()
+
+        try:
+            stopping = False
+            while not stopping:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+                batch = [item]
+                deadline = time.monotonic() + self.max_delay
+                while len(batch) < self.max_batch:
+                    # Wait out the delay for more; after it, still take what is already waiting
+                    remaining = deadline - time.monotonic()
+                    try:
+                        item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+                self._commit(db, batch)
+        finally:
+            db.close()
+
+    def _commit(self, db, batch: list):
+        # Producers may have cancelled their futures while queued
+        batch = [item for item in batch if item[3].set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        try:
+            contract_ids = db.insert_contracts([item[:3] for item in batch])
+        except PartialInsertError as e:
+            # Sharded storage committed some shards; only retry the rolled-back contracts
+            stored = [(item, contract_id) for item, contract_id in zip(batch, e.contract_ids) if contract_id is not None]
+            self._count(len(stored), 1, 0)
+            for item, contract_id in stored:
+                item[3].set_result(contract_id)
+            failed = [item for item, contract_id in zip(batch, e.contract_ids) if contract_id is None]
+            logger.warning(f"Group commit stored {len(stored)} of {len(batch)} contracts ({e.error}); "
+                           f"storing the rest one by one")
+            self._insert_each(db, failed)
+            return
+        except Exception as e:
+            if len(batch) == 1:
+                self._count(0, 0, 1)
+                batch[0][3].set_exception(e)
+                return
+            logger.warning(f"Group commit of {len(batch)} contracts failed ({e}); storing them one by one")
+            self._insert_each(db, batch)
+            return
+
+        self._count(len(batch), 1, 0)
+        for item, contract_id in zip(batch, contract_ids):
+            item[3].set_result(contract_id)
+
+    def _insert_each(self, db, batch: list):
+        for filename, contract_data, signature, future in batch:
+            try:
+                contract_id = db.insert_contracts([(filename, contract_data, signature)])[0]
+            except Exception as e:
+                self._count(0, 0, 1)
+                future.set_exception(e)
+            else:
+                self._count(1, 1, 0)
+                future.set_result(contract_id)
+
+    def _count(self, rows: int, commits: int, failed: int):
+        with self._lock:
+            self._stats['rows'] += rows
+            self._stats['commits'] += commits
+            self._stats['failed'] += failed
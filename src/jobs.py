@@ -0,0 +1,447 @@
+"""
+Background Extraction Jobs
+Persistent SQLite job queue and a worker pool that processes uploads off the UI thread
+"""
+
+import os
+import json
+import time
+import uuid
+import hashlib
+import sqlite3
+import threading
+import logging
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOBS_DB = "data/jobs.db"
+DEFAULT_WORKERS = 2
+DEFAULT_LEASE_SECONDS = 60
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+SAVED = "saved"
+
+
+class JobQueue:
+    """
+    Durable queue of extraction jobs.
+
+    Jobs survive restarts: a running job holds a lease that its worker
+    pool renews, and a job whose lease expired (its process crashed) is
+    put back in the queue. Jobs running in another live process sharing
+    the file are left alone. Each claim gets a new lease token, so a
+    worker whose job was requeued can no longer finish or fail it. Each
+    thread gets its own SQLite connection.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, lease_seconds: Optional[float] = None):
+        """
+        Initialize the queue.
+
+        Args:
+            db_path: Path to SQLite file (reads JOBS_DB_PATH from env if not provided)
+            lease_seconds: How long a running job survives without a heartbeat
+                (reads JOB_LEASE_SECONDS from env if not provided)
+        """
+        self.db_path = db_path or os.getenv("JOBS_DB_PATH", DEFAULT_JOBS_DB)
+        self.lease_seconds = lease_seconds or float(os.getenv("JOB_LEASE_SECONDS", DEFAULT_LEASE_SECONDS))
+        self._local = threading.local()
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.create_tables()
+        self.requeue_interrupted()
+
+    def get_connection(self) -> sqlite3.Connection:
+        """Get this thread's connection (creates if needed)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def create_tables(self):
+        """Create jobs table if it doesn't exist."""
+        conn = self.get_connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                progress REAL NOT NULL DEFAULT 0,
+                stage TEXT,
+                pdf BLOB,
+                result TEXT,
+                error TEXT,
+                contract_id INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                started_at TIMESTAMP,
+                finished_at TIMESTAMP,
+                heartbeat_at TIMESTAMP,
+                lease TEXT
+            )
+        """)
+        # Older queues predate content_hash
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+        if 'content_hash' not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN content_hash TEXT")
+        
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_session ON jobs(session_id, id)")
+
+    def requeue_interrupted(self) -> int:
+        """
+        Put running jobs whose lease expired (their process died) back in the queue.
+
+        Returns:
+            Number of jobs requeued
+        """
+        cursor = self.get_connection().execute("""
+            UPDATE jobs SET status = ?, progress = 0, stage = NULL, lease = NULL
+            WHERE status = ? AND COALESCE(heartbeat_at, started_at) < datetime('now', ?)
+        """, (QUEUED, RUNNING, f"-{self.lease_seconds} seconds"))
+        if cursor.rowcount:
+            logger.info(f"Requeued {cursor.rowcount} interrupted jobs")
+        return cursor.rowcount
+
+    def enqueue(self, session_id: str, filename: str, pdf_bytes: bytes, content_hash: Optional[str] = None) -> int:
+        """
+        Add an uploaded PDF to the queue.
+
+        Args:
+            session_id: Owner of the job (one per browser session)
+            filename: Original file name
+            pdf_bytes: PDF content (bytes or any buffer, e.g. UploadedFile.getbuffer())
+            content_hash: SHA-256 of the content, if the caller already has it
+
+        Returns:
+            Job ID
+        """
+        cursor = self.get_connection().execute(
+            "INSERT INTO jobs (session_id, filename, pdf, content_hash) VALUES (?, ?, ?, ?)",
+            (session_id, filename, pdf_bytes, content_hash or hash_content(pdf_bytes))
+        )
+        logger.info(f"Queued job {cursor.lastrowid}: {filename}")
+        return cursor.lastrowid
+
+    def claim_next(self) -> Optional[Dict]:
+        """
+        Atomically take the oldest queued job.
+
+        Returns:
+            Job dictionary (including 'pdf' bytes and the 'lease' token that
+            complete, fail and heartbeat take) or None if the queue is empty
+        """
+        conn = self.get_connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY id LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            lease = uuid.uuid4().hex
+            conn.execute(
+                "UPDATE jobs SET status = ?, lease = ?, started_at = CURRENT_TIMESTAMP, "
+                "heartbeat_at = CURRENT_TIMESTAMP WHERE id = ?",
+                (RUNNING, lease, row['id'])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return {**dict(row), 'status': RUNNING, 'lease': lease}
+
+    def heartbeat(self, leases: Dict[int, str]):
+        """Renew the leases of running jobs, given as {job ID: lease token} (see requeue_interrupted)."""
+        if not leases:
+            return
+        self.get_connection().executemany(
+            "UPDATE jobs SET heartbeat_at = CURRENT_TIMESTAMP WHERE id = ? AND status = ? AND lease = ?",
+            [(job_id, RUNNING, lease) for job_id, lease in leases.items()]
+        )
+
+    def update_progress(self, job_id: int, progress: float, stage: str, lease: Optional[str] = None):
+        """Record how far a running job has got."""
+        self._update_running(job_id, lease, "progress = ?, stage = ?", (progress, stage))
+
+    def complete(self, job_id: int, result: dict, lease: Optional[str] = None) -> bool:
+        """
+        Mark a running job done and drop its PDF payload.
+
+        Args:
+            job_id: Job ID
+            result: Result dictionary
+            lease: Token from claim_next; if given, only that claim can finish the job
+
+        Returns:
+            False if the job is no longer running under this lease (it was
+            requeued and possibly claimed again), in which case nothing changes
+        """
+        return self._update_running(job_id, lease, """
+            status = ?, progress = 1, stage = 'Done', result = ?,
+                pdf = NULL, finished_at = CURRENT_TIMESTAMP
+        """, (DONE, json.dumps(result)))
+
+    def fail(self, job_id: int, error: str, lease: Optional[str] = None) -> bool:
+        """Mark a running job failed and drop its PDF payload (see complete)."""
+        return self._update_running(job_id, lease, """
+            status = ?, stage = 'Failed', error = ?,
+                pdf = NULL, finished_at = CURRENT_TIMESTAMP
+        """, (FAILED, error))
+
+    def _update_running(self, job_id: int, lease: Optional[str], assignments: str, params: tuple) -> bool:
+        query = f"UPDATE jobs SET {assignments} WHERE id = ? AND status = ?"
+        params = (*params, job_id, RUNNING)
+        if lease is not None:
+            query += " AND lease = ?"
+            params = (*params, lease)
+        updated = self.get_connection().execute(query, params).rowcount > 0
+        if not updated:
+            logger.warning(f"Job {job_id} is no longer held by this worker; not updating it")
+        return updated
+
+    def mark_saved(self, job_id: int, contract_id: int):
+        """Record that a finished job's result was saved as a contract."""
+        self.get_connection().execute(
+            "UPDATE jobs SET status = ?, contract_id = ? WHERE id = ?", (SAVED, contract_id, job_id)
+        )
+
+    def _to_dict(self, row: sqlite3.Row) -> Dict:
+        job = dict(row)
+        job.pop('pdf', None)
+        job['result'] = json.loads(job['result']) if job.get('result') else None
+        return job
+
+    def get_job(self, job_id: int) -> Optional[Dict]:
+        """Get a job's status and result (without the PDF payload)."""
+        row = self.get_connection().execute(
+            "SELECT id, session_id, filename, content_hash, status, progress, stage, result, error, contract_id, "
+            "created_at, started_at, finished_at FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def get_session_jobs(self, session_id: str) -> List[Dict]:
+        """Get all jobs submitted by a session, oldest first."""
+        rows = self.get_connection().execute(
+            "SELECT id, session_id, filename, content_hash, status, progress, stage, result, error, contract_id, "
+            "created_at, started_at, finished_at FROM jobs WHERE session_id = ? ORDER BY id",
+            (session_id,)
+        ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def count_pending(self, session_id: Optional[str] = None) -> int:
+        """
+        Get number of queued or running jobs.
+
+        Args:
+            session_id: Only count this session's jobs (all sessions if not provided)
+        """
+        query = "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)"
+        params = [QUEUED, RUNNING]
+        if session_id:
+            query += " AND session_id = ?"
+            params.append(session_id)
+        return self.get_connection().execute(query, params).fetchone()[0]
+
+
+def process_contract_job(job: Dict, report: Callable[[float, str], None], db_path: str = "data/contracts.db") -> dict:
+    """
+    Run the extraction pipeline for one uploaded PDF.
+
+    Args:
+        job: Claimed job (with 'pdf' bytes and 'filename')
+        report: Callback taking (progress 0-1, stage description)
+        db_path: Contracts database used for the near-duplicate check
+
+    Returns:
+        Result dictionary with 'data', 'signature', 'duplicates',
+        'errors', 'warnings' and 'repaired' (fields fixed by the repair pass)
+    """
+    from src.backends import extract_with_backend
+    from src.contract_validator import validate_contract
+    from src.database import open_contract_database
+    from src.near_duplicates import compute_signature, get_threshold
+    from src.artifacts import artifacts_enabled, document_hash, get_artifact_store, load_text_pages
+    from src.llm_client import capture_responses
+    from src.pdf_text import join_pages
+    from src.repair import get_repairer, repair_enabled
+
+    pdf_bytes = job['pdf']
+
+    report(0.1, "Reading PDF")
+    pages = load_text_pages(pdf_bytes, job['filename'])
+    pdf_text = join_pages(pages)
+
+    report(0.3, "Checking for near-duplicates")
+    signature = compute_signature(pdf_text)
+    db = open_contract_database(db_path)
+    try:
+        duplicates = db.find_near_duplicates(signature, threshold=get_threshold())
+    finally:
+        db.close()
+
+    with capture_responses() as responses:
+        report(0.5, "Extracting fields")
+        data = extract_with_backend(pdf_bytes, pdf_text=pdf_text)
+
+        report(0.8, "Validating")
+        _, errors, warnings = validate_contract(data)
+
+        repaired = []
+        if (errors or warnings) and repair_enabled():
+            report(0.85, "Repairing flagged fields")
+            try:
+                result = get_repairer().repair(data, pages)
+            except Exception as e:
+                # The unrepaired extraction is still shown for review
+                logger.warning(f"Field repair failed for {job['filename']}: {e}")
+            else:
+                if result.accepted:
+                    data, repaired = result.data, result.changed
+                    _, errors, warnings = validate_contract(data)
+
+    # Kept so re-extraction and re-validation need neither the PDF nor the API
+    if artifacts_enabled():
+        get_artifact_store().save_document(document_hash(pdf_bytes), job['filename'], pages, responses)
+
+    return {
+        'data': data,
+        'signature': signature,
+        'duplicates': duplicates,
+        'errors': errors,
+        'warnings': warnings,
+        'repaired': repaired
+    }
+
+
+class WorkerPool:
+    """
+    Background threads that drain a JobQueue.
+
+    Workers poll the queue, so jobs enqueued by any process sharing the
+    database file are picked up. A heartbeat thread renews the lease of
+    the jobs being processed and requeues jobs whose process died.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        process_fn: Callable = process_contract_job,
+        workers: Optional[int] = None,
+        poll_interval: float = 0.5
+    ):
+        """
+        Initialize the pool (call start() to begin processing).
+
+        Args:
+            queue: Job queue to drain
+            process_fn: Function(job, report) -> result dict
+            workers: Thread count (reads EXTRACTION_WORKERS from env if not provided)
+            poll_interval: Seconds to sleep when the queue is empty
+        """
+        self.queue = queue
+        self.process_fn = process_fn
+        self.workers = workers or int(os.getenv("EXTRACTION_WORKERS", DEFAULT_WORKERS))
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._active: Dict[int, str] = {}
+        self._active_lock = threading.Lock()
+
+    def start(self):
+        """Start worker threads (no-op if already running)."""
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"extraction-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(target=self._heartbeat, name="extraction-heartbeat", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        logger.info(f"Started {self.workers} extraction workers")
+
+    def stop(self, timeout: Optional[float] = None):
+        """Signal workers to stop and wait for them."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                job = self.queue.claim_next()
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Could not claim job: {e}")
+                job = None
+
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+
+            job_id, lease = job['id'], job['lease']
+            logger.info(f"Processing job {job_id}: {job['filename']}")
+            with self._active_lock:
+                self._active[job_id] = lease
+            try:
+                result = self.process_fn(
+                    job, lambda progress, stage: self.queue.update_progress(job_id, progress, stage, lease)
+                )
+                self.queue.complete(job_id, result, lease)
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {e}")
+                self.queue.fail(job_id, str(e), lease)
+            finally:
+                with self._active_lock:
+                    self._active.pop(job_id, None)
+
+    def _heartbeat(self):
+        # Renew well within the lease so a slow LLM call never lets it lapse
+        while not self._stop.wait(self.queue.lease_seconds / 3):
+            with self._active_lock:
+                active = dict(self._active)
+            try:
+                self.queue.heartbeat(active)
+                self.queue.requeue_interrupted()
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Job heartbeat failed: {e}")
+
+
+def hash_content(pdf_bytes: bytes) -> str:
+    """SHA-256 hex digest of a PDF's content (bytes or any buffer)."""
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def new_session_id() -> str:
+    """Generate an ID that groups one user's jobs."""
+    return uuid.uuid4().hex
+
+
+def wait_for_jobs(queue: JobQueue, job_ids: List[int], timeout: Optional[float] = None, poll_interval: float = 0.5) -> List[Dict]:
+    """
+    Block until the given jobs finish (for scripts and tests).
+
+    Returns:
+        Final job dictionaries in the order of job_ids
+    """
+    deadline = time.monotonic() + timeout if timeout else None
+    while True:
+        jobs = [queue.get_job(job_id) for job_id in job_ids]
+        if all(job['status'] in (DONE, FAILED, SAVED) for job in jobs):
+            return jobs
+        if deadline and time.monotonic() > deadline:
+            raise TimeoutError(f"Jobs still pending after {timeout}s")
+        time.sleep(poll_interval)
@@ -0,0 +1,579 @@
+"""
+LLM Client Wrapper
+Single entry point for chat completions with record/replay caching and rate limiting
+
+Modes (LLM_CACHE_MODE):
+    off     - call the API directly (default)
+    record  - call the API and store every request/response pair
+    replay  - serve responses from the store without network access
+
+Live calls draw from the shared rate limiter (see rate_limiter.py) and
+retry 429s, server errors and dropped connections themselves.
+
+Every live call has a deadline (LLM_DEADLINE) covering retries and
+rate-limit waits. When a call is slower than the model's recent p95
+latency, a duplicate (hedge) request is sent; the first valid response
+wins and the other request is cancelled (LLM_HEDGE).
+"""
+
+import os
+import json
+import zlib
+import sqlite3
+import hashlib
+import time
+import asyncio
+import threading
+import logging
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from src.rate_limiter import (
+    RateLimitTimeout, estimate_tokens, get_rate_limiter, rate_limiting_enabled, retry_after_seconds
+)
+
+logger = logging.getLogger(__name__)
+
+CACHE_MODES = ("off", "record", "replay")
+DEFAULT_CACHE_PATH = "data/llm_cache.db"
+
+# Retries for 429s, 5xx responses and connection errors on live calls
+MAX_RETRIES = 4
+
+# Seconds a live call may take in total, retries and rate-limit waits included
+DEFAULT_DEADLINE = 120.0
+
+# Hedge after this percentile of recent latency; until enough calls have
+# been seen, after DEFAULT_HEDGE_AFTER seconds
+DEFAULT_HEDGE_PERCENTILE = 95.0
+DEFAULT_HEDGE_AFTER = 20.0
+MIN_HEDGE_SAMPLES = 20
+MIN_HEDGE_DELAY = 0.5
+LATENCY_WINDOW = 500
+
+# USD per million (input, cached input, output) tokens; unknown models are costed as 0.
+# Dated snapshots (gpt-4o-mini-2024-07-18) use the price of their base model.
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+}
+
+# Mode set from code takes precedence over LLM_CACHE_MODE
+_mode_override = None
+_caches: Dict[str, "LLMCache"] = {}
+_caches_lock = threading.Lock()
+
+# Response list of the innermost capture_responses() block, if any
+_captured: ContextVar[Optional[list]] = ContextVar("llm_captured", default=None)
+
+
+class CacheMissError(Exception):
+    """Raised in replay mode when a request was never recorded."""
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a live call does not complete within its deadline."""
+
+
+class ChatResponse:
+    """
+    Minimal chat completion result.
+
+    Holds only what callers need so recorded and live responses are
+    interchangeable.
+    """
+
+    def __init__(self, content: str, model: str, usage: Optional[dict] = None, cached: bool = False):
+        self.content = content
+        self.model = model
+        self.usage = usage or {}
+        self.cached = cached
+
+    @classmethod
+    def from_openai(cls, response) -> "ChatResponse":
+        """Build from an OpenAI ChatCompletion object."""
+        usage = response.usage.model_dump() if getattr(response, 'usage', None) else {}
+        return cls(response.choices[0].message.content, response.model, usage)
+
+    @property
+    def cached_tokens(self) -> int:
+        """Prompt tokens served from the provider's prompt cache."""
+        details = self.usage.get('prompt_tokens_details') or {}
+        return details.get('cached_tokens') or 0
+
+    def to_dict(self) -> dict:
+        return {'content': self.content, 'model': self.model, 'usage': self.usage}
+
+    @classmethod
+    def from_dict(cls, data: dict, cached: bool = False) -> "ChatResponse":
+        return cls(data['content'], data['model'], data.get('usage'), cached=cached)
+
+
+def call_cost(model: str, usage: dict) -> float:
+    """Dollar cost of one call from its token usage (cached prompt tokens at the cached price)."""
+    matches = [name for name in MODEL_PRICES if model == name or model.startswith(name + "-")]
+    if not matches:
+        return 0.0
+    input_price, cached_price, output_price = MODEL_PRICES[max(matches, key=len)]
+    cached = (usage.get('prompt_tokens_details') or {}).get('cached_tokens') or 0
+    uncached = usage.get('prompt_tokens', 0) - cached
+    return (uncached * input_price + cached * cached_price + usage.get('completion_tokens', 0) * output_price) / 1_000_000
+
+
+def request_key(request: dict) -> str:
+    """Stable hash of a request (model, messages and sampling parameters)."""
+    canonical = json.dumps(request, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """
+    On-disk store of request/response pairs keyed by request hash.
+
+    Payloads are zlib-compressed JSON in a single SQLite file.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_CACHE_PATH):
+        """
+        Initialize the cache.
+
+        Args:
+            db_path: Path to SQLite cache file
+        """
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = []
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                request_key TEXT PRIMARY KEY,
+                model TEXT,
+                request BLOB NOT NULL,
+                response BLOB NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        self.conn.commit()
+
+    @staticmethod
+    def _pack(data: dict) -> bytes:
+        return zlib.compress(json.dumps(data, ensure_ascii=False).encode('utf-8'), 6)
+
+    @staticmethod
+    def _unpack(blob: bytes) -> dict:
+        return json.loads(zlib.decompress(blob).decode('utf-8'))
+
+    def get(self, key: str) -> Optional[ChatResponse]:
+        """Look up a recorded response (None if missing)."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT response FROM llm_responses WHERE request_key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return ChatResponse.from_dict(self._unpack(row[0]), cached=True)
+
+    def put(self, key: str, request: dict, response: ChatResponse):
+        """Store (or overwrite) a request/response pair."""
+        with self._lock:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO llm_responses (request_key, model, request, response)
+                VALUES (?, ?, ?, ?)
+            """, (key, request.get('model'), self._pack(request), self._pack(response.to_dict())))
+            self.conn.commit()
+
+    def record_hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def record_miss(self, key: str, request: dict):
+        with self._lock:
+            self.misses.append({'request_key': key, 'model': request.get('model')})
+
+    def stats(self) -> dict:
+        """Get hit/miss counts and store size for this process."""
+        with self._lock:
+            entries, stored_bytes = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(request) + LENGTH(response)), 0) FROM llm_responses"
+            ).fetchone()
+            return {
+                'hits': self.hits,
+                'misses': len(self.misses),
+                'miss_keys': [m['request_key'] for m in self.misses],
+                'entries': entries,
+                'stored_bytes': stored_bytes
+            }
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def set_cache_mode(mode: Optional[str]):
+    """
+    Override LLM_CACHE_MODE for this process (None restores the env setting).
+
+    Args:
+        mode: 'off', 'record' or 'replay'
+    """
+    global _mode_override
+
+    if mode is not None and mode not in CACHE_MODES:
+        raise ValueError(f"Unknown cache mode '{mode}'. Use one of: {', '.join(CACHE_MODES)}")
+    _mode_override = mode
+
+
+def get_cache_mode() -> str:
+    """Get the active cache mode."""
+    mode = _mode_override or os.getenv("LLM_CACHE_MODE", "off").lower()
+    if mode not in CACHE_MODES:
+        raise ValueError(f"Unknown LLM_CACHE_MODE '{mode}'. Use one of: {', '.join(CACHE_MODES)}")
+    return mode
+
+
+def get_cache(db_path: Optional[str] = None) -> LLMCache:
+    """Get the shared cache for a path (defaults to LLM_CACHE_PATH)."""
+    db_path = db_path or os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH)
+    with _caches_lock:
+        if db_path not in _caches:
+            _caches[db_path] = LLMCache(db_path)
+        return _caches[db_path]
+
+
+@contextmanager
+def capture_responses():
+    """
+    Collect the raw responses of every chat completion made inside the block.
+
+    Calls made in worker threads are included when the work is submitted
+    with contextvars.copy_context() (as chunked extraction does).
+
+    Yields:
+        List that receives each response's to_dict() in completion order
+    """
+    responses = []
+    token = _captured.set(responses)
+    try:
+        yield responses
+    finally:
+        _captured.reset(token)
+
+
+def chat_completion(
+    client,
+    model: str,
+    messages: List[dict],
+    deadline: Optional[float] = None,
+    **params
+) -> ChatResponse:
+    """
+    Run a chat completion through the record/replay layer.
+
+    Args:
+        client: OpenAI client (may be None in replay mode)
+        model: Model name
+        messages: Chat messages
+        deadline: Seconds the live call may take (reads LLM_DEADLINE if not provided)
+        **params: Extra request parameters (max_tokens, temperature, ...)
+
+    Returns:
+        ChatResponse
+
+    Raises:
+        CacheMissError: In replay mode when the request was never recorded
+        DeadlineExceeded: If a live call runs out of time
+    """
+    request = {'model': model, 'messages': messages, **params}
+    mode = get_cache_mode()
+
+    if mode == "replay":
+        cache = get_cache()
+        key = request_key(request)
+        cached = cache.get(key)
+        if cached is None:
+            cache.record_miss(key, request)
+            logger.warning(f"LLM cache miss: {key[:12]} (model: {model})")
+            raise CacheMissError(f"No recorded response for request {key[:12]}")
+        cache.record_hit()
+        _capture(cached)
+        return cached
+
+    if client is None:
+        raise ValueError("An OpenAI client is required unless LLM_CACHE_MODE=replay")
+
+    response = _create(client, request, deadline)
+
+    if mode == "record":
+        get_cache().put(request_key(request), request, response)
+
+    _capture(response)
+    return response
+
+
+def _capture(response: ChatResponse):
+    responses = _captured.get()
+    if responses is not None:
+        responses.append(response.to_dict())
+
+
+class LatencyTracker:
+    """
+    Recent live-call latencies and hedging counts for one model.
+
+    The latency window sets the hedge delay; the counts show how often
+    hedges fire and win.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.latencies = deque(maxlen=window)
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, hedged: bool = False, hedge_won: bool = False):
+        with self._lock:
+            self.latencies.append(latency)
+            self.calls += 1
+            self.hedged += hedged
+            self.hedge_wins += hedge_won
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency at percentile q of the window (None if empty)."""
+        with self._lock:
+            ordered = sorted(self.latencies)
+        if not ordered:
+            return None
+        return ordered[min(int(len(ordered) * q / 100), len(ordered) - 1)]
+
+    def hedge_delay(self, q: float, fallback: float) -> float:
+        """Seconds to wait for a response before sending a hedge."""
+        with self._lock:
+            samples = len(self.latencies)
+        delay = self.percentile(q) if samples >= MIN_HEDGE_SAMPLES else fallback
+        return max(delay, MIN_HEDGE_DELAY)
+
+    def stats(self) -> dict:
+        with self._lock:
+            calls, hedged, wins = self.calls, self.hedged, self.hedge_wins
+        return {
+            'calls': calls,
+            'hedged': hedged,
+            'hedge_wins': wins,
+            'hedge_rate': hedged / calls if calls else 0.0,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+        }
+
+
+_trackers: Dict[str, LatencyTracker] = {}
+_trackers_lock = threading.Lock()
+
+
+def get_latency_tracker(model: str) -> LatencyTracker:
+    """Get the latency tracker for a model."""
+    with _trackers_lock:
+        if model not in _trackers:
+            _trackers[model] = LatencyTracker()
+        return _trackers[model]
+
+
+def latency_stats() -> Dict[str, dict]:
+    """Get live-call latency percentiles and hedge counts per model for this process."""
+    with _trackers_lock:
+        trackers = dict(_trackers)
+    return {model: tracker.stats() for model, tracker in trackers.items()}
+
+
+def get_deadline() -> float:
+    """Default per-call deadline in seconds (LLM_DEADLINE)."""
+    return float(os.getenv("LLM_DEADLINE", DEFAULT_DEADLINE))
+
+
+def hedging_enabled() -> bool:
+    """Whether slow live calls are hedged (LLM_HEDGE, on by default)."""
+    return os.getenv("LLM_HEDGE", "on").lower() not in ("off", "0", "false", "no")
+
+
+# Hedged calls run on one background event loop so the losing request can be cancelled
+_loop = None
+_loop_lock = threading.Lock()
+_async_clients: Dict[int, tuple] = {}
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-hedging", daemon=True).start()
+        return _loop
+
+
+def _async_client(client):
+    """AsyncOpenAI twin of an OpenAI client (None for other clients, which are not hedged)."""
+    from openai import AsyncOpenAI, OpenAI
+
+    if not isinstance(client, OpenAI):
+        return None
+    with _loop_lock:
+        entry = _async_clients.get(id(client))
+        # Keep the sync client referenced so its id is not reused
+        if entry is None or entry[0] is not client:
+            entry = (client, AsyncOpenAI(
+                api_key=client.api_key,
+                organization=client.organization,
+                base_url=client.base_url,
+                max_retries=0
+            ))
+            _async_clients[id(client)] = entry
+        return entry[1]
+
+
+def _is_transient(error: Exception) -> bool:
+    status = getattr(error, 'status_code', None)
+    return (status is not None and status >= 500) or type(error).__name__ in ('APIConnectionError', 'APITimeoutError')
+
+
+def _send(client, request: dict, limiter, timeout: float) -> ChatResponse:
+    """One live request (no hedging)."""
+    completions = client.chat.completions
+    raw_completions = getattr(completions, 'with_raw_response', None)
+    if limiter is None or raw_completions is None:
+        return ChatResponse.from_openai(completions.create(**request, timeout=timeout))
+    # The raw response carries the x-ratelimit-* headers
+    raw = raw_completions.create(**request, timeout=timeout)
+    limiter.observe(request['model'], raw.headers)
+    return ChatResponse.from_openai(raw.parse())
+
+
+async def _send_async(async_client, request: dict, limiter, timeout: float) -> ChatResponse:
+    completions = async_client.chat.completions
+    if limiter is None:
+        response = ChatResponse.from_openai(await completions.create(**request, timeout=timeout))
+    else:
+        raw = await completions.with_raw_response.create(**request, timeout=timeout)
+        await asyncio.to_thread(limiter.observe, request['model'], raw.headers)
+        response = ChatResponse.from_openai(raw.parse())
+    if not response.content:
+        raise ValueError("Empty completion")
+    return response
+
+
+async def _hedged(async_client, request: dict, limiter, deadline_at: float, hedge_after: float,
+                  estimated: int) -> Tuple[ChatResponse, bool, bool]:
+    """
+    Send a request, and a hedge if it is slower than hedge_after.
+
+    Returns:
+        (response, whether a hedge was sent, whether the hedge won)
+    """
+    start = time.monotonic()
+    primary = asyncio.ensure_future(_send_async(async_client, request, limiter, deadline_at - start))
+    pending = {primary}
+    hedge_tried = hedged = False
+    error = None
+    try:
+        while pending:
+            now = time.monotonic()
+            if now >= deadline_at:
+                raise DeadlineExceeded(f"No response from {request['model']} within the deadline")
+            timeout = deadline_at - now if hedge_tried else min(deadline_at - now, max(start + hedge_after - now, 0))
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                if task.exception() is None:
+                    return task.result(), hedged, task is not primary
+                error = task.exception()
+
+            if not hedge_tried and pending and time.monotonic() >= start + hedge_after:
+                # One attempt per call; without spare quota the primary is simply awaited
+                hedge_tried = True
+                try:
+                    # Hedges only spend spare quota
+                    if limiter is not None:
+                        await asyncio.to_thread(limiter.acquire, request['model'], estimated, 0)
+                except RateLimitTimeout:
+                    continue
+                logger.info(f"{request['model']} slower than {hedge_after:.1f}s; sending hedge request")
+                pending.add(asyncio.ensure_future(
+                    _send_async(async_client, request, limiter, deadline_at - time.monotonic())
+                ))
+                hedged = True
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _create(client, request: dict, deadline: Optional[float] = None) -> ChatResponse:
+    """Make a live call within a deadline, paced by the shared rate limiter, retried and hedged."""
+    deadline_at = time.monotonic() + (deadline if deadline is not None else get_deadline())
+    limiter = get_rate_limiter() if rate_limiting_enabled() else None
+    scope = request['model']
+    estimated = estimate_tokens(request['messages'], request.get('max_tokens'))
+    tracker = get_latency_tracker(scope)
+    async_client = _async_client(client) if hedging_enabled() else None
+
+    for attempt in range(MAX_RETRIES + 1):
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"No response from {scope} within the deadline")
+        if limiter is not None:
+            try:
+                limiter.acquire(scope, estimated, max_wait=remaining)
+            except RateLimitTimeout as e:
+                raise DeadlineExceeded(f"No {scope} capacity within the deadline") from e
+
+        start = time.monotonic()
+        hedged = hedge_won = False
+        try:
+            if async_client is None:
+                response = _send(client, request, limiter, remaining)
+            else:
+                hedge_after = tracker.hedge_delay(
+                    float(os.getenv("LLM_HEDGE_PERCENTILE", DEFAULT_HEDGE_PERCENTILE)),
+                    float(os.getenv("LLM_HEDGE_AFTER", DEFAULT_HEDGE_AFTER))
+                )
+                future = asyncio.run_coroutine_threadsafe(
+                    _hedged(async_client, request, limiter, deadline_at, hedge_after, estimated), _get_loop()
+                )
+                response, hedged, hedge_won = future.result()
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            if time.monotonic() >= deadline_at and _is_transient(e):
+                raise DeadlineExceeded(f"No response from {scope} within the deadline") from e
+            if attempt == MAX_RETRIES:
+                raise
+            headers = getattr(getattr(e, 'response', None), 'headers', None)
+            if getattr(e, 'status_code', None) == 429 and limiter is not None:
+                limiter.throttled(scope, headers)
+            elif _is_transient(e) or getattr(e, 'status_code', None) == 429:
+                delay = min(0.5 * 2 ** attempt, 8.0)
+                if getattr(e, 'status_code', None) == 429:
+                    # Without the limiter nothing else paces a 429, so honour the server's hint
+                    delay = max(delay, retry_after_seconds(headers) or 0)
+                delay = min(delay, max(deadline_at - time.monotonic(), 0))
+                logger.warning(f"LLM call failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+            else:
+                raise
+            continue
+
+        tracker.record(time.monotonic() - start, hedged, hedge_won)
+        if limiter is not None:
+            limiter.settle(scope, estimated, response.usage.get('total_tokens', 0))
+        return response
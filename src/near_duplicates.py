@@ -0,0 +1,114 @@
+"""
+Near-Duplicate Detection
+MinHash signatures and LSH banding for spotting re-scanned or amended copies
+"""
+
+import os
+import re
+import struct
+import hashlib
+import random
+from typing import List, Optional
+
+# Signature layout: NUM_BANDS bands of ROWS_PER_BAND hash values.
+# Pairs with Jaccard similarity s collide in some band with probability
+# 1 - (1 - s^8)^16, i.e. ~0.3 at s=0.6, ~0.98 at s=0.8, ~1.0 at s=0.9.
+NUM_PERM = 128
+NUM_BANDS = 16
+ROWS_PER_BAND = NUM_PERM // NUM_BANDS
+
+# Word shingle size
+SHINGLE_SIZE = 5
+
+# Default similarity above which a contract is flagged as a near-duplicate
+DEFAULT_THRESHOLD = 0.9
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+# Fixed seed so signatures stay comparable across processes and releases
+_rng = random.Random(1021)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+
+
+def _hash64(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+def shingle_hashes(text: str, size: int = SHINGLE_SIZE) -> set:
+    """
+    Hash the word shingles of a document.
+
+    Text is lowercased and reduced to word characters first, so layout
+    and OCR whitespace differences between copies do not matter.
+
+    Args:
+        text: Document text
+        size: Words per shingle
+
+    Returns:
+        Set of 64-bit shingle hashes
+    """
+    words = re.findall(r'\w+', text.lower())
+    if len(words) < size:
+        return {_hash64(' '.join(words).encode('utf-8'))} if words else set()
+    return {
+        _hash64(' '.join(words[i:i + size]).encode('utf-8'))
+        for i in range(len(words) - size + 1)
+    }
+
+
+def compute_signature(text: str) -> Optional[List[int]]:
+    """
+    Compute the MinHash signature of a document.
+
+    Args:
+        text: Document text
+
+    Returns:
+        List of NUM_PERM hash values, or None for text without words
+        (scanned PDFs would otherwise all match each other)
+    """
+    hashes = shingle_hashes(text)
+    if not hashes:
+        return None
+
+    prime = _MERSENNE_PRIME
+    return [min((a * h + b) % prime for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def signature_to_bytes(signature: List[int]) -> bytes:
+    """Pack a signature for storage (8 bytes per value)."""
+    return struct.pack(f'<{NUM_PERM}Q', *signature)
+
+
+def signature_from_bytes(blob: bytes) -> List[int]:
+    """Unpack a stored signature."""
+    return list(struct.unpack(f'<{NUM_PERM}Q', blob))
+
+
+def band_hashes(signature: List[int]) -> List[int]:
+    """
+    Hash each LSH band of a signature.
+
+    Returns:
+        NUM_BANDS signed 64-bit integers (fits a SQLite INTEGER column)
+    """
+    buckets = []
+    for band in range(NUM_BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(struct.pack(f'<{ROWS_PER_BAND}Q', *rows), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, 'little', signed=True))
+    return buckets
+
+
+def estimate_similarity(signature_a: List[int], signature_b: List[int]) -> float:
+    """Estimate Jaccard similarity from two signatures."""
+    return sum(1 for a, b in zip(signature_a, signature_b) if a == b) / NUM_PERM
+
+
+def get_threshold() -> float:
+    """Get the near-duplicate threshold (NEAR_DUPLICATE_THRESHOLD or the default)."""
+    return float(os.getenv("NEAR_DUPLICATE_THRESHOLD", DEFAULT_THRESHOLD))
@@ -0,0 +1,176 @@
+"""
+PDF Text Engines
+Interchangeable local text extractors with automatic fallback
+"""
+
+import io
+import os
+import logging
+from typing import Callable, Dict, List, Optional, Union
+
+from src.profiling import profiled
+
+logger = logging.getLogger(__name__)
+
+# Tried in this order unless PDF_TEXT_ENGINES says otherwise
+DEFAULT_ENGINES = "pypdfium2,pdfminer,pypdf2"
+
+# A PDF given as a file path or as its content (bytes, or a buffer such as
+# Streamlit's UploadedFile.getbuffer())
+PdfSource = Union[str, bytes, bytearray, memoryview]
+
+
+class EngineUnavailable(Exception):
+    """Raised when an engine's library is not installed."""
+
+
+def describe_source(source: PdfSource) -> str:
+    """Short label for a PDF source in log messages."""
+    return source if isinstance(source, str) else f"<{len(source)} byte PDF>"
+
+
+def _as_stream(source: PdfSource):
+    """File path as is, in-memory content as a seekable stream."""
+    return source if isinstance(source, str) else io.BytesIO(source)
+
+
+def _pypdfium2_pages(source: PdfSource) -> List[str]:
+    try:
+        import pypdfium2
+    except ImportError as e:
+        raise EngineUnavailable("pypdfium2 is not installed") from e
+
+    pages = []
+    # pdfium reads bytes in place; memoryviews are copied once
+    document = pypdfium2.PdfDocument(source if isinstance(source, (str, bytes)) else bytes(source))
+    try:
+        for page in document:
+            text_page = page.get_textpage()
+            pages.append(text_page.get_text_range().replace("\r\n", "\n"))
+            text_page.close()
+            page.close()
+    finally:
+        document.close()
+    return pages
+
+
+def _pdfminer_pages(source: PdfSource) -> List[str]:
+    try:
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LTTextContainer
+    except ImportError as e:
+        raise EngineUnavailable("pdfminer.six is not installed") from e
+
+    return [
+        "".join(element.get_text() for element in layout if isinstance(element, LTTextContainer))
+        for layout in extract_pages(_as_stream(source))
+    ]
+
+
+def _pypdf2_pages(source: PdfSource) -> List[str]:
+    try:
+        from PyPDF2 import PdfReader
+    except ImportError as e:
+        raise EngineUnavailable("PyPDF2 is not installed") from e
+
+    return [page.extract_text() or "" for page in PdfReader(_as_stream(source)).pages]
+
+
+# Registry of engine name -> function(source) returning text per page
+_ENGINES: Dict[str, Callable[[PdfSource], List[str]]] = {
+    "pypdfium2": _pypdfium2_pages,
+    "pdfminer": _pdfminer_pages,
+    "pypdf2": _pypdf2_pages,
+}
+
+
+def register_engine(name: str, func: Callable[[PdfSource], List[str]]):
+    """
+    Register a text engine.
+
+    Args:
+        name: Engine name used in PDF_TEXT_ENGINES
+        func: Function taking a PdfSource and returning text per page
+    """
+    _ENGINES[name] = func
+
+
+def available_engines() -> List[str]:
+    """Get names of all registered engines (installed or not)."""
+    return list(_ENGINES)
+
+
+def get_engine_order(engines: Optional[List[str]] = None) -> List[str]:
+    """Resolve the engine fallback order from the argument or PDF_TEXT_ENGINES."""
+    if engines is None:
+        engines = [e.strip() for e in os.getenv("PDF_TEXT_ENGINES", DEFAULT_ENGINES).split(",") if e.strip()]
+    unknown = [e for e in engines if e not in _ENGINES]
+    if unknown:
+        raise ValueError(f"Unknown PDF text engine(s) {unknown}. Available: {', '.join(available_engines())}")
+    return engines
+
+
+def extract_pages(source: PdfSource, engine: str) -> List[str]:
+    """
+    Extract text per page with one specific engine.
+
+    Raises:
+        EngineUnavailable: If the engine's library is not installed
+    """
+    return _ENGINES[engine](source)
+
+
+def join_pages(pages: List[str]) -> str:
+    """Join page texts the way extract_text returns them (one newline-terminated block per page)."""
+    return "".join(page + "\n" for page in pages)
+
+
+@profiled("pdf_text.extract_text")
+def extract_text_pages(source: PdfSource, engines: Optional[List[str]] = None) -> List[str]:
+    """
+    Extract text per page with the first engine that succeeds.
+
+    An engine that is not installed, raises, or returns no text (e.g.
+    chokes on an unusual encoding) falls through to the next one.
+
+    Args:
+        source: Path to the PDF file, or its content in memory
+        engines: Engine names in fallback order (reads PDF_TEXT_ENGINES if not provided)
+
+    Returns:
+        Text per page ([] if no engine found text)
+    """
+    label = describe_source(source)
+    errors = []
+    for engine in get_engine_order(engines):
+        try:
+            pages = extract_pages(source, engine)
+        except EngineUnavailable as e:
+            logger.debug(f"Skipping {engine}: {e}")
+            continue
+        except Exception as e:
+            logger.warning(f"{engine} failed on {label}: {e}")
+            errors.append(f"{engine}: {e}")
+            continue
+
+        if any(page.strip() for page in pages):
+            return pages
+        logger.warning(f"{engine} found no text in {label}")
+
+    if errors:
+        raise ValueError(f"Could not read {label} ({'; '.join(errors)})")
+    return []
+
+
+def extract_text(source: PdfSource, engines: Optional[List[str]] = None) -> str:
+    """
+    Extract text from a PDF with the first engine that succeeds (see extract_text_pages).
+
+    Args:
+        source: Path to the PDF file, or its content in memory
+        engines: Engine names in fallback order (reads PDF_TEXT_ENGINES if not provided)
+
+    Returns:
+        Text with one newline-terminated block per page ('' if no engine found text)
+    """
+    return join_pages(extract_text_pages(source, engines))
@@ -0,0 +1,241 @@
+"""
+Profiling Hooks
+Opt-in cProfile/tracemalloc instrumentation for extraction, queries and validation
+"""
+
+import cProfile
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Environment switches (profiling is off unless PROFILE_DIR is set)
+PROFILE_DIR_ENV = "PROFILE_DIR"
+PROFILE_TOP_N_ENV = "PROFILE_TOP_N"
+
+# Active session (None when profiling is disabled)
+_session = None
+_local = threading.local()
+
+
+class ProfileSession:
+    """
+    One profiling run writing its dumps to a timestamped directory.
+
+    Every outermost call to a profiled function gets its own cProfile dump.
+    tracemalloc runs for the whole session so allocation reports cover
+    everything that happened between enable() and finish().
+
+    Per-call peak allocation comes from tracemalloc's peak, which is
+    process-wide: reset_peak() at the start of one call also resets it for
+    any call running concurrently, and allocations made by other threads
+    count towards every call in flight. Peaks are only meaningful for
+    single-threaded runs; wall times and cProfile dumps are per-call
+    either way.
+    """
+
+    def __init__(self, output_dir: str, top_n: int = 25):
+        """
+        Initialize a profiling session.
+
+        Args:
+            output_dir: Base directory for profile output
+            top_n: Number of allocation sites to include in reports
+        """
+        run_id = datetime.now().strftime("%Y%m%d_%H%M%S") + f"_{os.getpid()}"
+        self.run_dir = Path(output_dir) / run_id
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        self.top_n = top_n
+        self.calls = []
+        self._lock = threading.Lock()
+        self._counter = 0
+        self._started_tracemalloc = False
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+        logger.info(f"Profiling enabled, writing to: {self.run_dir}")
+
+    def _next_index(self) -> int:
+        with self._lock:
+            self._counter += 1
+            return self._counter
+
+    def run(self, label: str, func, args, kwargs):
+        """Run func under cProfile and record timing and peak memory (see the class docstring on peaks)."""
+        index = self._next_index()
+        profiler = cProfile.Profile()
+        tracemalloc.reset_peak()
+        start_mem = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+
+        profiler.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.disable()
+            elapsed = time.perf_counter() - start
+            peak_mem = tracemalloc.get_traced_memory()[1]
+
+            dump_path = self.run_dir / f"{index:05d}_{label}.prof"
+            profiler.dump_stats(str(dump_path))
+
+            with self._lock:
+                self.calls.append({
+                    'index': index,
+                    'label': label,
+                    'seconds': round(elapsed, 6),
+                    'peak_alloc_bytes': max(peak_mem - start_mem, 0),
+                    'profile': dump_path.name
+                })
+
+    def write_report(self) -> Path:
+        """
+        Write call summary and top-N allocation report for this run.
+
+        Returns:
+            Path to the allocation report
+        """
+        with self._lock:
+            calls = list(self.calls)
+
+        summary = {}
+        for call in calls:
+            stats = summary.setdefault(call['label'], {'calls': 0, 'total_seconds': 0.0, 'max_peak_alloc_bytes': 0})
+            stats['calls'] += 1
+            stats['total_seconds'] += call['seconds']
+            stats['max_peak_alloc_bytes'] = max(stats['max_peak_alloc_bytes'], call['peak_alloc_bytes'])
+
+        with open(self.run_dir / "calls.json", 'w', encoding='utf-8') as f:
+            json.dump({'calls': calls, 'summary': summary}, f, indent=2)
+
+        report_path = self.run_dir / "allocations.txt"
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        top_stats = snapshot.statistics('lineno')[:self.top_n]
+
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write(f"Top {self.top_n} allocation sites\n")
+            f.write("-" * 60 + "\n")
+            for stat in top_stats:
+                f.write(f"{stat}\n")
+            f.write("\n")
+            f.write(f"{'Label':<40} {'Calls':<8} {'Seconds':<12} {'Peak KiB':<10}\n")
+            f.write("-" * 60 + "\n")
+            for label, stats in sorted(summary.items()):
+                f.write(
+                    f"{label:<40} {stats['calls']:<8} {stats['total_seconds']:<12.4f} "
+                    f"{stats['max_peak_alloc_bytes'] / 1024:<10.1f}\n"
+                )
+
+        logger.info(f"Profiling report written: {report_path}")
+        return report_path
+
+    def close(self):
+        """Write the final report and stop tracemalloc if we started it."""
+        self.write_report()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+
+def enable_profiling(output_dir: Optional[str] = None, top_n: Optional[int] = None) -> ProfileSession:
+    """
+    Start a profiling session (no-op if one is already running).
+
+    Args:
+        output_dir: Directory for dumps (defaults to PROFILE_DIR or 'profiles')
+        top_n: Allocation sites per report (defaults to PROFILE_TOP_N or 25)
+
+    Returns:
+        The active ProfileSession
+    """
+    global _session
+
+    if _session is None:
+        output_dir = output_dir or os.getenv(PROFILE_DIR_ENV) or "profiles"
+        top_n = top_n or int(os.getenv(PROFILE_TOP_N_ENV, "25"))
+        _session = ProfileSession(output_dir, top_n=top_n)
+
+    return _session
+
+
+def disable_profiling() -> Optional[Path]:
+    """
+    Stop the active session and write its report.
+
+    Returns:
+        Path to the allocation report, or None if profiling was off
+    """
+    global _session
+
+    if _session is None:
+        return None
+
+    session, _session = _session, None
+    session.close()
+    return session.run_dir / "allocations.txt"
+
+
+def is_profiling_enabled() -> bool:
+    """Check whether a profiling session is active."""
+    return _session is not None
+
+
+def get_session() -> Optional[ProfileSession]:
+    """Get the active profiling session (None when disabled)."""
+    return _session
+
+
+def profiled(label: str):
+    """
+    Decorator that profiles a function when a session is active.
+
+    When profiling is disabled the wrapper costs one global lookup.
+    Nested profiled calls are folded into the outermost one.
+
+    Args:
+        label: Name used for dump files and report rows
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            session = _session
+            if session is None or getattr(_local, 'active', False):
+                return func(*args, **kwargs)
+
+            _local.active = True
+            try:
+                return session.run(label, func, args, kwargs)
+            finally:
+                _local.active = False
+
+        return wrapper
+
+    return decorator
+
+
+def enable_from_env():
+    """
+    Start profiling when PROFILE_DIR is set.
+
+    Runs at import time for variables set in the shell, and again from
+    load_environment() once .env has been read.
+    """
+    if _session is None and os.getenv(PROFILE_DIR_ENV):
+        import atexit
+        enable_profiling()
+        atexit.register(disable_profiling)
+
+
+enable_from_env()
@@ -0,0 +1,236 @@
+"""
+Prompt Templates
+Versioned extraction prompts with per-segment token accounting
+
+Templates put every static part (instructions, schema, output rules)
+before the contract text, so consecutive requests share a long identical
+prefix that the provider can cache. Usage is recorded per template:
+locally counted instruction and document tokens, and the prompt, cached
+and completion tokens reported by the API.
+"""
+
+import os
+import threading
+import logging
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from src.llm_client import ChatResponse, call_cost
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROMPT_VERSION = "extraction-v2"
+
+# Marks where the document goes in a template's user message
+DOCUMENT = "{document}"
+
+FIELD_SCHEMA = """{
+  "vendor_name": "string (required)",
+  "contract_number": "string or null",
+  "effective_date": "string (YYYY-MM-DD format) or null",
+  "expiration_date": "string (YYYY-MM-DD format) or null",
+  "total_amount": "string or null",
+  "payment_terms": "string or null",
+  "contract_type": "string or null",
+  "key_deliverables": "string or null"
+}"""
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """
+    Count tokens in text for a model.
+
+    Uses tiktoken when installed, otherwise estimates 4 characters per token.
+    """
+    encoding = _encoding(model)
+    if encoding is None:
+        return len(text) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+class PromptTemplate:
+    """
+    A versioned prompt: a system message and a user message with one document slot.
+
+    Everything before the slot is the static prefix shared by all
+    requests; everything after it is static too but cannot be cached.
+    """
+
+    def __init__(self, name: str, system: str, user: str):
+        """
+        Initialize the template.
+
+        Args:
+            name: Version name (recorded with usage and selected by PROMPT_VERSION)
+            system: System message
+            user: User message containing DOCUMENT exactly once
+        """
+        if user.count(DOCUMENT) != 1:
+            raise ValueError(f"Prompt {name} must contain {DOCUMENT} exactly once")
+        self.name = name
+        self.system = system
+        self.before, self.after = user.split(DOCUMENT)
+
+    def render(self, document: str) -> List[dict]:
+        """Build the chat messages for a document."""
+        return [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": self.before + document + self.after}
+        ]
+
+    @lru_cache(maxsize=16)
+    def static_tokens(self, model: str) -> Dict[str, int]:
+        """Tokens in the cacheable prefix and in the static suffix."""
+        return {
+            'prefix': count_tokens(self.system, model) + count_tokens(self.before, model),
+            'suffix': count_tokens(self.after, model)
+        }
+
+    def segment_tokens(self, document: str, model: str = "gpt-4o-mini") -> Dict[str, int]:
+        """
+        Count tokens per segment of a rendered prompt.
+
+        Returns:
+            dict with 'prefix' (static, cacheable), 'document' and 'suffix' (static, after the document)
+        """
+        return {**self.static_tokens(model), 'document': count_tokens(document, model)}
+
+
+# Original layout: short system message, instructions around the document.
+# Kept so responses recorded with it still replay.
+EXTRACTION_V1 = PromptTemplate(
+    "extraction-v1",
+    system="You are a contract data extraction assistant. Extract information accurately and return only valid JSON.",
+    user=f"""
+Extract the following information from this contract. Return ONLY valid JSON with these exact field names:
+
+{FIELD_SCHEMA}
+
+Contract text:
+{DOCUMENT}
+
+Return ONLY the JSON object, no other text.
+"""
+)
+
+# Static prefix layout: all instructions and the schema first, document last
+EXTRACTION_V2 = PromptTemplate(
+    "extraction-v2",
+    system=f"""You are a contract data extraction assistant. Extract information accurately and return only valid JSON.
+
+Extract the following information from the contract the user sends. Return ONLY a valid JSON object with these exact field names:
+
+{FIELD_SCHEMA}
+
+Rules:
+- Copy values as they appear in the contract; do not invent values.
+- Write dates as YYYY-MM-DD.
+- Use null when the contract does not state a value.
+- Return ONLY the JSON object, no other text.""",
+    user=f"Contract text:\n{DOCUMENT}"
+)
+
+# Registry of prompt version -> template
+_TEMPLATES: Dict[str, PromptTemplate] = {t.name: t for t in (EXTRACTION_V1, EXTRACTION_V2)}
+
+
+def register_template(template: PromptTemplate):
+    """Register a prompt template under its name."""
+    _TEMPLATES[template.name] = template
+
+
+def available_templates() -> List[str]:
+    """Get names of all registered prompt templates."""
+    return sorted(_TEMPLATES)
+
+
+def get_template(name: Optional[str] = None) -> PromptTemplate:
+    """Resolve a template from the argument or PROMPT_VERSION."""
+    name = name or os.getenv("PROMPT_VERSION", DEFAULT_PROMPT_VERSION)
+    if name not in _TEMPLATES:
+        raise ValueError(f"Unknown prompt version '{name}'. Available: {', '.join(available_templates())}")
+    return _TEMPLATES[name]
+
+
+class PromptUsage:
+    """Token, cache, latency and cost totals for one prompt template."""
+
+    def __init__(self):
+        self.calls = 0
+        self.segments = {'prefix': 0, 'document': 0, 'suffix': 0, 'followup': 0}
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+        self.latency = 0.0
+        self.cost = 0.0
+
+    def stats(self) -> dict:
+        calls = self.calls or 1
+        return {
+            'calls': self.calls,
+            'segments': dict(self.segments),
+            'prompt_tokens': self.prompt_tokens,
+            'cached_tokens': self.cached_tokens,
+            'completion_tokens': self.completion_tokens,
+            'cache_hit_rate': self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0,
+            'avg_latency': self.latency / calls,
+            'avg_cost': self.cost / calls,
+        }
+
+
+_usage: Dict[str, PromptUsage] = {}
+_usage_lock = threading.Lock()
+
+
+def record_usage(template: PromptTemplate, segments: Dict[str, int], response: ChatResponse, latency: float):
+    """
+    Record one call made with a template.
+
+    Args:
+        template: Template the request was rendered from
+        segments: Local token counts (see PromptTemplate.segment_tokens)
+        response: The response, whose usage carries the reported token counts
+        latency: Seconds the call took
+    """
+    usage = response.usage
+    with _usage_lock:
+        totals = _usage.setdefault(template.name, PromptUsage())
+        totals.calls += 1
+        for segment, tokens in segments.items():
+            totals.segments[segment] = totals.segments.get(segment, 0) + tokens
+        totals.prompt_tokens += usage.get('prompt_tokens', 0)
+        totals.cached_tokens += response.cached_tokens
+        totals.completion_tokens += usage.get('completion_tokens', 0)
+        totals.latency += latency
+        totals.cost += call_cost(response.model, usage)
+
+
+def usage_stats() -> Dict[str, dict]:
+    """Get per-template usage totals for this process."""
+    with _usage_lock:
+        return {name: totals.stats() for name, totals in _usage.items()}
+
+
+def format_usage(stats: Dict[str, dict]) -> List[str]:
+    """Human-readable lines summarizing usage_stats()."""
+    lines = []
+    for name, s in stats.items():
+        segments = s['segments']
+        lines.append(
+            f"{name}: {s['calls']} calls, {segments['prefix']:,} prefix + {segments['document']:,} document tokens, "
+            f"{s['cached_tokens']:,}/{s['prompt_tokens']:,} prompt tokens cached ({s['cache_hit_rate']:.0%}), "
+            f"avg {s['avg_latency']:.2f}s, ${s['avg_cost']:.5f}/call"
+        )
+    return lines
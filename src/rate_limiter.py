@@ -0,0 +1,331 @@
+"""
+Rate Limiter
+Token buckets for requests and tokens per minute, shared across processes through SQLite
+
+The app, batch_process.py and ad-hoc scripts all spend the same API quota.
+Every live LLM call acquires from the same buckets (one pair per model),
+so together they pace themselves just under the limit instead of
+overshooting into 429s.
+"""
+
+import os
+import re
+import time
+import sqlite3
+import threading
+import logging
+from typing import Dict, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_PATH = "data/rate_limit.db"
+
+# Quota used until the API reports the real one in response headers
+DEFAULT_RPM = 500
+DEFAULT_TPM = 200_000
+
+# Fraction of the quota to spend (the rest absorbs estimation error and other clients)
+DEFAULT_HEADROOM = 0.9
+
+# Bucket capacity in seconds of refill; small bursts keep throughput smooth
+BURST_SECONDS = 3.0
+
+# After a 429, the rate drops by this factor and then recovers by
+# RECOVERY_STEP of the quota per successful call
+BACKOFF_FACTOR = 0.75
+RECOVERY_STEP = 0.02
+MIN_RATE_FRACTION = 0.1
+
+# Longest a caller waits for capacity before giving up
+DEFAULT_MAX_WAIT = 300.0
+
+# Token estimate for calls whose prompt is built elsewhere (ExtractThinker)
+DEFAULT_REQUEST_TOKENS = 4000
+
+
+class RateLimitTimeout(Exception):
+    """Raised when capacity does not free up within the wait budget."""
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a rate-limit duration header ('1s', '6m0s', '20ms', '1.5') to seconds.
+
+    Returns:
+        Seconds, or None if the value is missing or unparseable
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = re.findall(r'(\d+(?:\.\d+)?)(ms|h|m|s)', value)
+    if not parts:
+        return None
+    scale = {'h': 3600.0, 'm': 60.0, 's': 1.0, 'ms': 0.001}
+    return sum(float(number) * scale[unit] for number, unit in parts)
+
+
+def estimate_tokens(messages, max_tokens: Optional[int] = None) -> int:
+    """Rough token count of a request (about 4 characters per token plus the completion budget)."""
+    chars = sum(len(str(m.get('content', ''))) for m in messages)
+    return chars // 4 + (max_tokens or 0)
+
+
+class RateLimiter:
+    """
+    Cross-process token buckets in a SQLite file.
+
+    Each scope (model) has a 'requests' and a 'tokens' bucket. A caller
+    takes one request and its estimated tokens atomically, sleeping
+    until both buckets have capacity. Rates follow the quota reported in
+    response headers (times the headroom), back off multiplicatively on
+    429s and recover additively.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        rpm: Optional[int] = None,
+        tpm: Optional[int] = None,
+        headroom: Optional[float] = None
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+            db_path: Shared state file (reads RATE_LIMIT_PATH from env if not provided)
+            rpm: Requests per minute quota (reads OPENAI_RPM_LIMIT)
+            tpm: Tokens per minute quota (reads OPENAI_TPM_LIMIT)
+            headroom: Fraction of the quota to use (reads RATE_LIMIT_HEADROOM)
+        """
+        self.db_path = db_path or os.getenv("RATE_LIMIT_PATH", DEFAULT_STATE_PATH)
+        self.rpm = rpm or int(os.getenv("OPENAI_RPM_LIMIT", DEFAULT_RPM))
+        self.tpm = tpm or int(os.getenv("OPENAI_TPM_LIMIT", DEFAULT_TPM))
+        self.headroom = headroom or float(os.getenv("RATE_LIMIT_HEADROOM", DEFAULT_HEADROOM))
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.waits = 0
+        self.waited_seconds = 0.0
+        self.throttles = 0
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.get_connection().execute("""
+            CREATE TABLE IF NOT EXISTS rate_buckets (
+                scope TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                quota REAL NOT NULL,
+                rate REAL NOT NULL,
+                level REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                blocked_until REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (scope, kind)
+            )
+        """)
+
+    def get_connection(self) -> sqlite3.Connection:
+        """Get this thread's connection (creates if needed)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _load(self, conn: sqlite3.Connection, scope: str, now: float) -> Dict[str, dict]:
+        """Read (creating if needed) and refill both buckets of a scope. Caller holds the write lock."""
+        buckets = {}
+        for kind, per_minute in (('requests', self.rpm), ('tokens', self.tpm)):
+            row = conn.execute(
+                "SELECT * FROM rate_buckets WHERE scope = ? AND kind = ?", (scope, kind)
+            ).fetchone()
+            if row is None:
+                rate = per_minute * self.headroom / 60
+                bucket = {'quota': per_minute, 'rate': rate, 'level': rate * BURST_SECONDS,
+                          'updated_at': now, 'blocked_until': 0.0}
+            else:
+                bucket = dict(row)
+            capacity = bucket['rate'] * BURST_SECONDS
+            elapsed = max(now - bucket['updated_at'], 0.0)
+            bucket['level'] = min(capacity, bucket['level'] + elapsed * bucket['rate'])
+            bucket['updated_at'] = now
+            buckets[kind] = bucket
+        return buckets
+
+    def _save(self, conn: sqlite3.Connection, scope: str, buckets: Dict[str, dict]):
+        for kind, bucket in buckets.items():
+            conn.execute("""
+                INSERT OR REPLACE INTO rate_buckets (scope, kind, quota, rate, level, updated_at, blocked_until)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (scope, kind, bucket['quota'], bucket['rate'], bucket['level'],
+                  bucket['updated_at'], bucket['blocked_until']))
+
+    def _update(self, scope: str, func):
+        """Run func(buckets, now) inside one write transaction and persist the buckets."""
+        conn = self.get_connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            buckets = self._load(conn, scope, now)
+            result = func(buckets, now)
+            self._save(conn, scope, buckets)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def acquire(self, scope: str, tokens: int = 0, max_wait: float = DEFAULT_MAX_WAIT) -> float:
+        """
+        Take one request and `tokens` tokens, waiting for capacity.
+
+        Args:
+            scope: Bucket pair to draw from (the model name)
+            tokens: Estimated tokens for the call
+            max_wait: Seconds to wait before raising RateLimitTimeout
+
+        Returns:
+            Seconds spent waiting
+        """
+        def take(buckets, now):
+            blocked = max(b['blocked_until'] for b in buckets.values()) - now
+            if blocked > 0:
+                return blocked
+            requests, token_bucket = buckets['requests'], buckets['tokens']
+            # A request larger than the bucket may go once the bucket is full
+            needed_tokens = min(tokens, token_bucket['rate'] * BURST_SECONDS)
+            if requests['level'] >= 1 and token_bucket['level'] >= needed_tokens:
+                requests['level'] -= 1
+                token_bucket['level'] -= tokens
+                return 0.0
+            return max(
+                (1 - requests['level']) / requests['rate'],
+                (needed_tokens - token_bucket['level']) / token_bucket['rate'],
+                0.01
+            )
+
+        waited = 0.0
+        while True:
+            delay = self._update(scope, take)
+            if delay == 0:
+                if waited:
+                    with self._stats_lock:
+                        self.waits += 1
+                        self.waited_seconds += waited
+                return waited
+            if waited + delay > max_wait:
+                raise RateLimitTimeout(f"No {scope} capacity within {max_wait:.0f}s")
+            time.sleep(delay)
+            waited += delay
+
+    def settle(self, scope: str, estimated: int, actual: int):
+        """Return (or charge) the difference between estimated and actual token usage."""
+        if actual <= 0 or actual == estimated:
+            return
+
+        def adjust(buckets, now):
+            bucket = buckets['tokens']
+            bucket['level'] = min(bucket['rate'] * BURST_SECONDS, bucket['level'] + estimated - actual)
+
+        self._update(scope, adjust)
+
+    def observe(self, scope: str, headers: Mapping[str, str]):
+        """
+        Adapt to rate-limit headers from a successful response.
+
+        The reported limits become the quota; remaining capacity lower
+        than the local bucket (another client on the same key) drains it.
+        """
+        def adapt(buckets, now):
+            for kind in ('requests', 'tokens'):
+                bucket = buckets[kind]
+                limit = _header_float(headers, f'x-ratelimit-limit-{kind}')
+                if limit:
+                    bucket['quota'] = limit
+                target = bucket['quota'] * self.headroom / 60
+                # Additive recovery after a backoff, never above the target
+                bucket['rate'] = min(target, bucket['rate'] + bucket['quota'] * RECOVERY_STEP / 60)
+                remaining = _header_float(headers, f'x-ratelimit-remaining-{kind}')
+                if remaining is not None:
+                    bucket['level'] = min(bucket['level'], remaining * self.headroom)
+
+        self._update(scope, adapt)
+
+    def throttled(self, scope: str, headers: Optional[Mapping[str, str]] = None) -> float:
+        """
+        Record a 429: pause the scope and back off its rates.
+
+        Args:
+            scope: Bucket pair that was throttled
+            headers: Response headers (retry-after and reset hints are honoured)
+
+        Returns:
+            Seconds until the scope accepts requests again
+        """
+        retry_after = retry_after_seconds(headers) or 1.0
+
+        def back_off(buckets, now):
+            for bucket in buckets.values():
+                floor = bucket['quota'] * MIN_RATE_FRACTION / 60
+                bucket['rate'] = max(floor, bucket['rate'] * BACKOFF_FACTOR)
+                bucket['level'] = min(bucket['level'], 0.0)
+                bucket['blocked_until'] = max(bucket['blocked_until'], now + retry_after)
+
+        self._update(scope, back_off)
+        with self._stats_lock:
+            self.throttles += 1
+        logger.warning(f"Rate limited on {scope}; pausing {retry_after:.1f}s")
+        return retry_after
+
+    def stats(self) -> dict:
+        """Get wait and throttle counts for this process."""
+        with self._stats_lock:
+            return {'waits': self.waits, 'waited_seconds': self.waited_seconds, 'throttles': self.throttles}
+
+
+def retry_after_seconds(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Wait a 429 response asks for (retry-after, or the rate-limit reset hints); None if it gives none."""
+    headers = headers or {}
+    return (
+        _header_float(headers, 'retry-after-ms', scale=0.001)
+        or _header_float(headers, 'retry-after')
+        or max(
+            parse_duration(headers.get('x-ratelimit-reset-requests')) or 0,
+            parse_duration(headers.get('x-ratelimit-reset-tokens')) or 0
+        )
+        or None
+    )
+
+
+def _header_float(headers: Mapping[str, str], name: str, scale: float = 1.0) -> Optional[float]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value) * scale
+    except ValueError:
+        return None
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def rate_limiting_enabled() -> bool:
+    """Whether live calls go through the limiter (LLM_RATE_LIMIT, on by default)."""
+    return os.getenv("LLM_RATE_LIMIT", "on").lower() not in ("off", "0", "false", "no")
+
+
+def get_rate_limiter(db_path: Optional[str] = None) -> RateLimiter:
+    """Get the shared limiter for a state file (defaults to RATE_LIMIT_PATH)."""
+    db_path = db_path or os.getenv("RATE_LIMIT_PATH", DEFAULT_STATE_PATH)
+    with _limiters_lock:
+        if db_path not in _limiters:
+            _limiters[db_path] = RateLimiter(db_path)
+        return _limiters[db_path]
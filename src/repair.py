@@ -0,0 +1,243 @@
+"""
+Field Repair
+Re-asks the model for just the fields validation flagged, from just the pages likely to hold them
+
+A whole-document retry costs as much as the first extraction however
+little is wrong. A repair request carries the flagged fields with their
+current values and problems, a schema limited to those fields, and the
+few pages that best match them, so its cost follows what is broken
+rather than the document size.
+"""
+
+import os
+import re
+import json
+import time
+import threading
+import logging
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+from src.contract_validator import validation_issues
+from src.llm_client import call_cost, chat_completion, get_cache_mode
+from src.prompts import FIELD_SCHEMA, PromptTemplate, record_usage, register_template
+from src.simple_extractor import create_client, parse_extraction_result
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+logger = logging.getLogger(__name__)
+
+# Pages sent with a repair request
+DEFAULT_REPAIR_PAGES = 2
+
+# Output type of each field, from the extraction schema
+FIELD_TYPES: Dict[str, str] = json.loads(FIELD_SCHEMA)
+
+# Wording that tends to sit near each field
+FIELD_HINTS = {
+    'contract_number': re.compile(r'\b(contract|agreement|po|order)\s*(no\.?|number|#)', re.IGNORECASE),
+    'effective_date': re.compile(r'\beffective\b', re.IGNORECASE),
+    'expiration_date': re.compile(r'\b(expir\w*|terminat\w*|end date)\b', re.IGNORECASE),
+    'total_amount': re.compile(r'[$€£]\s?\d'),
+    'payment_terms': re.compile(r'\b(net\s*\d+|payment terms?)\b', re.IGNORECASE),
+}
+
+# Used to rank pages only: vendor names and dates show up on most contracts
+PAGE_HINTS = {
+    **FIELD_HINTS,
+    'vendor_name': re.compile(r'\b(between|vendor|supplier|contractor|provider|inc|llc|ltd|corp\w*)\b', re.IGNORECASE),
+    'effective_date': re.compile(r'\b(effective|commenc\w*|start date|dated)\b', re.IGNORECASE),
+    'total_amount': re.compile(r'([$€£]\s?\d|\b(total|fee|price|amount)\b)', re.IGNORECASE),
+}
+
+REPAIR_TEMPLATE = PromptTemplate(
+    "repair-v1",
+    system="""You are a contract data extraction assistant. Some fields extracted from a contract failed validation.
+
+You will get the fields to correct with their output types, their current values, the problems found, and the contract pages most likely to contain them.
+
+Rules:
+- Return ONLY a JSON object with exactly the requested field names.
+- Copy values as they appear in the contract; do not invent values.
+- Write dates as YYYY-MM-DD.
+- Use null when the pages do not state a value.""",
+    user="{document}"
+)
+register_template(REPAIR_TEMPLATE)
+
+
+def select_pages(pages: List[str], fields: List[str], data: dict, limit: int = DEFAULT_REPAIR_PAGES) -> List[int]:
+    """
+    Pick the pages most likely to contain the fields.
+
+    Pages score one point per hint match and three when they contain the
+    field's current (flagged) value; ties go to earlier pages.
+
+    Returns:
+        Page indexes in document order
+    """
+    def score(page: str) -> int:
+        total = 0
+        for field in fields:
+            hint = PAGE_HINTS.get(field)
+            if hint:
+                total += len(hint.findall(page))
+            value = data.get(field)
+            if value and str(value).lower() in page.lower():
+                total += 3
+        return total
+
+    ranked = sorted(range(len(pages)), key=lambda i: (-score(pages[i]), i))
+    return sorted(ranked[:limit])
+
+
+def repair_fields_for(data: dict, include_warnings: bool = True) -> List[str]:
+    """Fields named by validation issues, in schema order."""
+    flagged = {
+        field
+        for issue in validation_issues(data)
+        if include_warnings or issue['severity'] == 'error'
+        for field in issue['fields']
+    }
+    return [field for field in FIELD_TYPES if field in flagged]
+
+
+def build_repair_request(data: dict, fields: List[str], problems: List[str], pages: List[str],
+                         selected: List[int]) -> str:
+    """The variable part of a repair prompt: fields, current values, problems and pages."""
+    schema = json.dumps({field: FIELD_TYPES[field] for field in fields}, indent=2)
+    # Related fields give context (e.g. the effective date when fixing the expiration date)
+    current = json.dumps({field: data.get(field) for field in FIELD_TYPES if field != 'key_deliverables'},
+                         ensure_ascii=False)
+    excerpt = "\n\n".join(f"[Page {i + 1} of {len(pages)}]\n{pages[i].strip()}" for i in selected)
+    return (
+        f"Fields to correct:\n{schema}\n\n"
+        f"Current values:\n{current}\n\n"
+        "Problems:\n" + "\n".join(f"- {p}" for p in problems) + "\n\n"
+        f"Contract pages:\n{excerpt}"
+    )
+
+
+class RepairResult:
+    """Outcome of one repair pass: fields sent for repair, and those whose value changed."""
+
+    def __init__(self, data: dict, fields: List[str], accepted: bool, latency: float = 0.0, cost: float = 0.0,
+                 prompt_tokens: int = 0, changed: Optional[List[str]] = None):
+        self.data = data
+        self.fields = fields
+        self.changed = changed or []
+        self.accepted = accepted
+        self.latency = latency
+        self.cost = cost
+        self.prompt_tokens = prompt_tokens
+
+
+class FieldRepairer:
+    """
+    Runs repair passes with one model and client.
+
+    The repaired values are merged into a copy of the extraction, which
+    is kept only if it validates with fewer errors, or as many errors
+    and fewer warnings, than before, or fills in a missing value.
+    """
+
+    def __init__(self, model_name: Optional[str] = None, client: Optional["OpenAI"] = None,
+                 max_pages: Optional[int] = None):
+        """
+        Initialize the repairer.
+
+        Args:
+            model_name: Model to use (reads REPAIR_MODEL, then MODEL_NAME, if not provided)
+            client: Reusable OpenAI client (created unless replaying)
+            max_pages: Pages sent per request (reads REPAIR_PAGES if not provided)
+        """
+        self.model_name = model_name or os.getenv("REPAIR_MODEL") or os.getenv("MODEL_NAME", "gpt-4o-mini")
+        self.max_pages = max_pages or int(os.getenv("REPAIR_PAGES", DEFAULT_REPAIR_PAGES))
+        if client is None and get_cache_mode() != "replay":
+            client = create_client()
+        self.client = client
+
+    def repair(
+        self,
+        data: dict,
+        pages: List[str],
+        fields: Optional[List[str]] = None,
+        problems: Optional[List[str]] = None
+    ) -> RepairResult:
+        """
+        Re-extract flagged fields and merge them back.
+
+        Args:
+            data: Extracted fields
+            pages: Contract text per page (see chunking.split_text for joined text)
+            fields: Fields to repair (default: those named by validation issues)
+            problems: Problems to describe (default: the validation messages for those fields)
+
+        Returns:
+            RepairResult (unchanged data if nothing needed or improved)
+        """
+        issues = validation_issues(data)
+        if fields is None:
+            fields = repair_fields_for(data)
+        if problems is None:
+            problems = [i['message'] for i in issues if set(i['fields']) & set(fields)]
+        if not fields or not pages:
+            return RepairResult(data, [], False)
+
+        selected = select_pages(pages, fields, data, self.max_pages)
+        request = build_repair_request(data, fields, problems, pages, selected)
+        segments = REPAIR_TEMPLATE.segment_tokens(request, self.model_name)
+
+        start = time.perf_counter()
+        response = chat_completion(
+            self.client,
+            model=self.model_name,
+            messages=REPAIR_TEMPLATE.render(request),
+            max_tokens=50 * len(fields) + 50,
+            temperature=0.1
+        )
+        latency = time.perf_counter() - start
+        record_usage(REPAIR_TEMPLATE, segments, response, latency)
+        cost = call_cost(self.model_name, response.usage)
+        prompt_tokens = response.usage.get('prompt_tokens', 0)
+
+        repaired = parse_extraction_result(response.content)
+        merged = {**data, **{field: repaired[field] for field in fields if field in repaired}}
+
+        before = _problem_counts(issues)
+        after = _problem_counts(validation_issues(merged))
+        # Equal counts still count as progress when a missing value was found
+        filled = any(is_null(data.get(f)) and not is_null(merged.get(f)) for f in fields)
+        accepted = after < before or (after == before and filled)
+        logger.info(f"Repaired {', '.join(fields)} from page(s) {[i + 1 for i in selected]}: "
+                    f"{'accepted' if accepted else 'rejected'} ({before} -> {after} errors/warnings)")
+        changed = [f for f in fields if merged.get(f) != data.get(f)] if accepted else []
+        return RepairResult(merged if accepted else data, fields, accepted, latency, cost, prompt_tokens, changed)
+
+
+def _problem_counts(issues: List[dict]) -> tuple:
+    errors = sum(1 for i in issues if i['severity'] == 'error')
+    return errors, len(issues) - errors
+
+
+def is_null(value) -> bool:
+    """Whether an extracted value is empty or a null placeholder."""
+    return value is None or str(value).strip().upper() in ('', 'NULL', 'NONE', 'N/A')
+
+
+def repair_enabled() -> bool:
+    """Whether background jobs repair flagged fields (FIELD_REPAIR, on by default)."""
+    return os.getenv("FIELD_REPAIR", "on").lower() not in ("off", "0", "false", "no")
+
+
+_repairer: Optional[FieldRepairer] = None
+_repairer_lock = threading.Lock()
+
+
+def get_repairer() -> FieldRepairer:
+    """Get the shared repairer (created on first use)."""
+    global _repairer
+    with _repairer_lock:
+        if _repairer is None:
+            _repairer = FieldRepairer()
+        return _repairer
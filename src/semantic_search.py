@@ -0,0 +1,414 @@
+"""
+Semantic Search
+Offline hashing TF-IDF vectors in a memory-mapped index with approximate nearest neighbours
+
+Layout of the index directory:
+    vectors.f32   - float32 matrix (capacity x DIMENSIONS), L2-normalized TF vectors
+    codes.u64     - one 64-bit random-hyperplane code per row (coarse ANN filter)
+    ids.i64       - contract ID per row (-1 marks a deleted row)
+    doc_freq.npy  - document frequency per hashed dimension (for query IDF)
+    meta.json     - row count, capacity and parameters
+    index.lock    - held while a process writes (app, API, workers and batch runs share the index)
+"""
+
+import os
+import re
+import json
+import math
+import shutil
+import zlib
+import threading
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within a process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = 1024
+NUM_BITS = 64
+DEFAULT_INDEX_DIR = "data/semantic_index"
+
+# Rows kept after the Hamming filter and re-scored exactly
+DEFAULT_CANDIDATES = 256
+
+INITIAL_CAPACITY = 1024
+
+# Fields that describe what a contract is about
+DOCUMENT_FIELDS = ['key_deliverables', 'contract_type', 'vendor_name', 'payment_terms']
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is',
+    'it', 'of', 'on', 'or', 'shall', 'that', 'the', 'this', 'to', 'will', 'with',
+    'contract', 'contracts', 'find', 'provide', 'provided', 'vendor'
+}
+
+# Popcount of every byte value, for Hamming distance over packed codes
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words minus stopwords, plus adjacent word bigrams."""
+    words = [w for w in re.findall(r'[a-z0-9]+', text.lower()) if w not in STOPWORDS and len(w) > 1]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def _hash_token(token: str) -> Tuple[int, float]:
+    h = zlib.crc32(token.encode('utf-8'))
+    return h % DIMENSIONS, (1.0 if (h >> 16) & 1 else -1.0)
+
+
+def term_counts(text: str) -> Dict[int, float]:
+    """Signed hashed term counts of a text (dimension -> count)."""
+    counts = Counter()
+    for token in tokenize(text):
+        index, sign = _hash_token(token)
+        counts[index] += sign
+    return counts
+
+
+def vectorize(text: str, idf: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Convert text to an L2-normalized hashed TF (or TF-IDF) vector.
+
+    Args:
+        text: Input text
+        idf: Optional per-dimension IDF weights
+
+    Returns:
+        float32 vector of length DIMENSIONS
+    """
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    for index, count in term_counts(text).items():
+        if count:
+            vector[index] = math.copysign(1.0 + math.log(abs(count)), count)
+    if idf is not None:
+        vector *= idf
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def contract_document(contract_data: dict) -> str:
+    """Build the searchable text for a contract from its descriptive fields."""
+    return " ".join(str(contract_data.get(f) or '') for f in DOCUMENT_FIELDS)
+
+
+class SemanticIndex:
+    """
+    Append-only vector index backed by memory-mapped files.
+
+    Queries first rank every row by Hamming distance between 64-bit
+    random-hyperplane codes (8 bytes per row), then compute exact cosine
+    similarity only for the closest candidates, so only a few hundred
+    vector rows are paged in per query regardless of index size.
+    """
+
+    def __init__(self, index_dir: str = DEFAULT_INDEX_DIR):
+        """
+        Open (or create) an index.
+
+        Args:
+            index_dir: Directory holding the index files
+        """
+        self.index_dir = index_dir
+        os.makedirs(index_dir, exist_ok=True)
+        self._lock = threading.Lock()
+
+        # Fixed seed keeps codes stable across processes
+        rng = np.random.default_rng(1021)
+        self.hyperplanes = rng.standard_normal((DIMENSIONS, NUM_BITS)).astype(np.float32)
+        self._bit_weights = (np.uint64(1) << np.arange(NUM_BITS, dtype=np.uint64))
+
+        self._meta_mtime = None
+        with self._file_lock():
+            if os.path.exists(self._path("meta.json")):
+                self._load_meta()
+                self._open_arrays(mode='r+')
+            else:
+                self.count = 0
+                self.capacity = INITIAL_CAPACITY
+                self.doc_count = 0
+                self.doc_freq = np.zeros(DIMENSIONS, dtype=np.int64)
+                self._open_arrays(mode='w+')
+                self.flush()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.index_dir, name)
+
+    def _load_meta(self):
+        meta_path = self._path("meta.json")
+        self._meta_mtime = os.path.getmtime(meta_path)
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.count = meta['count']
+        self.capacity = meta['capacity']
+        self.doc_count = meta.get('doc_count', self.count)
+        self.doc_freq = np.load(self._path("doc_freq.npy"))
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock on the index directory, shared by every process that writes to it."""
+        with open(self._path("index.lock"), 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _writing(self):
+        """Hold the index for writing, against other threads and other processes."""
+        with self._lock, self._file_lock():
+            # mtimes can tie within a burst of writes, so always re-read under the lock
+            self._reload_if_changed(force=True)
+            yield
+
+    def _reload_if_changed(self, force: bool = False):
+        """Pick up rows appended by another process (e.g. batch_process.py)."""
+        meta_path = self._path("meta.json")
+        if os.path.exists(meta_path) and (force or os.path.getmtime(meta_path) != self._meta_mtime):
+            # Reopen too: the files may have grown, or been replaced by a rebuild
+            self._load_meta()
+            self._open_arrays(mode='r+')
+
+    def _open_arrays(self, mode: str):
+        self.vectors = np.memmap(self._path("vectors.f32"), dtype=np.float32, mode=mode, shape=(self.capacity, DIMENSIONS))
+        self.codes = np.memmap(self._path("codes.u64"), dtype=np.uint64, mode=mode, shape=(self.capacity,))
+        self.ids = np.memmap(self._path("ids.i64"), dtype=np.int64, mode=mode, shape=(self.capacity,))
+
+    def _grow(self):
+        """Double capacity by extending the backing files."""
+        self.flush()
+        new_capacity = self.capacity * 2
+        for name, itemsize in (("vectors.f32", 4 * DIMENSIONS), ("codes.u64", 8), ("ids.i64", 8)):
+            with open(self._path(name), 'r+b') as f:
+                f.truncate(new_capacity * itemsize)
+        self.capacity = new_capacity
+        self._open_arrays(mode='r+')
+
+    def _write_meta(self):
+        np.save(self._path("doc_freq.npy"), self.doc_freq)
+        with open(self._path("meta.json"), 'w', encoding='utf-8') as f:
+            json.dump({
+                'count': self.count,
+                'capacity': self.capacity,
+                'doc_count': self.doc_count,
+                'dimensions': DIMENSIONS,
+                'bits': NUM_BITS
+            }, f)
+        self._meta_mtime = os.path.getmtime(self._path("meta.json"))
+
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        bits = (vectors @ self.hyperplanes) > 0
+        return (bits.astype(np.uint64) * self._bit_weights).sum(axis=-1, dtype=np.uint64)
+
+    def idf(self) -> np.ndarray:
+        """Smoothed inverse document frequency per dimension."""
+        return np.log((1.0 + self.doc_count) / (1.0 + self.doc_freq)).astype(np.float32) + 1.0
+
+    def __len__(self) -> int:
+        return int((self.ids[:self.count] >= 0).sum())
+
+    def add(self, contract_id: int, text: str):
+        """
+        Index a contract's text.
+
+        Args:
+            contract_id: Contract ID
+            text: Searchable text (see contract_document)
+        """
+        vector = vectorize(text)
+        with self._writing():
+            self._append(contract_id, vector)
+
+    def _append(self, contract_id: int, vector: np.ndarray):
+        """Write one row; the caller holds the index for writing."""
+        if self.count >= self.capacity:
+            self._grow()
+
+        row = self.count
+        self.vectors[row] = vector
+        self.codes[row] = self._encode(vector)
+        self.ids[row] = contract_id
+        self.count += 1
+
+        self.doc_count += 1
+        self.doc_freq[np.nonzero(vector)[0]] += 1
+        self.flush()
+
+    def remove(self, contract_id: int) -> bool:
+        """
+        Mark a contract's rows as deleted.
+
+        Returns:
+            True if the contract was indexed
+        """
+        with self._writing():
+            rows = np.nonzero(self.ids[:self.count] == contract_id)[0]
+            self.ids[rows] = -1
+            if len(rows):
+                self.flush()
+            return len(rows) > 0
+
+    def search(self, query: str, top_k: int = 10, candidates: int = DEFAULT_CANDIDATES) -> List[Tuple[int, float]]:
+        """
+        Find contracts most similar to a free-text query.
+
+        Args:
+            query: Search text (e.g. "cloud migration services")
+            top_k: Number of results
+            candidates: Rows re-scored exactly after the Hamming filter
+
+        Returns:
+            List of (contract_id, similarity), best first
+        """
+        with self._lock:
+            # A reload or grow swaps the arrays, so search the ones current now
+            self._reload_if_changed()
+            count = self.count
+            idf = self.idf()
+            vectors, codes, ids = self.vectors, self.codes, np.asarray(self.ids[:count])
+        query_vector = vectorize(query, idf=idf)
+        if not query_vector.any() or count == 0:
+            return []
+
+        # Stage 1: Hamming distance on 8-byte codes (cheap for every row)
+        query_code = self._encode(query_vector)
+        xor = np.bitwise_xor(np.asarray(codes[:count]), query_code)
+        distances = _POPCOUNT[xor.view(np.uint8).reshape(count, 8)].sum(axis=1, dtype=np.int32)
+        distances[ids < 0] = NUM_BITS + 1
+
+        if count > candidates:
+            rows = np.argpartition(distances, candidates)[:candidates]
+        else:
+            rows = np.arange(count)
+        rows = rows[ids[rows] >= 0]
+        rows.sort()
+
+        # Stage 2: exact scores on the candidate rows only
+        scores = np.asarray(vectors[rows]) @ query_vector
+        order = np.argsort(-scores)
+
+        results = []
+        seen = set()
+        for i in order:
+            contract_id = int(ids[rows[i]])
+            if scores[i] <= 0 or contract_id in seen:
+                continue
+            seen.add(contract_id)
+            results.append((contract_id, float(scores[i])))
+            if len(results) >= top_k:
+                break
+        return results
+
+    def flush(self):
+        """Persist arrays and metadata."""
+        self.vectors.flush()
+        self.codes.flush()
+        self.ids.flush()
+        self._write_meta()
+
+
+_indexes: Dict[str, SemanticIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(index_dir: Optional[str] = None) -> SemanticIndex:
+    """Get the shared index for a directory (defaults to SEMANTIC_INDEX_DIR)."""
+    index_dir = index_dir or os.getenv("SEMANTIC_INDEX_DIR", DEFAULT_INDEX_DIR)
+    with _indexes_lock:
+        if index_dir not in _indexes:
+            _indexes[index_dir] = SemanticIndex(index_dir)
+        return _indexes[index_dir]
+
+
+def index_contract(contract_id: int, contract_data: dict):
+    """Add a newly inserted contract to the shared index."""
+    get_index().add(contract_id, contract_document(contract_data))
+
+
+def unindex_contract(contract_id: int) -> bool:
+    """Drop a deleted contract from the shared index, if one has been built."""
+    index_dir = os.getenv("SEMANTIC_INDEX_DIR", DEFAULT_INDEX_DIR)
+    if not os.path.exists(os.path.join(index_dir, "meta.json")):
+        return False
+    return get_index(index_dir).remove(contract_id)
+
+
+def rebuild_index(db, index_dir: Optional[str] = None) -> SemanticIndex:
+    """
+    Rebuild the index from every contract in a ContractDatabase.
+
+    Args:
+        db: ContractDatabase
+        index_dir: Directory for the new index (existing files are replaced)
+
+    Returns:
+        The rebuilt SemanticIndex
+    """
+    index_dir = index_dir or os.getenv("SEMANTIC_INDEX_DIR", DEFAULT_INDEX_DIR)
+    os.makedirs(index_dir, exist_ok=True)
+
+    # Build beside the live index so other processes keep searching (and adding) meanwhile
+    index = get_index(index_dir)
+    with index._writing():
+        first_new_row = index.count
+    staging_dir = f"{index_dir.rstrip(os.sep)}.rebuild"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    staging = SemanticIndex(staging_dir)
+    contracts = sorted(db.get_all_contracts(), key=lambda c: c['id'])
+    for contract in contracts:
+        staging.add(contract['id'], contract_document(contract))
+
+    with index._writing():
+        # Carry over contracts indexed after the rebuild started and missing from its read
+        rebuilt = {contract['id'] for contract in contracts}
+        with staging._writing():
+            for row in range(first_new_row, index.count):
+                contract_id = int(index.ids[row])
+                if contract_id >= 0 and contract_id not in rebuilt:
+                    staging._append(contract_id, np.asarray(index.vectors[row]))
+
+        # meta.json last: readers reload when it changes
+        for name in ("vectors.f32", "codes.u64", "ids.i64", "doc_freq.npy", "meta.json"):
+            os.replace(os.path.join(staging_dir, name), os.path.join(index_dir, name))
+        index._reload_if_changed(force=True)
+    shutil.rmtree(staging_dir, ignore_errors=True)
+
+    logger.info(f"Rebuilt semantic index with {len(contracts)} contracts")
+    return index
+
+
+if __name__ == "__main__":
+    import sys
+    from src.database import open_contract_database
+
+    logging.basicConfig(level=logging.INFO)
+
+    if len(sys.argv) < 2:
+        print("Usage: python -m src.semantic_search --rebuild")
+        print("       python -m src.semantic_search \"cloud migration services\"")
+        sys.exit(1)
+
+    db = open_contract_database()
+
+    if sys.argv[1] == "--rebuild":
+        index = rebuild_index(db)
+        print(f"Indexed {len(index)} contracts")
+    else:
+        index = get_index()
+        for contract_id, score in index.search(" ".join(sys.argv[1:])):
+            contract = db.get_contract_by_id(contract_id)
+            if contract:
+                print(f"{score:.3f}  {contract['filename']:<40} {contract.get('key_deliverables') or ''}"[:120])
+
+    db.close()
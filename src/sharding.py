@@ -0,0 +1,463 @@
+"""
+Sharded Contract Storage
+Contracts partitioned across SQLite files by tenant or upload year, behind the ContractDatabase API
+
+One SQLite file serializes every writer and grows without bound. With
+CONTRACT_SHARD_BY set, each contract goes to the shard for its key
+(tenant, or the year it was uploaded) under SHARD_DIR; reads and
+aggregates run on every shard in parallel and are merged.
+
+A catalog database in the same directory lists the shards and holds the
+vendor registry, so vendor IDs stay global. Each vendor row is copied
+into the shards that reference it, so joins stay local to a shard.
+Contract IDs are global too: shard ID * ID_STRIDE + the shard's own
+row ID.
+"""
+
+import os
+import sqlite3
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.database import ContractDatabase, PartialInsertError
+from src.near_duplicates import DEFAULT_THRESHOLD
+from src.profiling import profiled
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHARD_DIR = "data/shards"
+DEFAULT_TENANT = "default"
+CATALOG_FILE = "catalog.db"
+
+SHARD_KEYS = ("tenant", "year")
+
+# Contract IDs per shard; global ID = shard ID * ID_STRIDE + local ID
+ID_STRIDE = 1_000_000_000
+
+DEFAULT_FANOUT_WORKERS = 8
+
+
+def to_global_id(shard_id: int, local_id: int) -> int:
+    return shard_id * ID_STRIDE + local_id
+
+
+def split_global_id(contract_id: int) -> Tuple[int, int]:
+    """(shard ID, local ID) of a global contract ID."""
+    return divmod(contract_id, ID_STRIDE)
+
+
+def _newest_first(rows: List[Dict]) -> List[Dict]:
+    return sorted(rows, key=lambda r: (r.get('upload_date') or '', r['id']), reverse=True)
+
+
+class ShardedContractDatabase:
+    """
+    Contract storage split across SQLite files, with the ContractDatabase API.
+
+    Every thread gets its own connection per shard (SQLite connections
+    are not shared across threads); fan-out reads use a small thread pool.
+    """
+
+    def __init__(
+        self,
+        shard_dir: Optional[str] = None,
+        shard_by: Optional[str] = None,
+        workers: Optional[int] = None
+    ):
+        """
+        Initialize sharded storage.
+
+        Args:
+            shard_dir: Directory holding the catalog and shard files (reads SHARD_DIR if not provided)
+            shard_by: Partition key, 'tenant' or 'year' (reads CONTRACT_SHARD_BY if not provided)
+            workers: Shards queried at once (reads SHARD_FANOUT_WORKERS if not provided)
+
+        Raises:
+            ValueError: If the partition key is unknown
+        """
+        self.shard_dir = Path(shard_dir or os.getenv("SHARD_DIR", DEFAULT_SHARD_DIR))
+        self.shard_by = (shard_by or os.getenv("CONTRACT_SHARD_BY", "year")).lower()
+        if self.shard_by not in SHARD_KEYS:
+            raise ValueError(f"Unknown shard key '{self.shard_by}'. Use: {', '.join(SHARD_KEYS)}")
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = str(self.shard_dir / CATALOG_FILE)
+
+        self._local = threading.local()
+        self._all_connections: List[ContractDatabase] = []
+        self._connections_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers or int(os.getenv("SHARD_FANOUT_WORKERS", DEFAULT_FANOUT_WORKERS)),
+            thread_name_prefix="shard"
+        )
+        self.create_tables()
+
+    def _open(self, path: str) -> ContractDatabase:
+        db = ContractDatabase(path)
+        with self._connections_lock:
+            self._all_connections.append(db)
+        return db
+
+    def _catalog(self) -> ContractDatabase:
+        """This thread's catalog connection."""
+        catalog = getattr(self._local, 'catalog', None)
+        if catalog is None:
+            catalog = self._open(self.db_path)
+            self._local.catalog = catalog
+        return catalog
+
+    def _shard(self, shard_id: int) -> ContractDatabase:
+        """This thread's connection to a shard."""
+        shards = getattr(self._local, 'shards', None)
+        if shards is None:
+            shards = self._local.shards = {}
+        if shard_id not in shards:
+            path = self.shard_dir / f"shard_{shard_id:04d}.db"
+            shards[shard_id] = self._open(str(path))
+        return shards[shard_id]
+
+    def create_tables(self):
+        """Create the catalog tables if they don't exist."""
+        conn = self._catalog().get_connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS shards (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                shard_key TEXT NOT NULL UNIQUE,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.commit()
+        logger.info(f"Sharded storage initialized: {self.shard_dir} (by {self.shard_by})")
+
+    def shard_ids(self) -> List[int]:
+        """IDs of all shards, read from the catalog (other processes may add shards)."""
+        cursor = self._catalog().get_connection().execute("SELECT id FROM shards ORDER BY id")
+        return [row[0] for row in cursor.fetchall()]
+
+    def shard_key_for(self, contract_data: dict) -> str:
+        """Partition key value for a new contract."""
+        if self.shard_by == "tenant":
+            return str(contract_data.get('tenant') or os.getenv("SHARD_TENANT", DEFAULT_TENANT))
+        return str(datetime.now().year)
+
+    def _shard_id_for(self, key: str) -> int:
+        """Shard ID for a key value, registering the shard if new."""
+        conn = self._catalog().get_connection()
+        conn.execute("INSERT OR IGNORE INTO shards (shard_key) VALUES (?)", (key,))
+        conn.commit()
+        return conn.execute("SELECT id FROM shards WHERE shard_key = ?", (key,)).fetchone()[0]
+
+    def _fan_out(self, query: Callable[[int, ContractDatabase], object]) -> Dict[int, object]:
+        """Run query(shard_id, shard) on every shard in parallel."""
+        shard_ids = self.shard_ids()
+        if len(shard_ids) <= 1:
+            return {s: query(s, self._shard(s)) for s in shard_ids}
+        futures = {s: self._executor.submit(lambda s=s: query(s, self._shard(s))) for s in shard_ids}
+        return {s: future.result() for s, future in futures.items()}
+
+    def _gather_rows(self, query: Callable[[ContractDatabase], List[Dict]]) -> List[Dict]:
+        """Run a row query on every shard, with IDs made global."""
+        def run(shard_id, shard):
+            return [{**row, 'id': to_global_id(shard_id, row['id'])} for row in query(shard)]
+        return [row for rows in self._fan_out(run).values() for row in rows]
+
+    def resolve_vendor(self, vendor_name: Optional[str]) -> Optional[int]:
+        """Map a raw vendor name to a global vendor ID (see ContractDatabase.resolve_vendor)."""
+        catalog = self._catalog()
+        vendor_id = catalog.resolve_vendor(vendor_name)
+        catalog.get_connection().commit()
+        return vendor_id
+
+    def _copy_vendor(self, shard: ContractDatabase, vendor_id: int):
+        """Copy a catalog vendor row into a shard (does not commit)."""
+        row = self._catalog().get_connection().execute(
+            "SELECT id, canonical_name, match_key FROM vendors WHERE id = ?", (vendor_id,)
+        ).fetchone()
+        shard.get_connection().execute(
+            "INSERT OR IGNORE INTO vendors (id, canonical_name, match_key) VALUES (?, ?, ?)",
+            tuple(row)
+        )
+
+    def backfill_vendor_ids(self) -> int:
+        """Shards resolve vendors on insert, so there is nothing to backfill."""
+        return 0
+
+    @profiled("shards.insert_contract")
+    def insert_contract(
+        self,
+        filename: str,
+        contract_data: dict,
+        signature: Optional[List[int]] = None,
+        vendor_id: Optional[int] = None
+    ) -> int:
+        """
+        Insert a contract into the shard for its key.
+
+        Returns:
+            Global contract ID
+        """
+        shard_id = self._shard_id_for(self.shard_key_for(contract_data))
+        shard = self._shard(shard_id)
+        if vendor_id is None:
+            vendor_id = self.resolve_vendor(contract_data.get('vendor_name'))
+        if vendor_id is not None:
+            self._copy_vendor(shard, vendor_id)
+        local_id = shard.insert_contract(filename, contract_data, signature, vendor_id=vendor_id)
+        return to_global_id(shard_id, local_id)
+
+    @profiled("shards.insert_contracts")
+    def insert_contracts(
+        self,
+        contracts: List[Tuple[str, dict, Optional[List[int]]]],
+        vendor_ids: Optional[List[Optional[int]]] = None
+    ) -> List[int]:
+        """
+        Insert several contracts with one transaction per shard they go to.
+
+        Each shard's contracts are stored all or none. A failing shard
+        does not stop the others; the shards that committed keep their rows.
+
+        Returns:
+            Global contract IDs, in the order of contracts
+
+        Raises:
+            PartialInsertError: If any shard rolled back (with the IDs that were stored)
+        """
+        vendor_ids = vendor_ids or [None] * len(contracts)
+        by_shard: Dict[int, List[int]] = {}
+        for i, (_, contract_data, _) in enumerate(contracts):
+            by_shard.setdefault(self._shard_id_for(self.shard_key_for(contract_data)), []).append(i)
+
+        contract_ids = [None] * len(contracts)
+        error = None
+        for shard_id, indexes in by_shard.items():
+            shard = self._shard(shard_id)
+            try:
+                shard_vendor_ids = [
+                    vendor_ids[i] if vendor_ids[i] is not None
+                    else self.resolve_vendor(contracts[i][1].get('vendor_name'))
+                    for i in indexes
+                ]
+                for vendor_id in set(shard_vendor_ids) - {None}:
+                    self._copy_vendor(shard, vendor_id)
+                local_ids = shard.insert_contracts([contracts[i] for i in indexes], shard_vendor_ids)
+            except Exception as e:
+                shard.get_connection().rollback()
+                logger.warning(f"Batch insert into shard {shard_id} rolled back: {e}")
+                error = error or e
+                continue
+            for i, local_id in zip(indexes, local_ids):
+                contract_ids[i] = to_global_id(shard_id, local_id)
+        if error is not None:
+            if all(contract_id is None for contract_id in contract_ids):
+                raise error
+            raise PartialInsertError(contract_ids, error)
+        return contract_ids
+
+    def add_signature(self, contract_id: int, signature: List[int]):
+        shard_id, local_id = split_global_id(contract_id)
+        self._shard(shard_id).add_signature(local_id, signature)
+
+    @profiled("shards.find_near_duplicates")
+    def find_near_duplicates(
+        self,
+        signature: Optional[List[int]],
+        threshold: float = DEFAULT_THRESHOLD,
+        limit: int = 5
+    ) -> List[Dict]:
+        if signature is None:
+            return []
+        matches = self._gather_rows(lambda shard: shard.find_near_duplicates(signature, threshold, limit))
+        matches.sort(key=lambda m: m['similarity'], reverse=True)
+        return matches[:limit]
+
+    @profiled("shards.get_all_contracts")
+    def get_all_contracts(self) -> List[Dict]:
+        return _newest_first(self._gather_rows(lambda shard: shard.get_all_contracts()))
+
+    @profiled("shards.get_contracts_since")
+    def get_contracts_since(self, last_id: int = 0) -> List[Dict]:
+        """
+        Get contracts with a global ID above last_id, in ID order.
+
+        IDs grow within a shard but not across shards, so a caller
+        tracking the highest ID can miss rows added to an older shard;
+        compare counts to detect that (as ContractSnapshot.sync does).
+        """
+        def run(shard_id, shard):
+            local_since = max(0, last_id - to_global_id(shard_id, 0))
+            return [{**row, 'id': to_global_id(shard_id, row['id'])} for row in shard.get_contracts_since(local_since)]
+        rows = [row for rows in self._fan_out(run).values() for row in rows]
+        return sorted(rows, key=lambda r: r['id'])
+
+    @profiled("shards.get_contracts_by_vendor")
+    def get_contracts_by_vendor(self, vendor_id: int) -> List[Dict]:
+        return _newest_first(self._gather_rows(lambda shard: shard.get_contracts_by_vendor(vendor_id)))
+
+    @profiled("shards.get_vendors")
+    def get_vendors(self, limit: Optional[int] = None) -> List[Dict]:
+        vendors: Dict[int, Dict] = {}
+        for rows in self._fan_out(lambda s, shard: shard.get_vendors()).values():
+            for row in rows:
+                entry = vendors.setdefault(row['id'], {**row, 'contract_count': 0})
+                entry['contract_count'] += row['contract_count']
+        ranked = sorted(vendors.values(), key=lambda v: (-v['contract_count'], v['canonical_name']))
+        return ranked if limit is None else ranked[:limit]
+
+    @profiled("shards.get_aggregates")
+    def get_aggregates(self, top_vendors: int = 10) -> Dict:
+        by_type: Dict[str, int] = {}
+        by_month: Dict[str, int] = {}
+        total = 0
+        for aggregates in self._fan_out(lambda s, shard: shard.get_aggregates(top_vendors=0)).values():
+            total += aggregates['total_contracts']
+            for row in aggregates['by_contract_type']:
+                by_type[row['contract_type']] = by_type.get(row['contract_type'], 0) + row['contract_count']
+            for row in aggregates['by_upload_month']:
+                by_month[row['month']] = by_month.get(row['month'], 0) + row['contract_count']
+        return {
+            'total_contracts': total,
+            'top_vendors': self.get_vendors(limit=top_vendors),
+            'by_contract_type': [{'contract_type': t, 'contract_count': n}
+                                 for t, n in sorted(by_type.items(), key=lambda item: -item[1])],
+            'by_upload_month': [{'month': m, 'contract_count': n} for m, n in sorted(by_month.items())]
+        }
+
+    def get_contract_by_id(self, contract_id: int) -> Optional[Dict]:
+        shard_id, local_id = split_global_id(contract_id)
+        if shard_id not in self.shard_ids():
+            return None
+        row = self._shard(shard_id).get_contract_by_id(local_id)
+        return {**row, 'id': contract_id} if row else None
+
+    @profiled("shards.get_contract_by_filename")
+    def get_contract_by_filename(self, filename: str) -> Optional[Dict]:
+        rows = self._gather_rows(lambda shard: [r for r in [shard.get_contract_by_filename(filename)] if r])
+        return _newest_first(rows)[0] if rows else None
+
+    @profiled("shards.search_contracts")
+    def search_contracts(self, search_term: str) -> List[Dict]:
+        return _newest_first(self._gather_rows(lambda shard: shard.search_contracts(search_term)))
+
+    @profiled("shards.get_contracts_page")
+    def get_contracts_page(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        search_term: Optional[str] = None,
+        vendor_id: Optional[int] = None,
+        contract_type: Optional[str] = None
+    ) -> Tuple[List[Dict], int]:
+        """
+        Get one page of contracts, newest first, across all shards.
+
+        Each shard returns its first offset + limit matches; the merged
+        page is cut from those.
+        """
+        def run(shard_id, shard):
+            rows, total = shard.get_contracts_page(offset + limit, 0, search_term, vendor_id, contract_type)
+            return [{**row, 'id': to_global_id(shard_id, row['id'])} for row in rows], total
+
+        results = self._fan_out(run).values()
+        rows = _newest_first([row for shard_rows, _ in results for row in shard_rows])
+        return rows[offset:offset + limit], sum(total for _, total in results)
+
+    def get_contract_count(self) -> int:
+        return sum(self._fan_out(lambda s, shard: shard.get_contract_count()).values())
+
+    def delete_contract(self, contract_id: int) -> bool:
+        shard_id, local_id = split_global_id(contract_id)
+        if shard_id not in self.shard_ids():
+            return False
+        deleted = self._shard(shard_id).delete_contract(local_id, unindex=False)
+        if deleted:
+            from src.semantic_search import unindex_contract
+            unindex_contract(contract_id)
+        return deleted
+
+    @profiled("shards.get_changes")
+    def get_changes(self, offset: Optional[Dict[int, int]] = None,
+                    limit: Optional[int] = None) -> Tuple[List[Dict], Dict[int, int]]:
+        """
+        Get changelog entries from every shard after per-shard offsets.
+
+        Args:
+            offset: Shard ID -> last processed sequence number in that shard
+            limit: Maximum entries per shard (None for all)
+
+        Returns:
+            (changes ordered by time, new per-shard offsets); contract IDs are global
+        """
+        offset = dict(offset or {})
+
+        def run(shard_id, shard):
+            changes, last = shard.get_changes(offset.get(shard_id, 0), limit)
+            for change in changes:
+                change['shard'] = shard_id
+                change['contract_id'] = to_global_id(shard_id, change['contract_id'])
+                if change['contract']:
+                    change['contract']['id'] = change['contract_id']
+            return changes, last
+
+        changes = []
+        for shard_id, (shard_changes, last) in self._fan_out(run).items():
+            changes.extend(shard_changes)
+            offset[shard_id] = last
+        changes.sort(key=lambda c: (c['changed_at'], c['shard'], c['seq']))
+        return changes, offset
+
+    def get_consumer_offset(self, consumer: str) -> Optional[Dict[int, int]]:
+        """Per-shard offsets of a change-feed consumer (None for a new consumer)."""
+        cursor = self._catalog().get_connection().execute(
+            "SELECT consumer, last_seq FROM change_consumers WHERE consumer LIKE ?", (f"{consumer}@%",)
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            return None
+        return {int(name.rsplit("@", 1)[1]): last_seq for name, last_seq in rows
+                if name.rsplit("@", 1)[0] == consumer}
+
+    def set_consumer_offset(self, consumer: str, offset: Dict[int, int]):
+        """Commit a change-feed consumer's per-shard offsets (kept in the catalog)."""
+        conn = self._catalog().get_connection()
+        conn.executemany("""
+            INSERT INTO change_consumers (consumer, last_seq) VALUES (?, ?)
+            ON CONFLICT(consumer) DO UPDATE SET last_seq = excluded.last_seq, updated_at = CURRENT_TIMESTAMP
+        """, [(f"{consumer}@{shard_id}", last_seq) for shard_id, last_seq in offset.items()])
+        conn.commit()
+
+    def prune_changes(self) -> int:
+        """Delete changelog entries every consumer has processed, shard by shard."""
+        rows = self._catalog().get_connection().execute(
+            "SELECT consumer, last_seq FROM change_consumers WHERE consumer LIKE '%@%'"
+        ).fetchall()
+        consumers = {name.rsplit("@", 1)[0] for name, _ in rows}
+        offsets: Dict[int, Dict[str, int]] = {}
+        for name, last_seq in rows:
+            consumer, shard_id = name.rsplit("@", 1)
+            offsets.setdefault(int(shard_id), {})[consumer] = last_seq
+
+        def run(shard_id, shard):
+            shard_offsets = offsets.get(shard_id, {})
+            # A consumer that has not reached this shard yet still needs all of it
+            if not consumers or len(shard_offsets) < len(consumers):
+                return 0
+            return shard.prune_changes(up_to=min(shard_offsets.values()))
+
+        return sum(self._fan_out(run).values())
+
+    def close(self):
+        """Close every connection and the fan-out pool."""
+        self._executor.shutdown(wait=True)
+        with self._connections_lock:
+            connections, self._all_connections = self._all_connections, []
+        for db in connections:
+            try:
+                db.close()
+            except sqlite3.ProgrammingError:
+                # Connections opened by pool threads can only be closed there
+                pass
+        self._local = threading.local()
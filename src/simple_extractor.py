@@ -5,81 +5,144 @@ Bypasses ExtractThinker to avoid token limit issues
 
 import os
 import json
-from openai import OpenAI
-from dotenv import load_dotenv
-from PyPDF2 import PdfReader
+import time
+from typing import List, Optional, TYPE_CHECKING
 import logging
 
-load_dotenv()
+from src.config import load_environment
+from src.llm_client import chat_completion, get_cache_mode
+from src.pdf_text import PdfSource, describe_source, extract_text
+from src.prompts import get_template, record_usage
+from src.profiling import profiled
+
+# openai and the PDF libraries are imported on first use to keep startup fast
+if TYPE_CHECKING:
+    from openai import OpenAI
+
 logger = logging.getLogger(__name__)
 
 
-def extract_text_from_pdf(pdf_path: str) -> str:
-    """Extract text from PDF using PyPDF2"""
-    reader = PdfReader(pdf_path)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() + "\n"
-    return text
+def extract_text_from_pdf(pdf_path: PdfSource) -> str:
+    """Extract text from a PDF path or in-memory content using the configured engines (see pdf_text.py)"""
+    return extract_text(pdf_path)
 
 
-def extract_contract_simple(pdf_path: str) -> dict:
+def create_client() -> "OpenAI":
     """
-    Extract contract data using direct OpenAI API call.
+    Create an OpenAI client from the environment.
     
-    Args:
-        pdf_path: Path to contract PDF
-        
     Returns:
-        Dictionary with extracted fields
+        Configured OpenAI client
     """
-    # Get API key
+    from openai import OpenAI
+    
+    load_environment()
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise ValueError("OPENAI_API_KEY environment variable not set")
     
+    # llm_client retries 429s and transient errors itself: paced by the shared rate limiter,
+    # or backing off by the server's retry-after hint when LLM_RATE_LIMIT=off
+    return OpenAI(api_key=api_key, max_retries=0)
+
+
+@profiled("extract_contract_simple")
+def extract_contract_simple(
+    pdf_path: PdfSource,
+    client: Optional["OpenAI"] = None,
+    model_name: str = "gpt-4o-mini",
+    pdf_text: Optional[str] = None
+) -> dict:
+    """
+    Extract contract data using direct OpenAI API call.
+    
+    Args:
+        pdf_path: Path to contract PDF, or its content as bytes
+        client: Reusable OpenAI client (a new one is created if not provided,
+            except in replay mode where no network access is needed)
+        model_name: OpenAI model to use (default: gpt-4o-mini)
+        pdf_text: Already extracted text (skips re-reading the PDF)
+        
+    Returns:
+        Dictionary with extracted fields
+    """
     # Extract text from PDF
-    logger.info(f"Extracting text from: {pdf_path}")
-    pdf_text = extract_text_from_pdf(pdf_path)
-    
-    # Create OpenAI client
-    client = OpenAI(api_key=api_key)
-    
-    # Prompt for extraction
-    prompt = f"""
-Extract the following information from this contract. Return ONLY valid JSON with these exact field names:
-
-{{
-  "vendor_name": "string (required)",
-  "contract_number": "string or null",
-  "effective_date": "string (YYYY-MM-DD format) or null",
-  "expiration_date": "string (YYYY-MM-DD format) or null",
-  "total_amount": "string or null",
-  "payment_terms": "string or null",
-  "contract_type": "string or null",
-  "key_deliverables": "string or null"
-}}
-
-Contract text:
-{pdf_text}
-
-Return ONLY the JSON object, no other text.
-"""
+    if pdf_text is None:
+        logger.info(f"Extracting text from: {describe_source(pdf_path)}")
+        pdf_text = extract_text_from_pdf(pdf_path)
+    
+    return extract_contract_from_text(pdf_text, client=client, model_name=model_name)
+
+
+def extract_contract_from_text(
+    pdf_text: str,
+    client: Optional["OpenAI"] = None,
+    model_name: str = "gpt-4o-mini"
+) -> dict:
+    """
+    Extract contract data from already extracted contract text.
+    
+    Args:
+        pdf_text: Contract text
+        client: Reusable OpenAI client (see extract_contract_simple)
+        model_name: OpenAI model to use (default: gpt-4o-mini)
+        
+    Returns:
+        Dictionary with extracted fields
+    """
+    # Reuse the caller's client when given (keeps HTTP connections warm)
+    if client is None and get_cache_mode() != "replay":
+        client = create_client()
+    
+    template = get_template()
+    segments = template.segment_tokens(pdf_text, model_name)
+    
+    # Documents over the token budget are split and extracted in parallel
+    from src.chunking import extract_in_chunks, get_token_budget, split_text
+    if segments['document'] > get_token_budget():
+        logger.info(f"~{segments['document']} document tokens exceeds the budget; splitting")
+        # Each chunk call records its own usage under the template (see chunking.extract_chunk)
+        return extract_in_chunks(split_text(pdf_text), client, model_name)
     
     # Make API call with safe max_tokens
-    logger.info("Calling OpenAI API...")
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": "You are a contract data extraction assistant. Extract information accurately and return only valid JSON."},
-            {"role": "user", "content": prompt}
-        ],
+    logger.info(f"Calling OpenAI API ({template.name}, {segments['prefix']} prefix + {segments['document']} document tokens)...")
+    start = time.perf_counter()
+    response = chat_completion(
+        client,
+        model=model_name,
+        messages=template.render(pdf_text),
         max_tokens=1000,  # Safe limit
         temperature=0.1
     )
+    record_usage(template, segments, response, time.perf_counter() - start)
+    
+    return parse_extraction_result(response.content)
+
+
+def build_extraction_messages(pdf_text: str) -> List[dict]:
+    """
+    Build the chat messages for extracting contract fields.
+    
+    Args:
+        pdf_text: Contract text
+        
+    Returns:
+        System and user messages from the PROMPT_VERSION template (see prompts.py)
+    """
+    return get_template().render(pdf_text)
+
+
+def parse_extraction_result(content: str) -> dict:
+    """
+    Parse the model's JSON answer.
     
-    # Parse response
-    result_text = response.choices[0].message.content.strip()
+    Args:
+        content: Raw response text (may be wrapped in a markdown code block)
+        
+    Returns:
+        Dictionary with extracted fields
+    """
+    result_text = content.strip()
     
     # Remove markdown code blocks if present
     if result_text.startswith("```json"):
@@ -101,6 +164,8 @@ Return ONLY the JSON object, no other text.
 if __name__ == "__main__":
     import sys
     
+    logging.basicConfig(level=logging.INFO)
+    
     if len(sys.argv) < 2:
         print("Usage: python simple_extractor.py <path_to_contract.pdf>")
         sys.exit(1)
@@ -0,0 +1,330 @@
+"""
+Analytics Snapshot
+Columnar copy of the contracts table in Arrow IPC segments, read through memory maps
+
+Layout of the snapshot directory:
+    segment-000001.arrow  - Arrow IPC file with contracts in ID order
+    segment-000002.arrow  - later appends (compacted once there are too many)
+    meta.json             - segment list, row count and highest contract ID
+    snapshot.lock         - held while a process writes (app, API and batch runs share the snapshot)
+"""
+
+import os
+import json
+import threading
+import logging
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from src.changefeed import ChangeFeed
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within a process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_DIR = "data/snapshot"
+
+# Segments are merged into one file once an append would exceed this
+MAX_SEGMENTS = 16
+
+# Low-cardinality text columns stored as dictionary (categorical) arrays
+CATEGORICAL = pa.dictionary(pa.int32(), pa.string())
+
+SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('filename', pa.string()),
+    ('upload_date', pa.timestamp('s')),
+    ('vendor_id', pa.int64()),
+    ('vendor_canonical_name', CATEGORICAL),
+    ('vendor_name', CATEGORICAL),
+    ('contract_number', pa.string()),
+    ('contract_type', CATEGORICAL),
+    ('effective_date', pa.string()),
+    ('expiration_date', pa.string()),
+    ('total_amount', pa.string()),
+    ('payment_terms', CATEGORICAL),
+    ('key_deliverables', pa.string()),
+])
+
+
+def contracts_to_table(contracts: List[Dict]) -> pa.Table:
+    """
+    Convert contract rows (as returned by ContractDatabase) to a snapshot table.
+
+    Args:
+        contracts: Contract dictionaries
+
+    Returns:
+        Table with SCHEMA
+    """
+    columns = {}
+    for field in SCHEMA:
+        values = [contract.get(field.name) for contract in contracts]
+        if field.name == 'upload_date':
+            array = pc.strptime(pa.array(values, pa.string()), format='%Y-%m-%d %H:%M:%S', unit='s', error_is_null=True)
+        elif pa.types.is_dictionary(field.type):
+            array = pa.array(values, pa.string()).dictionary_encode()
+        else:
+            array = pa.array(values, field.type)
+        columns[field.name] = array
+    return pa.table(columns, schema=SCHEMA)
+
+
+class ContractSnapshot:
+    """
+    Append-only columnar snapshot of the contracts table.
+
+    New contracts are appended as small Arrow IPC segments, so keeping
+    the snapshot current costs one indexed query for rows above the last
+    seen ID. Loading memory-maps every segment: column buffers are read
+    straight from the page cache without copying or row conversion.
+    """
+
+    def __init__(self, snapshot_dir: str = DEFAULT_SNAPSHOT_DIR):
+        """
+        Open (or create) a snapshot.
+
+        Args:
+            snapshot_dir: Directory holding the segment files
+        """
+        self.snapshot_dir = snapshot_dir
+        os.makedirs(snapshot_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._table = None
+        self._meta_mtime = None
+        self._load_meta()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.snapshot_dir, name)
+
+    def _load_meta(self):
+        meta_path = self._path("meta.json")
+        if os.path.exists(meta_path):
+            self._meta_mtime = os.path.getmtime(meta_path)
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        else:
+            meta = {'segments': [], 'rows': 0, 'max_id': 0, 'next_segment': 1}
+        self.segments = meta['segments']
+        self.rows = meta['rows']
+        self.max_id = meta['max_id']
+        self.next_segment = meta['next_segment']
+        self._table = None
+
+    def _write_meta(self):
+        meta_path = self._path("meta.json")
+        temp_path = meta_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'segments': self.segments,
+                'rows': self.rows,
+                'max_id': self.max_id,
+                'next_segment': self.next_segment
+            }, f)
+        os.replace(temp_path, meta_path)
+        self._meta_mtime = os.path.getmtime(meta_path)
+
+    def _reload_if_changed(self, force: bool = False):
+        """Pick up segments written by another process (e.g. batch_process.py)."""
+        meta_path = self._path("meta.json")
+        if os.path.exists(meta_path) and (force or os.path.getmtime(meta_path) != self._meta_mtime):
+            self._load_meta()
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock on the snapshot directory, shared by every process that writes to it."""
+        with open(self._path("snapshot.lock"), 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _writing(self):
+        """Hold the snapshot for writing, against other threads and other processes."""
+        with self._lock, self._file_lock():
+            # Segment names and max_id must come from the latest meta, so always re-read under the lock
+            self._reload_if_changed(force=True)
+            yield
+
+    def _write_segment(self, table: pa.Table) -> str:
+        name = f"segment-{self.next_segment:06d}.arrow"
+        self.next_segment += 1
+        with pa.OSFile(self._path(name), 'wb') as sink:
+            with pa.ipc.new_file(sink, SCHEMA) as writer:
+                writer.write_table(table)
+        return name
+
+    def _remove_segments(self, names: List[str]):
+        for name in names:
+            path = self._path(name)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def append(self, contracts: List[Dict]) -> int:
+        """
+        Append contracts newer than the snapshot.
+
+        Args:
+            contracts: Contract dictionaries in ID order
+
+        Returns:
+            Number of rows appended
+        """
+        with self._writing():
+            contracts = [c for c in contracts if c['id'] > self.max_id]
+            if not contracts:
+                return 0
+
+            table = contracts_to_table(contracts)
+            if len(self.segments) >= MAX_SEGMENTS:
+                old_segments = self.segments
+                merged = pa.concat_tables([self.load(), table]).unify_dictionaries().combine_chunks()
+                self.segments = [self._write_segment(merged)]
+            else:
+                old_segments = []
+                self.segments.append(self._write_segment(table))
+            self.rows += len(contracts)
+            self.max_id = contracts[-1]['id']
+            self._write_meta()
+            self._table = None
+            self._remove_segments(old_segments)
+        return len(contracts)
+
+    def rebuild(self, db) -> int:
+        """
+        Replace the snapshot with every contract in a ContractDatabase.
+
+        Returns:
+            Number of rows in the new snapshot
+        """
+        with self._writing():
+            contracts = db.get_contracts_since(0)
+            old_segments = self.segments
+            self.segments = [self._write_segment(contracts_to_table(contracts))]
+            self.rows = len(contracts)
+            self.max_id = contracts[-1]['id'] if contracts else 0
+            self._write_meta()
+            self._table = None
+            self._remove_segments(old_segments)
+        logger.info(f"Rebuilt analytics snapshot with {self.rows} contracts")
+        return self.rows
+
+    def sync(self, db) -> int:
+        """
+        Bring the snapshot up to date with a ContractDatabase.
+
+        Inserts are appended incrementally. If the change feed shows
+        updates or deletes, or the row counts disagree afterwards, the
+        snapshot is rebuilt.
+
+        Returns:
+            Number of rows appended or rebuilt (0 if already current)
+        """
+        self._reload_if_changed()
+        feed = ChangeFeed(db, f"snapshot:{os.path.abspath(self.snapshot_dir)}")
+        changed = any(change['op'] != 'insert' for change in feed.read_all())
+        if changed:
+            synced = self.rebuild(db)
+        else:
+            synced = self.append(db.get_contracts_since(self.max_id))
+            if self.rows != db.get_contract_count():
+                synced = self.rebuild(db)
+        feed.commit()
+        return synced
+
+    def load(self) -> pa.Table:
+        """
+        Memory-map the snapshot as one table (one chunk per segment).
+
+        Returns:
+            Table with SCHEMA (empty if nothing has been appended)
+        """
+        self._reload_if_changed()
+        if self._table is None:
+            tables = []
+            for name in self.segments:
+                source = pa.memory_map(self._path(name), 'r')
+                tables.append(pa.ipc.open_file(source).read_all())
+            self._table = pa.concat_tables(tables) if tables else SCHEMA.empty_table()
+        return self._table
+
+    def to_dataframe(self):
+        """
+        Load the snapshot as a pandas DataFrame.
+
+        Dictionary columns become pandas categoricals; numeric columns
+        are converted without per-row Python objects.
+        """
+        df = self.load().unify_dictionaries().to_pandas()
+        # Sort categories so ordering by a categorical column is alphabetical
+        for field in SCHEMA:
+            if pa.types.is_dictionary(field.type):
+                df[field.name] = df[field.name].cat.set_categories(sorted(df[field.name].cat.categories))
+        return df
+
+
+_snapshots: Dict[str, ContractSnapshot] = {}
+_snapshots_lock = threading.Lock()
+
+
+def get_snapshot(snapshot_dir: Optional[str] = None) -> ContractSnapshot:
+    """Get the shared snapshot for a directory (defaults to SNAPSHOT_DIR)."""
+    snapshot_dir = snapshot_dir or os.getenv("SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR)
+    with _snapshots_lock:
+        if snapshot_dir not in _snapshots:
+            _snapshots[snapshot_dir] = ContractSnapshot(snapshot_dir)
+        return _snapshots[snapshot_dir]
+
+
+def load_contracts_dataframe(db, snapshot_dir: Optional[str] = None):
+    """
+    Get all contracts as a DataFrame via the snapshot, syncing it first.
+
+    Args:
+        db: ContractDatabase
+        snapshot_dir: Snapshot directory (defaults to SNAPSHOT_DIR)
+
+    Returns:
+        pandas DataFrame, newest uploads first
+    """
+    snapshot = get_snapshot(snapshot_dir)
+    snapshot.sync(db)
+    return snapshot.to_dataframe().sort_values(['upload_date', 'id'], ascending=False)
+
+
+def export_parquet(table: pa.Table, path: str):
+    """Write a snapshot table (or a filtered slice of one) to Parquet."""
+    import pyarrow.parquet as pq
+    pq.write_table(table.unify_dictionaries(), path, compression='zstd')
+
+
+if __name__ == "__main__":
+    import sys
+    from src.database import open_contract_database
+
+    logging.basicConfig(level=logging.INFO)
+
+    db = open_contract_database()
+    snapshot = get_snapshot()
+
+    if len(sys.argv) > 1 and sys.argv[1] == "--rebuild":
+        snapshot.rebuild(db)
+    else:
+        snapshot.sync(db)
+
+    if len(sys.argv) > 2 and sys.argv[1] == "--parquet":
+        export_parquet(snapshot.load(), sys.argv[2])
+        print(f"Wrote {sys.argv[2]}")
+
+    print(f"Snapshot: {snapshot.rows} contracts in {len(snapshot.segments)} segment(s)")
+    db.close()
@@ -0,0 +1,174 @@
+"""
+Vendor Entity Resolution
+Normalizes extracted vendor names and maps them to canonical vendor IDs
+"""
+
+import re
+from collections import defaultdict
+from typing import Dict, Optional, Set, Tuple
+
+# Corporate forms that never distinguish two vendors
+LEGAL_SUFFIXES = {
+    'inc', 'incorporated', 'llc', 'ltd', 'limited', 'corp', 'corporation',
+    'co', 'company', 'gmbh', 'ag', 'plc', 'llp', 'lp', 'sa', 'bv'
+}
+
+# Articles that never distinguish two vendors
+STOP_WORDS = {'the'}
+
+# Descriptors often dropped when a vendor is mentioned informally ("TechCorp"),
+# but which do tell vendors apart ("Acme Services" vs "Acme Technologies")
+GENERIC_WORDS = {'solutions', 'services', 'systems', 'technologies', 'technology', 'group', 'holdings'}
+
+# Minimum trigram Jaccard similarity to treat two names as one vendor
+DEFAULT_THRESHOLD = 0.75
+
+# Candidates scored per lookup after blocking
+MAX_CANDIDATES = 20
+
+
+def normalize_vendor_name(name: Optional[str]) -> str:
+    """
+    Normalize a vendor name: lowercase, no punctuation, no legal suffixes.
+
+    Args:
+        name: Raw vendor name
+
+    Returns:
+        Normalized name ('' if nothing is left)
+    """
+    if not name:
+        return ''
+    text = re.sub(r'[^\w\s]', ' ', str(name).lower())
+    tokens = [t for t in text.split() if t not in LEGAL_SUFFIXES]
+    return ' '.join(tokens)
+
+
+def vendor_match_key(name: Optional[str]) -> str:
+    """
+    Get the key a vendor name is matched on: normalized, without articles.
+
+    Descriptors are kept, so "Acme Services" and "Acme Technologies"
+    stay apart; see descriptor_core for how "TechCorp Solutions Inc."
+    still matches a bare "TECHCORP".
+    """
+    normalized = normalize_vendor_name(name)
+    tokens = [t for t in normalized.split() if t not in STOP_WORDS]
+    return ' '.join(tokens) if tokens else normalized
+
+
+def descriptor_core(match_key: str) -> str:
+    """
+    A match key without generic descriptors ('' if it has none to drop, or nothing else).
+
+    "techcorp solutions" -> "techcorp"; "techcorp" -> ''; "group" -> ''
+    """
+    tokens = match_key.split()
+    core = [t for t in tokens if t not in GENERIC_WORDS]
+    return ' '.join(core) if core and len(core) < len(tokens) else ''
+
+
+def trigrams(key: str) -> Set[str]:
+    """Character trigrams of a match key (padded so short names still block)."""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def trigram_similarity(a: Set[str], b: Set[str]) -> float:
+    """Jaccard similarity of two trigram sets."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class VendorIndex:
+    """
+    In-memory similarity index over canonical vendors.
+
+    Trigrams block candidates through an inverted index so a lookup only
+    scores vendors sharing enough trigrams with the query, instead of
+    comparing against every known vendor.
+
+    Descriptors only fall away when one side has none: "TechCorp
+    Solutions" matches a known "TechCorp" (and vice versa, if only one
+    TechCorp with a descriptor is known), but never "TechCorp Systems".
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        """
+        Initialize an empty index.
+
+        Args:
+            threshold: Minimum similarity for a match
+        """
+        self.threshold = threshold
+        self.keys: Dict[str, int] = {}
+        self.cores: Dict[str, Set[int]] = defaultdict(set)
+        self.grams: Dict[int, Set[str]] = {}
+        self.postings: Dict[str, Set[int]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self.grams)
+
+    def add(self, vendor_id: int, match_key: str):
+        """
+        Add a canonical vendor.
+
+        Args:
+            vendor_id: Vendor ID from the vendors table
+            match_key: Key from vendor_match_key()
+        """
+        grams = trigrams(match_key)
+        self.keys.setdefault(match_key, vendor_id)
+        core = descriptor_core(match_key)
+        if core:
+            self.cores[core].add(vendor_id)
+        self.grams[vendor_id] = grams
+        for gram in grams:
+            self.postings[gram].add(vendor_id)
+
+    def lookup(self, match_key: str) -> Optional[Tuple[int, float]]:
+        """
+        Find the best matching vendor for a key.
+
+        Args:
+            match_key: Key from vendor_match_key()
+
+        Returns:
+            (vendor_id, similarity) or None if nothing passes the threshold
+        """
+        if not match_key:
+            return None
+
+        if match_key in self.keys:
+            return self.keys[match_key], 1.0
+
+        # Same name with descriptors on one side only
+        core = descriptor_core(match_key)
+        if core and core in self.keys:
+            return self.keys[core], 1.0
+        if not core and len(self.cores.get(match_key, ())) == 1:
+            return next(iter(self.cores[match_key])), 1.0
+
+        query = trigrams(match_key)
+
+        # Blocking: count shared trigrams per vendor via the postings lists
+        shared = defaultdict(int)
+        for gram in query:
+            for vendor_id in self.postings.get(gram, ()):
+                shared[vendor_id] += 1
+
+        # A vendor can only reach the threshold if it shares this many trigrams
+        min_shared = self.threshold * len(query)
+        candidates = sorted(
+            (vid for vid, count in shared.items() if count >= min_shared),
+            key=lambda vid: shared[vid],
+            reverse=True
+        )[:MAX_CANDIDATES]
+
+        best = None
+        for vendor_id in candidates:
+            score = trigram_similarity(query, self.grams[vendor_id])
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (vendor_id, score)
+        return best
@@ -74,7 +74,7 @@ def test_environment():
 def extract_sample(pdf_path):
     """Extract from a sample contract"""
     from src.simple_extractor import extract_contract_simple as extract_contract
-    from src.database import ContractDatabase
+    from src.database import open_contract_database
     
     print()
     print("-" * 60)
@@ -103,7 +103,7 @@ def extract_sample(pdf_path):
         
         # Save to database
         print("Step 2: Saving to database...")
-        db = ContractDatabase()
+        db = open_contract_database()
         filename = os.path.basename(pdf_path)
         contract_id = db.insert_contract(filename, data)
         print(f"Saved with ID: {contract_id}")
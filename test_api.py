@@ -0,0 +1,89 @@
+"""
+Test HTTP API
+"""
+
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.datastructures import UploadFile
+
+import api
+
+DATA = {
+    'vendor_name': 'Acme Corp', 'contract_number': 'SA-1', 'effective_date': '2024-01-01',
+    'expiration_date': '2025-01-01', 'total_amount': '$50,000', 'payment_terms': 'Net 30',
+    'contract_type': 'Service Agreement', 'key_deliverables': 'Cloud migration and hosting'
+}
+
+
+def fake_extraction(job, report, db_path=None):
+    report(0.5, "Extracting fields")
+    return {'data': DATA, 'signature': None, 'duplicates': [], 'errors': [], 'warnings': [], 'repaired': []}
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv("JOBS_DB_PATH", str(tmp_path / "jobs.db"))
+    monkeypatch.setenv("SEMANTIC_INDEX_DIR", str(tmp_path / "index"))
+    monkeypatch.setattr(api, 'DB_PATH', str(tmp_path / "contracts.db"))
+    monkeypatch.setattr(api, '_local', threading.local())
+    monkeypatch.setattr(api, 'process_contract_job', fake_extraction)
+    with TestClient(api.app) as client:
+        yield client
+
+
+def wait_until_done(client, job_id):
+    for _ in range(200):
+        job = client.get(f"/jobs/{job_id}").json()
+        if job['status'] not in ('queued', 'running'):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def test_submit_poll_save_and_query(client):
+    response = client.post("/jobs", files=[("files", ("a.pdf", b"%PDF-1.4 a", "application/pdf"))],
+                           data={'client_id': "client-a"})
+    assert response.status_code == 202
+    job_id = response.json()['jobs'][0]['id']
+
+    job = wait_until_done(client, job_id)
+    assert job['status'] == 'done' and job['result']['data'] == DATA
+    assert [j['id'] for j in client.get("/jobs", params={'client_id': "client-a"}).json()] == [job_id]
+
+    saved = client.post(f"/jobs/{job_id}/save")
+    assert saved.status_code == 201
+    contract_id = saved.json()['contract_id']
+    assert client.post(f"/jobs/{job_id}/save").status_code == 409
+
+    page = client.get("/contracts", params={'q': "Acme"}).json()
+    assert page['total'] == 1 and page['contracts'][0]['id'] == contract_id
+    assert client.get(f"/contracts/{contract_id}").json()['contract_number'] == 'SA-1'
+    assert client.get("/contracts/999").status_code == 404
+    assert [c['id'] for c in client.get("/contracts/search", params={'q': "cloud hosting"}).json()] == [contract_id]
+    assert client.get("/health").json() == {'status': 'ok', 'pending_jobs': 0}
+
+
+def test_rejects_non_pdfs_and_oversized_uploads(client, monkeypatch):
+    response = client.post("/jobs", files=[("files", ("notes.txt", b"hello", "text/plain"))])
+    assert response.status_code == 400
+
+    monkeypatch.setattr(api, 'MAX_UPLOAD_BYTES', 1000)
+    monkeypatch.setattr(api, 'UPLOAD_CHUNK_BYTES', 256)
+    reads = []
+    read = UploadFile.read
+
+    async def counting_read(self, size=-1):
+        chunk = await read(self, size)
+        reads.append(len(chunk))
+        return chunk
+
+    monkeypatch.setattr(UploadFile, 'read', counting_read)
+    response = client.post("/jobs", files=[("files", ("big.pdf", b"%PDF" + b"x" * 100_000, "application/pdf"))])
+    assert response.status_code == 413
+    # Reading stopped just past the limit instead of loading the whole file
+    assert sum(reads) == 1001
+
+    assert client.post("/jobs", files=[("files", ("ok.pdf", b"%PDF" + b"x" * 996, "application/pdf"))]).status_code == 202
@@ -0,0 +1,54 @@
+"""
+Test Artifact Store
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+
+from src import artifacts, llm_client
+from src.artifacts import ArtifactStore
+
+
+def test_blobs_are_compressed_and_deduplicated(tmp_path):
+    store = ArtifactStore(str(tmp_path / "artifacts.db"))
+    pages = ["Master Services Agreement between Acme Corp and Client Co. " * 50, "Fees: $50,000 Net 30."]
+    responses = [{'content': '{"vendor_name": "Acme Corp"}', 'model': 'gpt-4o-mini', 'usage': {}}]
+
+    store.save_document("doc-a", "a.pdf", pages, responses)
+    store.save_document("doc-b", "a-copy.pdf", pages)
+
+    assert store.get_pages(filename="a-copy.pdf") == pages
+    assert store.get_document("doc-a")['responses'] == responses
+    # Re-saving without responses keeps the ones already stored
+    store.save_document("doc-a", "a.pdf", pages)
+    assert store.get_document("doc-a")['responses'] == responses
+
+    stats = store.stats()
+    assert stats['blobs'] == 2
+    assert stats['deduplicated'] == 1
+    assert stats['stored_bytes'] < stats['raw_bytes']
+    assert artifacts.measure_reads(store)['documents'] == 2
+    store.close()
+
+
+def test_pages_parsed_once_and_responses_captured(tmp_path, monkeypatch):
+    monkeypatch.setenv("ARTIFACT_STORE_PATH", str(tmp_path / "artifacts.db"))
+    parsed = []
+    monkeypatch.setattr(artifacts, 'extract_text_pages', lambda source: parsed.append(source) or ["Page one", "Page two"])
+    pdf = tmp_path / "contract.pdf"
+    pdf.write_bytes(b"%PDF-1.4 fake")
+
+    assert artifacts.load_text_pages(str(pdf)) == ["Page one", "Page two"]
+    assert artifacts.load_text_pages(pdf.read_bytes()) == ["Page one", "Page two"]
+    assert len(parsed) == 1
+    assert artifacts.get_artifact_store().get_pages(filename="contract.pdf") == ["Page one", "Page two"]
+
+    monkeypatch.setattr(llm_client, '_create', lambda client, request, deadline: llm_client.ChatResponse(
+        request['messages'][0]['content'], request['model']))
+    call = lambda text: llm_client.chat_completion(object(), "gpt-4o-mini", [{'role': 'user', 'content': text}])
+    with llm_client.capture_responses() as responses:
+        call("first")
+        with ThreadPoolExecutor(2) as executor:
+            executor.submit(contextvars.copy_context().run, call, "in a worker").result()
+    call("outside")
+    assert [r['content'] for r in responses] == ["first", "in a worker"]
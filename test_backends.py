@@ -0,0 +1,92 @@
+"""
+Test Extraction Backends
+"""
+
+import threading
+
+import pytest
+
+from src import backends
+
+
+class EchoBackend(backends.ExtractionBackend):
+    name = "echo"
+    instances = 0
+
+    def __init__(self, model_name=None):
+        super().__init__(model_name)
+        EchoBackend.instances += 1
+
+    def extract(self, pdf_path, pdf_text=None):
+        return {'source': pdf_path, 'text': pdf_text, 'model': self.model_name}
+
+
+class BrokenBackend(backends.ExtractionBackend):
+    name = "broken"
+
+    def __init__(self, model_name=None):
+        raise RuntimeError("no credentials")
+
+    def extract(self, pdf_path, pdf_text=None):
+        return {}
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(backends, '_REGISTRY', dict(backends._REGISTRY))
+    monkeypatch.setattr(backends, '_pools', {})
+    EchoBackend.instances = 0
+    backends.register_backend(EchoBackend)
+    backends.register_backend(BrokenBackend)
+
+
+def test_registry_resolves_names(registry, monkeypatch):
+    assert {"simple", "extractthinker", "cascade", "echo"} <= set(backends.available_backends())
+    assert backends.get_backend_name("echo") == "echo"
+    monkeypatch.setenv("EXTRACTION_BACKEND", "echo")
+    assert backends.get_backend_name() == "echo"
+    with pytest.raises(ValueError, match="Unknown extraction backend 'missing'"):
+        backends.get_backend_name("missing")
+
+
+def test_backends_must_implement_extract():
+    class Incomplete(backends.ExtractionBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_pool_reuses_warm_instances_up_to_its_size(registry):
+    pool = backends.BackendPool("echo", max_size=2, model_name="test-model")
+    pool.warm(1)
+    assert pool.size() == 1
+
+    with pool.acquire() as first, pool.acquire() as second:
+        assert first is not second and pool.size() == 2
+        # A third caller waits for an instance instead of creating one
+        borrowed = []
+        waiter = threading.Thread(target=lambda: borrowed.append(pool.acquire().__enter__()))
+        waiter.start()
+        waiter.join(0.1)
+        assert waiter.is_alive()
+    waiter.join(1)
+
+    assert borrowed[0] in (first, second)
+    assert pool.size() == EchoBackend.instances == 2
+    assert borrowed[0].extract("contract.pdf")['model'] == "test-model"
+
+
+def test_failed_setup_frees_its_slot(registry):
+    pool = backends.BackendPool("broken", max_size=1)
+    for _ in range(2):
+        with pytest.raises(RuntimeError, match="no credentials"):
+            with pool.acquire():
+                pass
+    assert pool.size() == 0
+
+
+def test_extract_with_backend_passes_text_through(registry):
+    data = backends.extract_with_backend(b"%PDF", backend="echo", pdf_text="Agreement text")
+    assert data['source'] == b"%PDF" and data['text'] == "Agreement text"
+    assert backends.get_pool("echo") is backends.get_pool("echo")
@@ -0,0 +1,114 @@
+"""
+Test Re-extraction Campaigns
+"""
+
+import pytest
+
+from src.artifacts import get_artifact_store
+from src.campaigns import ReextractionCampaign
+from src.changefeed import ChangeFeed
+from src.database import ContractDatabase
+from src.semantic_search import get_index
+
+
+def test_campaign_resumes_diffs_and_promotes(tmp_path, monkeypatch):
+    monkeypatch.setenv("ARTIFACT_STORE_PATH", str(tmp_path / "artifacts.db"))
+    monkeypatch.setenv("SEMANTIC_INDEX_DIR", str(tmp_path / "index"))
+    db_path = str(tmp_path / "contracts.db")
+    db = ContractDatabase(db_path)
+    for i in range(5):
+        db.insert_contract(f"{i}.pdf", {'vendor_name': 'Acme Corp', 'total_amount': '$1,000',
+                                        'effective_date': '2024-01-01'})
+        get_artifact_store().save_document(f"doc-{i}", f"{i}.pdf", pages=[f"Contract {i}"])
+    db.insert_contract("missing.pdf", {'vendor_name': 'Acme Corp'})
+    feed = ChangeFeed(db, "test")
+    feed.read_all()
+    feed.commit()
+
+    calls = []
+
+    def extract(filename, pages):
+        calls.append(filename)
+        # Same amount written differently is not a change; the vendor on 0.pdf is
+        vendor = 'Globex Inc' if filename == '0.pdf' else 'Acme Corp'
+        return {'vendor_name': vendor, 'total_amount': '1000.00', 'effective_date': '2024-01-01'}
+
+    campaign = ReextractionCampaign("v2", db_path, backend="simple", workers=2, pdf_folder=None, extract_fn=extract)
+    assert campaign.run(limit=3, batch_size=2)['ok'] == 3
+    campaign.close()
+
+    # Resuming skips the contracts already recorded
+    campaign = ReextractionCampaign("v2", db_path, backend="simple", workers=2, pdf_folder=None, extract_fn=extract)
+    counts = campaign.run(batch_size=2)
+    assert (counts['ok'], counts['no_text'], counts['changed']) == (2, 1, 0)
+    assert sorted(calls) == [f"{i}.pdf" for i in range(5)]
+
+    report = campaign.diff()
+    assert report['statuses'] == {'ok': 5, 'no_text': 1}
+    assert report['changed_contracts'] == 1
+    assert report['fields']['vendor_name']['changed'] == 1
+    assert report['fields']['total_amount']['changed'] == 0
+
+    assert campaign.promote() == 1
+    assert campaign.store.get_campaign("v2")['status'] == "promoted"
+    promoted = db.get_contract_by_filename("0.pdf")
+    assert promoted['vendor_name'] == 'Globex Inc'
+    assert promoted['vendor_id'] != db.get_contract_by_filename("1.pdf")['vendor_id']
+    assert [c['op'] for c in ChangeFeed(db, "test").read_all()] == ['update']
+    assert [contract_id for contract_id, _ in get_index().search("Globex")] == [promoted['id']]
+    campaign.close()
+    db.close()
+
+
+def test_backends_that_read_the_pdf_need_the_file(tmp_path, monkeypatch):
+    monkeypatch.setenv("ARTIFACT_STORE_PATH", str(tmp_path / "artifacts.db"))
+    db_path = str(tmp_path / "contracts.db")
+    db = ContractDatabase(db_path)
+    db.insert_contract("0.pdf", {'vendor_name': 'Acme Corp'})
+    get_artifact_store().save_document("doc-0", "0.pdf", pages=["Contract 0"])
+    db.close()
+
+    campaign = ReextractionCampaign("et", db_path, backend="extractthinker", pdf_folder=str(tmp_path))
+    assert campaign.run()['failed'] == 1
+    record = campaign.store.get_connection().execute("SELECT error FROM extraction_versions").fetchone()
+    assert "reads the PDF itself" in record['error']
+    campaign.close()
+
+
+def test_resume_retries_failures_with_the_campaign_prompt(tmp_path, monkeypatch):
+    monkeypatch.setenv("ARTIFACT_STORE_PATH", str(tmp_path / "artifacts.db"))
+    monkeypatch.setenv("PROMPT_VERSION", "extraction-v2")
+    db_path = str(tmp_path / "contracts.db")
+    db = ContractDatabase(db_path)
+    for i in range(3):
+        db.insert_contract(f"{i}.pdf", {'vendor_name': 'Acme Corp'})
+        get_artifact_store().save_document(f"doc-{i}", f"{i}.pdf", pages=[f"Contract {i}"])
+
+    flaky = {'1.pdf'}
+
+    def extract(filename, pages):
+        if filename in flaky:
+            raise TimeoutError("429 Too Many Requests")
+        return {'vendor_name': 'Acme Corp'}
+
+    campaign = ReextractionCampaign("v2", db_path, backend="simple", pdf_folder=None, extract_fn=extract)
+    # The failure is recorded once, not retried again within the same run
+    counts = campaign.run()
+    assert (counts['ok'], counts['failed']) == (2, 1)
+    campaign.store.get_connection().execute("UPDATE extraction_versions SET created_at = '2000-01-01 00:00:00'")
+    campaign.store.get_connection().commit()
+
+    monkeypatch.setenv("PROMPT_VERSION", "extraction-v1")
+    with pytest.raises(ValueError, match="PROMPT_VERSION=extraction-v2"):
+        campaign.run()
+
+    monkeypatch.setenv("PROMPT_VERSION", "extraction-v2")
+    flaky.clear()
+    assert campaign.run()['ok'] == 1
+    assert campaign.diff()['statuses'] == {'ok': 3}
+    campaign.close()
+
+    monkeypatch.setenv("CONTRACT_SHARD_BY", "tenant")
+    with pytest.raises(RuntimeError, match="CONTRACT_SHARD_BY"):
+        ReextractionCampaign("v2", db_path, backend="simple", pdf_folder=None, extract_fn=extract)
+    db.close()
@@ -0,0 +1,103 @@
+"""
+Test Extraction Cascade
+"""
+
+import json
+
+import pytest
+
+from src import cascade
+from src.llm_client import ChatResponse
+
+TEXT = "Service Agreement No. SA-1 with Acme Corp. Effective 2024-01-01. Fee: $50,000, Net 30."
+
+GOOD = {
+    'vendor_name': 'Acme Corp', 'contract_number': 'SA-1', 'effective_date': '2024-01-01',
+    'expiration_date': None, 'total_amount': '$50,000', 'payment_terms': 'Net 30',
+    'contract_type': 'Service Agreement', 'key_deliverables': None
+}
+
+
+def fake_completion(answers, calls):
+    def complete(client, model, messages, **params):
+        calls.append((model, len(messages)))
+        data = answers[len(calls) - 1]
+        return ChatResponse(json.dumps(data), model, {'prompt_tokens': 1000, 'completion_tokens': 100})
+    return complete
+
+
+def test_stops_at_first_clean_answer(monkeypatch):
+    calls = []
+    monkeypatch.setattr(cascade, 'chat_completion', fake_completion([GOOD], calls))
+
+    result = cascade.ExtractionCascade(["gpt-4o-mini", "reprompt", "gpt-4o"], client=object()).extract(TEXT)
+
+    assert result.data == GOOD
+    assert not result.escalated
+    assert calls == [("gpt-4o-mini", 2)]
+    assert round(result.cost, 6) == 0.00021
+
+
+def test_escalates_on_errors_and_missing_fields(monkeypatch):
+    no_vendor = dict(GOOD, vendor_name=None)
+    no_number = dict(GOOD, contract_number=None)
+    calls = []
+    monkeypatch.setattr(cascade, 'chat_completion', fake_completion([no_vendor, no_number, GOOD], calls))
+
+    result = cascade.ExtractionCascade(["gpt-4o-mini", "reprompt", "gpt-4o"], client=object()).extract(TEXT)
+
+    # The re-prompt carries the previous answer and its problems
+    assert calls == [("gpt-4o-mini", 2), ("gpt-4o-mini", 4), ("gpt-4o", 2)]
+    assert result.data == GOOD
+    assert result.issues == []
+
+    # Without low-confidence escalation the re-prompted answer is accepted
+    calls.clear()
+    monkeypatch.setattr(cascade, 'chat_completion', fake_completion([no_vendor, no_number, GOOD], calls))
+    result = cascade.ExtractionCascade(
+        ["gpt-4o-mini", "reprompt", "gpt-4o"], escalate_on=["errors"], client=object()
+    ).extract(TEXT)
+    assert result.data == no_number
+    assert len(calls) == 2
+
+
+def test_failed_step_escalates_and_all_failing_raises(monkeypatch):
+    calls = []
+
+    def complete(client, model, messages, **params):
+        calls.append(model)
+        if model == "gpt-4o-mini":
+            raise TimeoutError("deadline exceeded")
+        return ChatResponse(json.dumps(GOOD), model, {'prompt_tokens': 1000, 'completion_tokens': 100})
+
+    monkeypatch.setattr(cascade, 'chat_completion', complete)
+    result = cascade.ExtractionCascade(["gpt-4o-mini", "reprompt", "gpt-4o"], client=object()).extract(TEXT)
+
+    # The re-prompt has no answer to correct, so it is skipped
+    assert calls == ["gpt-4o-mini", "gpt-4o"]
+    assert result.data == GOOD
+    assert [(a['step'], a['data'] is None) for a in result.attempts] == [("gpt-4o-mini", True), ("gpt-4o", False)]
+
+    with pytest.raises(TimeoutError):
+        cascade.ExtractionCascade(["gpt-4o-mini"], client=object()).extract(TEXT)
+
+
+def test_repair_step_asks_only_for_flagged_fields(monkeypatch):
+    from src import repair
+
+    monkeypatch.setenv("REPAIR_MODEL", "gpt-4o-mini")
+    calls = []
+    monkeypatch.setattr(cascade, 'chat_completion', fake_completion([dict(GOOD, contract_number=None)], calls))
+    requests = []
+
+    def complete_repair(client, model, messages, **params):
+        requests.append(messages[-1]['content'])
+        return ChatResponse(json.dumps({'contract_number': 'SA-1'}), model, {'prompt_tokens': 200})
+
+    monkeypatch.setattr(repair, 'chat_completion', complete_repair)
+    result = cascade.ExtractionCascade(["gpt-4o-mini", "repair", "gpt-4o"], client=object()).extract(TEXT)
+
+    assert result.data == GOOD
+    assert [a['step'] for a in result.attempts] == ["gpt-4o-mini", "repair"]
+    assert result.attempts[1]['model'] == "gpt-4o-mini"
+    assert len(requests) == 1 and "contract_number" in requests[0] and "Acme Corp" in requests[0]
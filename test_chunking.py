@@ -0,0 +1,84 @@
+"""
+Test Adaptive Chunking
+"""
+
+import json
+import threading
+import time
+
+from src import chunking
+from src.llm_client import ChatResponse
+
+
+def test_pages_are_grouped_within_budget(monkeypatch):
+    # Boundaries below assume the 4-characters-per-token estimate, whether or not tiktoken is installed
+    monkeypatch.setattr(chunking, 'count_tokens', lambda text, model="gpt-4o-mini": len(text) // 4)
+    pages = ["a" * 400, "b" * 400, "c" * 400, "d" * 2000]   # 100, 100, 100 and 500 estimated tokens
+
+    chunks = chunking.plan_chunks(pages, budget=250)
+
+    assert [(c.first_page, c.last_page) for c in chunks] == [(0, 1), (2, 2), (3, 3), (3, 3), (3, 3), (3, 3)]
+    assert all(c.tokens <= 250 for c in chunks)
+    assert len(chunking.plan_chunks(pages, budget=10_000)) == 1
+
+
+def test_merge_resolves_conflicts_per_field():
+    merged, conflicts = chunking.merge_results([
+        {'vendor_name': 'Acme Corp', 'effective_date': 'January 1, 2024', 'total_amount': '$5,000',
+         'key_deliverables': 'Reports'},
+        None,
+        {'vendor_name': 'Client Co', 'effective_date': '2024-01-01', 'total_amount': '$50,000',
+         'key_deliverables': 'Support'},
+        {'vendor_name': 'acme  corp', 'effective_date': None, 'total_amount': 'NULL'},
+    ])
+
+    assert merged['vendor_name'] == 'Acme Corp'
+    assert merged['effective_date'] == '2024-01-01'
+    assert merged['total_amount'] == '$50,000'
+    assert merged['key_deliverables'] == 'Reports; Support'
+    assert merged['contract_number'] is None
+    assert conflicts == ['vendor_name', 'total_amount']
+
+
+def test_chunks_run_in_parallel_and_are_capped(monkeypatch):
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def complete(client, model, messages, **params):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return ChatResponse(json.dumps({'vendor_name': 'Acme Corp'}), model, {})
+
+    monkeypatch.setattr(chunking, 'chat_completion', complete)
+    pages = [f"Page {i} " + "x" * 4000 for i in range(40)]
+
+    data = chunking.extract_in_chunks(pages, client=object(), budget=1500, max_chunks=6, workers=3)
+
+    assert data['vendor_name'] == 'Acme Corp'
+    assert peak[0] == 3
+
+
+def test_chunked_extraction_records_usage_per_call(monkeypatch):
+    from src.prompts import get_template, usage_stats
+    from src.simple_extractor import extract_contract_from_text
+
+    def complete(client, model, messages, **params):
+        return ChatResponse(json.dumps({'vendor_name': 'Acme Corp'}), model, {'prompt_tokens': 100})
+
+    monkeypatch.setattr(chunking, 'chat_completion', complete)
+    monkeypatch.setenv("EXTRACTION_TOKEN_BUDGET", "500")
+    name = get_template().name
+    before = usage_stats().get(name, {'calls': 0, 'prompt_tokens': 0})
+    text = "\n\n".join(f"Section {i}. " + "x" * 2500 for i in range(6))
+
+    data = extract_contract_from_text(text, client=object())
+
+    after = usage_stats()[name]
+    calls = after['calls'] - before['calls']
+    assert data['vendor_name'] == 'Acme Corp'
+    assert calls > 1
+    assert after['prompt_tokens'] - before['prompt_tokens'] == 100 * calls
@@ -0,0 +1,90 @@
+"""
+Test Group-Commit Writer
+"""
+
+import threading
+
+from src.database import ContractDatabase
+from src.group_commit import GroupCommitWriter
+from src.sharding import ShardedContractDatabase, split_global_id
+
+
+def test_concurrent_producers_share_commits(tmp_path):
+    db_path = str(tmp_path / "contracts.db")
+    writer = GroupCommitWriter(db_path, max_batch=50, max_delay_ms=20)
+    ids = {}
+
+    def produce(worker):
+        for i in range(25):
+            filename = f"w{worker}_{i}.pdf"
+            ids[filename] = writer.insert_contract(filename, {'vendor_name': f"Vendor {worker}"}, signature=[i] * 128)
+
+    threads = [threading.Thread(target=produce, args=(w,)) for w in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.close()
+
+    stats = writer.stats()
+    assert stats['rows'] == 200 and stats['failed'] == 0
+    assert stats['commits'] < 200
+
+    db = ContractDatabase(db_path)
+    assert len(set(ids.values())) == 200
+    for filename, contract_id in ids.items():
+        assert db.get_contract_by_id(contract_id)['filename'] == filename
+    assert len(db.get_vendors()) == 8
+    db.close()
+
+
+def test_failed_insert_only_fails_its_own_future(tmp_path):
+    db_path = str(tmp_path / "contracts.db")
+    writer = GroupCommitWriter(db_path, max_batch=10, max_delay_ms=200)
+
+    good = writer.submit("good.pdf", {'vendor_name': "TechCorp"})
+    bad = writer.submit(None, {'vendor_name': "DataFlow"})  # filename is NOT NULL
+    also_good = writer.submit("also_good.pdf", {'vendor_name': "DataFlow"})
+    writer.close()
+
+    assert bad.exception() is not None
+    db = ContractDatabase(db_path)
+    assert db.get_contract_by_id(good.result())['filename'] == "good.pdf"
+    assert db.get_contract_by_id(also_good.result())['vendor_name'] == "DataFlow"
+    assert db.get_contract_count() == 2
+    # The vendor created by the rolled-back group was re-created by the retry
+    assert {v['canonical_name'] for v in db.get_vendors()} == {"TechCorp", "DataFlow"}
+    db.close()
+
+
+def test_sharded_batches_commit_per_shard(tmp_path):
+    db = ShardedContractDatabase(str(tmp_path / "shards"), shard_by="tenant")
+    ids = db.insert_contracts([
+        ("a.pdf", {'vendor_name': "TechCorp", 'tenant': "acme"}, None),
+        ("b.pdf", {'vendor_name': "TechCorp", 'tenant': "globex"}, None),
+        ("c.pdf", {'vendor_name': "DataFlow", 'tenant': "acme"}, None),
+    ])
+
+    assert [split_global_id(i) for i in ids] == [(1, 1), (2, 1), (1, 2)]
+    assert [db.get_contract_by_id(i)['filename'] for i in ids] == ["a.pdf", "b.pdf", "c.pdf"]
+    assert db.get_vendors(limit=1)[0]['contract_count'] == 2
+    db.close()
+
+
+def test_failed_shard_does_not_retry_committed_shards(tmp_path, monkeypatch):
+    monkeypatch.setenv("CONTRACT_SHARD_BY", "tenant")
+    monkeypatch.setenv("SHARD_DIR", str(tmp_path / "shards"))
+    writer = GroupCommitWriter(max_batch=10, max_delay_ms=200)
+
+    a = writer.submit("a.pdf", {'vendor_name': "TechCorp", 'tenant': "acme"})
+    bad = writer.submit(None, {'vendor_name': "DataFlow", 'tenant': "globex"})  # filename is NOT NULL
+    b = writer.submit("b.pdf", {'vendor_name': "DataFlow", 'tenant': "globex"})
+    writer.close()
+
+    assert bad.exception() is not None
+    assert split_global_id(a.result())[0] != split_global_id(b.result())[0]
+    assert writer.stats()['failed'] == 1
+
+    db = ShardedContractDatabase(str(tmp_path / "shards"), shard_by="tenant")
+    assert sorted(c['filename'] for c in db.get_all_contracts()) == ["a.pdf", "b.pdf"]
+    db.close()
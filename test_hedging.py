@@ -0,0 +1,73 @@
+"""
+Test Hedged Requests and Deadlines
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from benchmark_hedging import FakeChatServer
+from src import llm_client
+
+MESSAGES = [{'role': 'user', 'content': 'Extract the vendor.'}]
+
+
+@pytest.fixture
+def fake_server(monkeypatch):
+    from openai import OpenAI
+
+    monkeypatch.setenv("LLM_RATE_LIMIT", "off")
+    monkeypatch.setenv("LLM_CACHE_MODE", "off")
+    with FakeChatServer() as server:
+        yield server, OpenAI(api_key="fake", base_url=server.base_url, max_retries=0)
+
+
+def test_slow_request_is_hedged_and_cancelled(fake_server, monkeypatch):
+    server, client = fake_server
+    delays = [3.0, 0.05]
+    monkeypatch.setattr(server, 'next_delay', lambda: delays.pop(0))
+    monkeypatch.setenv("LLM_HEDGE_AFTER", "0.5")
+
+    start = time.perf_counter()
+    response = llm_client.chat_completion(client, "fake-hedge-test", MESSAGES)
+
+    assert response.content == '{"vendor_name": "Acme"}'
+    assert time.perf_counter() - start < 2.0
+    stats = llm_client.latency_stats()["fake-hedge-test"]
+    assert stats['hedged'] == 1 and stats['hedge_wins'] == 1
+
+
+def test_deadline_bounds_a_stuck_request(fake_server, monkeypatch):
+    server, client = fake_server
+    monkeypatch.setattr(server, 'next_delay', lambda: 5.0)
+    monkeypatch.setenv("LLM_HEDGE", "off")
+
+    start = time.perf_counter()
+    with pytest.raises(llm_client.DeadlineExceeded):
+        llm_client.chat_completion(client, "fake-deadline-test", MESSAGES, deadline=0.5)
+    assert time.perf_counter() - start < 2.0
+
+
+def test_hedge_without_spare_quota_is_not_counted(fake_server, monkeypatch):
+    from openai import AsyncOpenAI
+
+    server, _ = fake_server
+    monkeypatch.setattr(server, 'next_delay', lambda: 0.6)
+
+    class NoSpareQuota:
+        def acquire(self, scope, tokens, max_wait=None):
+            raise llm_client.RateLimitTimeout("no spare capacity")
+
+        def observe(self, scope, headers):
+            pass
+
+    async def call():
+        client = AsyncOpenAI(api_key="fake", base_url=server.base_url, max_retries=0)
+        request = {'model': "fake-quota-test", 'messages': MESSAGES}
+        return await llm_client._hedged(client, request, NoSpareQuota(), time.monotonic() + 5, 0.1, 10)
+
+    response, hedged, hedge_won = asyncio.run(call())
+
+    assert response.content == '{"vendor_name": "Acme"}'
+    assert (hedged, hedge_won) == (False, False)
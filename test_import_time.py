@@ -0,0 +1,60 @@
+"""
+Test Import Time
+Keeps startup of database/validator consumers free of heavy dependencies
+
+Checks which modules are loaded rather than timing the imports, so the
+result does not depend on machine speed or a warm disk cache.
+
+Usage:
+    python test_import_time.py
+    python -m pytest test_import_time.py
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+# Modules that must only load on first use
+HEAVY_MODULES = ['openai', 'PyPDF2', 'extract_thinker', 'dotenv', 'pandas', 'plotly', 'streamlit', 'numpy', 'pyarrow', 'pypdfium2', 'pdfminer', 'tiktoken']
+
+LIGHT_MODULES = ['src.database', 'src.contract_validator', 'src.backends', 'src.extractor', 'src.simple_extractor']
+
+
+def loaded_modules(modules):
+    """
+    Import modules in a fresh interpreter.
+
+    Returns:
+        Set of top-level package names in sys.modules afterwards
+    """
+    statement = f"import json, sys; import {', '.join(modules)}; print(json.dumps(sorted(sys.modules)))"
+    result = subprocess.run(
+        [sys.executable, "-c", statement],
+        cwd=Path(__file__).parent,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return {name.split('.')[0] for name in json.loads(result.stdout)}
+
+
+def test_no_heavy_imports():
+    loaded = loaded_modules(LIGHT_MODULES)
+    eager = [m for m in HEAVY_MODULES if m in loaded]
+    assert not eager, f"Heavy modules imported eagerly: {eager}"
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("TESTING IMPORT TIME")
+    print("=" * 60)
+    print()
+
+    for name in LIGHT_MODULES:
+        eager = [m for m in HEAVY_MODULES if m in loaded_modules([name])]
+        print(f"{name:<25} {', '.join(eager) or 'no heavy imports'}")
+    print()
+
+    test_no_heavy_imports()
+    print("✓ No heavy modules imported at startup")
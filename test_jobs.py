@@ -0,0 +1,91 @@
+"""
+Test Background Job Queue
+"""
+
+import time
+
+from src.jobs import DONE, FAILED, QUEUED, RUNNING, JobQueue, WorkerPool, wait_for_jobs
+
+
+def fake_extraction(job, report):
+    report(0.5, "Extracting fields")
+    if not job['pdf']:
+        raise ValueError("Empty PDF")
+    return {'data': {'size': len(job['pdf'])}}
+
+
+def test_workers_process_session_jobs(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    pool = WorkerPool(queue, fake_extraction, workers=2, poll_interval=0.01)
+    pool.start()
+    try:
+        ids = [queue.enqueue("session-a", "a.pdf", b"%PDF-a"), queue.enqueue("session-a", "empty.pdf", b"")]
+        queue.enqueue("session-b", "b.pdf", b"%PDF-b")
+        jobs = wait_for_jobs(queue, ids, timeout=10, poll_interval=0.01)
+    finally:
+        pool.stop()
+
+    assert [job['status'] for job in jobs] == [DONE, FAILED]
+    assert jobs[0]['result'] == {'data': {'size': 6}}
+    assert jobs[1]['error'] == "Empty PDF"
+    assert [job['filename'] for job in queue.get_session_jobs("session-a")] == ["a.pdf", "empty.pdf"]
+
+
+def test_interrupted_jobs_are_requeued(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    queue = JobQueue(db_path)
+    job_id = queue.enqueue("session-a", "a.pdf", b"%PDF-a")
+    assert queue.claim_next()['id'] == job_id
+
+    # Another process opening the queue leaves a job with a live lease alone
+    assert JobQueue(db_path).get_job(job_id)['status'] == RUNNING
+
+    # Once the lease lapses (the worker's process crashed) the job goes back in the queue
+    queue.get_connection().execute(
+        "UPDATE jobs SET heartbeat_at = datetime('now', '-120 seconds') WHERE id = ?", (job_id,)
+    )
+    assert JobQueue(db_path).get_job(job_id)['status'] == QUEUED
+
+
+def test_requeued_job_cannot_be_finished_by_its_old_worker(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    job_id = queue.enqueue("session-a", "a.pdf", b"%PDF-a")
+    stale = queue.claim_next()
+    queue.get_connection().execute(
+        "UPDATE jobs SET heartbeat_at = datetime('now', '-120 seconds') WHERE id = ?", (job_id,)
+    )
+    assert queue.requeue_interrupted() == 1
+    current = queue.claim_next()
+    assert current['id'] == job_id and current['lease'] != stale['lease']
+
+    # The first worker finishing late changes nothing, and the PDF stays for the new one
+    assert not queue.complete(job_id, {'data': {}}, stale['lease'])
+    assert not queue.fail(job_id, "timed out", stale['lease'])
+    assert queue.get_job(job_id)['status'] == RUNNING
+    assert queue.get_connection().execute("SELECT pdf FROM jobs WHERE id = ?", (job_id,)).fetchone()[0] == b"%PDF-a"
+
+    assert queue.complete(job_id, {'data': {'size': 6}}, current['lease'])
+    assert queue.get_job(job_id)['status'] == DONE
+    # Finished jobs are not running any more, whatever the lease
+    assert not queue.fail(job_id, "late failure")
+    assert queue.get_job(job_id)['status'] == DONE
+
+
+def test_heartbeat_keeps_long_jobs_leased(tmp_path):
+    # Timestamps have 1s resolution, so the lease must exceed heartbeat interval + 1s
+    queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=2)
+
+    def slow_extraction(job, report):
+        time.sleep(3.5)
+        return {'data': {}}
+
+    pool = WorkerPool(queue, slow_extraction, workers=1, poll_interval=0.01)
+    pool.start()
+    try:
+        job_id = queue.enqueue("session-a", "a.pdf", b"%PDF-a")
+        time.sleep(2.5)
+        assert queue.requeue_interrupted() == 0
+        assert queue.get_job(job_id)['status'] == RUNNING
+        assert wait_for_jobs(queue, [job_id], timeout=10, poll_interval=0.05)[0]['status'] == DONE
+    finally:
+        pool.stop()
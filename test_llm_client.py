@@ -0,0 +1,56 @@
+"""
+Test LLM Record/Replay Cache
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from src import llm_client
+
+MESSAGES = [{'role': 'user', 'content': 'Extract the vendor.'}]
+
+
+class FakeClient:
+    """Stands in for an OpenAI client; counts the live calls it serves."""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, timeout=None, **params):
+        self.calls += 1
+        usage = SimpleNamespace(model_dump=lambda: {'prompt_tokens': 12, 'completion_tokens': 5, 'total_tokens': 17})
+        message = SimpleNamespace(content='{"vendor_name": "Acme"}')
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], model=model, usage=usage)
+
+
+@pytest.fixture
+def cache_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("LLM_RATE_LIMIT", "off")
+    monkeypatch.setenv("LLM_CACHE_PATH", str(tmp_path / "llm_cache.db"))
+    return str(tmp_path / "llm_cache.db")
+
+
+def test_recorded_responses_replay_without_a_client(cache_path, monkeypatch):
+    client = FakeClient()
+    monkeypatch.setenv("LLM_CACHE_MODE", "record")
+    recorded = llm_client.chat_completion(client, "gpt-4o-mini", MESSAGES, max_tokens=50)
+    assert client.calls == 1 and not recorded.cached
+
+    monkeypatch.setenv("LLM_CACHE_MODE", "replay")
+    replayed = llm_client.chat_completion(None, "gpt-4o-mini", MESSAGES, max_tokens=50)
+    assert replayed.cached and client.calls == 1
+    assert replayed.content == recorded.content and replayed.usage['total_tokens'] == 17
+    assert llm_client.get_cache(cache_path).stats()['hits'] == 1
+
+
+def test_replay_miss_raises(cache_path, monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_MODE", "record")
+    llm_client.chat_completion(FakeClient(), "gpt-4o-mini", MESSAGES)
+
+    # Any change to the request (here max_tokens) is a different key
+    monkeypatch.setenv("LLM_CACHE_MODE", "replay")
+    with pytest.raises(llm_client.CacheMissError):
+        llm_client.chat_completion(None, "gpt-4o-mini", MESSAGES, max_tokens=50)
+    assert llm_client.get_cache(cache_path).stats()['misses'] == 1
@@ -0,0 +1,23 @@
+"""
+Test App Load Test
+"""
+
+from load_test_app import OPERATIONS, parser, run_load_test
+
+
+def test_sessions_exercise_every_operation(tmp_path, monkeypatch):
+    # run_load_test points these at the work dir; monkeypatch restores them afterwards
+    for name in ("EXTRACTION_BACKEND", "FIELD_REPAIR", "SHARD_DIR", "SNAPSHOT_DIR", "ARTIFACT_STORE_PATH"):
+        monkeypatch.setenv(name, "")
+    monkeypatch.delenv("SHARD_DIR")
+    monkeypatch.delenv("CONTRACT_SHARD_BY", raising=False)
+
+    args = parser.parse_args([
+        "--sessions", "4", "--contracts", "200", "--duration", "2", "--think-seconds", "0.05",
+        "--llm-seconds", "0.05", "--mix", "history=1,filter=1,search=1,dashboard=1,upload=1",
+        "--work-dir", str(tmp_path)
+    ])
+    stats = run_load_test(args)
+
+    assert not stats.messages
+    assert all(stats.latencies[op] for op in OPERATIONS)
@@ -0,0 +1,23 @@
+"""
+Test Near-Duplicate Detection
+"""
+
+from src.database import ContractDatabase
+from src.near_duplicates import compute_signature
+
+TEXT = "This Master Services Agreement is entered into by TechCorp Inc and the Client for consulting services " * 5
+
+
+def test_copies_match_but_text_less_pdfs_do_not(tmp_path):
+    db = ContractDatabase(str(tmp_path / "contracts.db"))
+    original = db.insert_contract("original.pdf", {'vendor_name': "TechCorp"}, signature=compute_signature(TEXT))
+
+    matches = db.find_near_duplicates(compute_signature(TEXT.upper() + " "))
+    assert [m['id'] for m in matches] == [original]
+
+    # Scanned PDFs have no words: no signature is stored and nothing matches
+    assert compute_signature("") is None and compute_signature(" \n ") is None
+    db.insert_contract("scan_a.pdf", {'vendor_name': "DataFlow"}, signature=compute_signature(""))
+    assert db.find_near_duplicates(compute_signature("")) == []
+    db.close()
+
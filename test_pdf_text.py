@@ -0,0 +1,45 @@
+"""
+Test PDF Text Engines
+"""
+
+import pytest
+
+from src import pdf_text
+
+SAMPLE_PDF = "data/contracts/Contract_445.pdf"
+
+
+def test_falls_back_when_engine_fails(monkeypatch):
+    def broken(pdf_path):
+        raise ValueError("garbled xref")
+
+    monkeypatch.setitem(pdf_text._ENGINES, "broken", broken)
+    monkeypatch.setitem(pdf_text._ENGINES, "empty", lambda pdf_path: ["  "])
+    monkeypatch.setitem(pdf_text._ENGINES, "good", lambda pdf_path: ["Page one", "Page two"])
+
+    assert pdf_text.extract_text(SAMPLE_PDF, engines=["broken", "empty", "good"]) == "Page one\nPage two\n"
+
+
+def test_all_engines_failing_raises(monkeypatch):
+    def broken(pdf_path):
+        raise ValueError("garbled xref")
+
+    monkeypatch.setitem(pdf_text._ENGINES, "broken", broken)
+    with pytest.raises(ValueError, match="garbled xref"):
+        pdf_text.extract_text(SAMPLE_PDF, engines=["broken"])
+
+
+def test_default_engines_read_sample_contract():
+    assert "DS-2026-445" in pdf_text.extract_text(SAMPLE_PDF)
+
+
+def test_reads_pdf_from_memory():
+    with open(SAMPLE_PDF, "rb") as f:
+        content = f.read()
+
+    for engine in ["pypdfium2", "pdfminer", "pypdf2"]:
+        try:
+            from_path = pdf_text.extract_pages(SAMPLE_PDF, engine)
+        except pdf_text.EngineUnavailable:
+            continue
+        assert pdf_text.extract_pages(memoryview(content), engine) == from_path
@@ -0,0 +1,59 @@
+"""
+Test Profiling Hooks
+"""
+
+import json
+
+import pytest
+
+from src import profiling
+
+
+@profiling.profiled("outer")
+def outer(n):
+    return inner(n) + 1
+
+
+@profiling.profiled("inner")
+def inner(n):
+    return len([0] * n)
+
+
+@pytest.fixture(autouse=True)
+def no_session():
+    profiling.disable_profiling()
+    yield
+    profiling.disable_profiling()
+
+
+def test_profiled_calls_write_dumps_and_a_report(tmp_path):
+    assert outer(10) == 11 and not profiling.is_profiling_enabled()
+
+    session = profiling.enable_profiling(str(tmp_path), top_n=5)
+    assert profiling.enable_profiling() is session
+    outer(100_000)
+    outer(10)
+
+    report = profiling.disable_profiling()
+    assert report == session.run_dir / "allocations.txt" and report.exists()
+    # Nested profiled calls are folded into the outermost one
+    assert sorted(path.name for path in session.run_dir.glob("*.prof")) == ["00001_outer.prof", "00002_outer.prof"]
+
+    calls = json.loads((session.run_dir / "calls.json").read_text())
+    assert calls['summary']['outer']['calls'] == 2
+    assert calls['calls'][0]['peak_alloc_bytes'] >= 100_000 * 8
+    assert profiling.disable_profiling() is None
+
+
+def test_enable_from_env_needs_profile_dir(tmp_path, monkeypatch):
+    monkeypatch.delenv(profiling.PROFILE_DIR_ENV, raising=False)
+    profiling.enable_from_env()
+    assert profiling.get_session() is None
+
+    registered = []
+    monkeypatch.setattr("atexit.register", registered.append)
+    monkeypatch.setenv(profiling.PROFILE_DIR_ENV, str(tmp_path))
+    profiling.enable_from_env()
+    session = profiling.get_session()
+    assert session is not None and session.run_dir.parent == tmp_path
+    assert registered == [profiling.disable_profiling]
@@ -0,0 +1,32 @@
+"""
+Test Prompt Templates
+"""
+
+from src import prompts
+from src.llm_client import ChatResponse, call_cost
+
+
+def test_static_prefix_is_shared_across_documents():
+    template = prompts.get_template("extraction-v2")
+    first = template.render("Contract A")
+    second = template.render("A much longer contract B")
+
+    # Everything up to the document is identical, nothing follows it
+    assert first[0] == second[0]
+    assert first[1]['content'].endswith("Contract A")
+    assert template.segment_tokens("Contract A")['suffix'] == 0
+
+
+def test_usage_records_cached_tokens():
+    template = prompts.get_template("extraction-v1")
+    usage = {'prompt_tokens': 2000, 'completion_tokens': 100, 'prompt_tokens_details': {'cached_tokens': 1024}}
+    response = ChatResponse("{}", "gpt-4o-mini-2024-07-18", usage)
+
+    before = prompts.usage_stats().get("extraction-v1", {'calls': 0, 'cached_tokens': 0})
+    prompts.record_usage(template, template.segment_tokens("text"), response, 0.5)
+    after = prompts.usage_stats()["extraction-v1"]
+
+    assert after['calls'] == before['calls'] + 1
+    assert after['cached_tokens'] == before['cached_tokens'] + 1024
+    # Cached prompt tokens are billed at half price for gpt-4o-mini
+    assert round(call_cost(response.model, usage), 8) == round((976 * 0.15 + 1024 * 0.075 + 100 * 0.6) / 1e6, 8)
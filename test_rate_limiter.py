@@ -0,0 +1,100 @@
+"""
+Test Rate Limiter
+"""
+
+import time
+
+from src import llm_client
+from src.rate_limiter import RateLimiter, parse_duration
+
+
+def test_parse_duration():
+    assert parse_duration("6m0s") == 360
+    assert parse_duration("20ms") == 0.02
+    assert parse_duration("1.5") == 1.5
+    assert parse_duration(None) is None
+
+
+def test_buckets_pace_requests_across_instances(tmp_path):
+    db_path = str(tmp_path / "rate_limit.db")
+    # Two limiters on one file behave like two processes sharing the quota
+    first = RateLimiter(db_path, rpm=6000, tpm=10**9, headroom=1.0)
+    second = RateLimiter(db_path, rpm=6000, tpm=10**9, headroom=1.0)
+
+    start = time.time()
+    for i in range(400):
+        (first if i % 2 else second).acquire("gpt-4o-mini")
+    elapsed = time.time() - start
+
+    # 100 requests/s with a 300 request burst
+    assert elapsed >= 0.9
+
+
+def test_throttle_pauses_and_backs_off(tmp_path):
+    limiter = RateLimiter(str(tmp_path / "rate_limit.db"), rpm=6000, tpm=10**9, headroom=1.0)
+    limiter.acquire("gpt-4o-mini")
+    assert limiter.throttled("gpt-4o-mini", {'retry-after-ms': '200'}) == 0.2
+    assert limiter.acquire("gpt-4o-mini") >= 0.15
+
+    # Successful responses restore the rate toward the reported quota
+    limiter.observe("gpt-4o-mini", {'x-ratelimit-limit-requests': '6000'})
+    assert limiter.stats()['throttles'] == 1
+
+
+class RateLimitError(Exception):
+    status_code = 429
+    response = type("Response", (), {'headers': {'retry-after-ms': '10'}})()
+
+
+class FakeCompletions:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def create(self, **request):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RateLimitError("Too many requests")
+
+        class Message:
+            content = "{}"
+
+        class Choice:
+            message = Message()
+
+        class Response:
+            choices = [Choice()]
+            model = request['model']
+            usage = None
+
+        return Response()
+
+
+class FakeClient:
+    def __init__(self, failures):
+        self.chat = type("Chat", (), {})()
+        self.chat.completions = FakeCompletions(failures)
+
+
+def test_chat_completion_retries_after_429(tmp_path, monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_PATH", str(tmp_path / "rate_limit.db"))
+    client = FakeClient(failures=2)
+
+    response = llm_client.chat_completion(client, "gpt-4o-mini", [{'role': 'user', 'content': 'hi'}])
+
+    assert response.content == "{}"
+    assert client.chat.completions.calls == 3
+
+
+def test_429_backs_off_by_retry_after_without_limiter(monkeypatch):
+    monkeypatch.setenv("LLM_RATE_LIMIT", "off")
+    delays = []
+    monkeypatch.setattr(llm_client.time, 'sleep', delays.append)
+    client = FakeClient(failures=2)
+    monkeypatch.setattr(RateLimitError, 'response', type("Response", (), {'headers': {'retry-after': '3'}})())
+
+    response = llm_client.chat_completion(client, "gpt-4o-mini", [{'role': 'user', 'content': 'hi'}])
+
+    assert response.content == "{}"
+    assert client.chat.completions.calls == 3
+    assert delays == [3.0, 3.0]
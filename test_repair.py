@@ -0,0 +1,54 @@
+"""
+Test Field Repair
+"""
+
+import json
+
+from src import repair
+from src.llm_client import ChatResponse
+
+PAGES = [
+    "Master Services Agreement between Acme Corp and Client Co.",
+    "Scope of work: quarterly reports and on-site support.",
+    "Term. This agreement is effective 2024-01-01 and expires on 2025-01-01 unless terminated earlier.",
+    "Fees: $50,000 payable Net 30.",
+]
+
+DATA = {
+    'vendor_name': 'Acme Corp', 'contract_number': None, 'effective_date': '2024-01-01',
+    'expiration_date': '2023-01-01', 'total_amount': '$50,000', 'payment_terms': 'Net 30',
+    'contract_type': 'Master Services Agreement', 'key_deliverables': 'Quarterly reports'
+}
+
+
+def fake_completion(answer, requests):
+    def complete(client, model, messages, **params):
+        requests.append(messages[-1]['content'])
+        return ChatResponse(json.dumps(answer), model, {'prompt_tokens': 300, 'completion_tokens': 20})
+    return complete
+
+
+def test_repairs_only_flagged_fields_from_relevant_pages(monkeypatch):
+    requests = []
+    monkeypatch.setattr(repair, 'chat_completion', fake_completion(
+        {'effective_date': '2024-01-01', 'expiration_date': '2025-01-01'}, requests))
+
+    result = repair.FieldRepairer(client=object(), max_pages=1).repair(DATA, PAGES)
+
+    assert result.accepted
+    assert result.fields == ['effective_date', 'expiration_date']
+    assert result.changed == ['expiration_date']
+    assert result.data == dict(DATA, expiration_date='2025-01-01')
+    # Only the term page and a schema for the two date fields are sent
+    assert "[Page 3 of 4]" in requests[0] and "Fees" not in requests[0] and "Scope" not in requests[0]
+    assert '"total_amount": "string' not in requests[0]
+
+
+def test_worse_answer_is_rejected(monkeypatch):
+    monkeypatch.setattr(repair, 'chat_completion', fake_completion({'vendor_name': None}, []))
+
+    result = repair.FieldRepairer(client=object()).repair(DATA, PAGES, fields=['vendor_name'])
+
+    assert not result.accepted
+    assert result.data == DATA
+    assert result.changed == []
@@ -0,0 +1,86 @@
+"""
+Test Semantic Search
+"""
+
+import multiprocessing
+
+from src.database import ContractDatabase
+from src.semantic_search import SemanticIndex, contract_document, get_index, index_contract, rebuild_index
+
+CLOUD = {'vendor_name': "Nimbus Inc", 'contract_type': "MSA", 'key_deliverables': "cloud migration and hosting services"}
+PAYROLL = {'vendor_name': "PayCo", 'contract_type': "SOW", 'key_deliverables': "payroll processing and benefits administration"}
+
+
+def add_rows(index_dir, first_id, count):
+    index = SemanticIndex(index_dir)
+    for contract_id in range(first_id, first_id + count):
+        index.add(contract_id, f"cloud hosting services batch {contract_id}")
+
+
+def test_search_ranks_matching_contract_first(tmp_path):
+    index = SemanticIndex(str(tmp_path / "index"))
+    index.add(1, contract_document(CLOUD))
+    index.add(2, contract_document(PAYROLL))
+
+    assert [contract_id for contract_id, _ in index.search("cloud migration")] == [1]
+    assert index.search("payroll benefits")[0][0] == 2
+
+
+def test_deleted_contracts_leave_the_index(tmp_path, monkeypatch):
+    monkeypatch.setenv("SEMANTIC_INDEX_DIR", str(tmp_path / "index"))
+    db = ContractDatabase(str(tmp_path / "contracts.db"))
+    cloud = db.insert_contract("cloud.pdf", CLOUD)
+    payroll = db.insert_contract("payroll.pdf", PAYROLL)
+    index_contract(cloud, CLOUD)
+    index_contract(payroll, PAYROLL)
+    assert get_index().search("cloud migration")[0][0] == cloud
+
+    assert db.delete_contract(cloud)
+    assert get_index().search("cloud migration") == []
+    assert len(get_index()) == 1
+
+    # A rebuild replaces the files other instances have open
+    other = SemanticIndex(str(tmp_path / "index"))
+    rebuild_index(db)
+    assert [contract_id for contract_id, _ in other.search("payroll")] == [payroll]
+    db.close()
+
+
+def test_contracts_indexed_during_a_rebuild_are_kept(tmp_path, monkeypatch):
+    monkeypatch.setenv("SEMANTIC_INDEX_DIR", str(tmp_path / "index"))
+    db = ContractDatabase(str(tmp_path / "contracts.db"))
+    cloud = db.insert_contract("cloud.pdf", CLOUD)
+    index_contract(cloud, CLOUD)
+    read_all = db.get_all_contracts
+    added = []
+
+    def read_then_save_another():
+        # Another process saves a contract after the rebuild read the database
+        contracts = read_all()
+        added.append(db.insert_contract("payroll.pdf", PAYROLL))
+        SemanticIndex(str(tmp_path / "index")).add(added[0], contract_document(PAYROLL))
+        return contracts
+
+    monkeypatch.setattr(db, "get_all_contracts", read_then_save_another)
+    index = rebuild_index(db)
+    assert sorted(index.ids[:index.count]) == [cloud, added[0]]
+    assert index.search("payroll benefits")[0][0] == added[0]
+    db.close()
+
+
+def test_processes_append_without_overwriting_each_other(tmp_path):
+    index_dir = str(tmp_path / "index")
+    SemanticIndex(index_dir)
+
+    # Together they outgrow the initial capacity, so the files are extended mid-run
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=add_rows, args=(index_dir, first, 600)) for first in (1, 1001)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert all(worker.exitcode == 0 for worker in workers)
+
+    index = SemanticIndex(index_dir)
+    assert index.count == 1200
+    assert sorted(index.ids[:index.count]) == list(range(1, 601)) + list(range(1001, 1601))
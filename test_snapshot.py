@@ -0,0 +1,62 @@
+"""
+Test Analytics Snapshot
+"""
+
+import multiprocessing
+
+from src.database import ContractDatabase
+from src.snapshot import MAX_SEGMENTS, ContractSnapshot
+
+CONTRACTS = [{'id': contract_id, 'vendor_name': f"Vendor {contract_id % 7}"} for contract_id in range(1, 201)]
+
+
+def insert(db, filename, vendor, contract_type):
+    return db.insert_contract(filename, {'vendor_name': vendor, 'contract_type': contract_type})
+
+
+def append_in_steps(snapshot_dir, step):
+    snapshot = ContractSnapshot(snapshot_dir)
+    for end in range(step, len(CONTRACTS) + 1, step):
+        snapshot.append(CONTRACTS[:end])
+
+
+def test_snapshot_appends_and_rebuilds(tmp_path):
+    db = ContractDatabase(str(tmp_path / "contracts.db"))
+    snapshot = ContractSnapshot(str(tmp_path / "snapshot"))
+
+    insert(db, "a.pdf", "TechCorp Inc", "MSA")
+    insert(db, "b.pdf", "DataFlow", "Purchase Order")
+    assert snapshot.sync(db) == 2
+
+    deleted_id = insert(db, "c.pdf", "TechCorp Inc", "MSA")
+    assert snapshot.sync(db) == 1
+    assert len(snapshot.segments) == 2
+    assert snapshot.sync(db) == 0
+
+    df = snapshot.to_dataframe()
+    assert df['contract_type'].value_counts()['MSA'] == 2
+    assert list(df['vendor_name'].cat.categories) == ['DataFlow', 'TechCorp Inc']
+
+    # Deletes are not appendable, so the snapshot is rebuilt
+    db.delete_contract(deleted_id)
+    snapshot.sync(db)
+    assert snapshot.load().column('id').to_pylist() == [1, 2]
+    db.close()
+
+
+def test_processes_append_without_overwriting_each_other(tmp_path):
+    snapshot_dir = str(tmp_path / "snapshot")
+    ContractSnapshot(snapshot_dir)
+
+    # Both catch up on the same contracts; enough appends to trigger compaction mid-run
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=append_in_steps, args=(snapshot_dir, step)) for step in (4, 5)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert all(worker.exitcode == 0 for worker in workers)
+
+    snapshot = ContractSnapshot(snapshot_dir)
+    assert snapshot.rows == 200 and len(snapshot.segments) <= MAX_SEGMENTS
+    assert snapshot.load().column('id').to_pylist() == list(range(1, 201))
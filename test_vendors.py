@@ -0,0 +1,54 @@
+"""
+Test Vendor Resolution
+"""
+
+import pytest
+
+from src.database import ContractDatabase
+from src.vendors import VendorIndex, vendor_match_key
+
+
+def resolve(names):
+    index = VendorIndex()
+    ids = []
+    for name in names:
+        key = vendor_match_key(name)
+        match = index.lookup(key)
+        if match is None:
+            match = (len(index) + 1, 1.0)
+            index.add(match[0], key)
+        ids.append(match[0])
+    return ids
+
+
+@pytest.mark.parametrize("a, b", [
+    ("Global Solutions", "Global Systems"),
+    ("Acme Services", "Acme Technologies"),
+    ("Apex Group", "Apex Holdings"),
+])
+def test_different_descriptors_stay_separate_vendors(a, b):
+    first, second = resolve([a, b])
+    assert first != second
+
+
+@pytest.mark.parametrize("names", [
+    ["TechCorp Solutions Inc.", "TECHCORP", "TechCorp Solutions, LLC", "The TechCorp"],
+    ["DataFlow", "DataFlow Systems Ltd"],
+    ["Northwind Logistics Group", "Northwind Logistics Group Inc", "Northwind Logistic Group"],
+])
+def test_variants_of_one_name_resolve_together(names):
+    assert len(set(resolve(names))) == 1
+
+
+def test_bare_name_is_ambiguous_between_two_descriptors():
+    services, technologies, bare = resolve(["Acme Services", "Acme Technologies", "Acme"])
+    assert services != technologies
+    assert bare not in (services, technologies)
+
+
+def test_database_keeps_described_vendors_apart(tmp_path):
+    db = ContractDatabase(str(tmp_path / "contracts.db"))
+    services = db.resolve_vendor("Acme Services")
+    assert db.resolve_vendor("Acme Services Inc") == services
+    assert db.resolve_vendor("Acme Technologies") != services
+    db.close()
@@ -1,16 +1,17 @@
 """
-Auto-fill validation results for manually checked contracts
+Record ground truth for manually checked contracts
 Supports both perfect matches and contracts with specific field corrections
 """
 
-import csv
+from src.database import open_contract_database
+from src.evaluation import EvaluationStore, FIELDS
 
 print("=" * 60)
-print("UPDATING VALIDATION SPREADSHEET")
+print("UPDATING GROUND TRUTH")
 print("=" * 60)
 print()
 
-# Contracts where ALL fields matched perfectly (auto-fill from Extracted_Value)
+# Contracts where ALL fields matched perfectly (ground truth = latest extraction)
 perfect_matches = [
     'European_Format_Contract.pdf',
     'Ambiguous_Dates_Contract.pdf'
@@ -18,6 +19,7 @@ perfect_matches = [
 
 # Contracts with specific field corrections
 # Format: {filename: {field_name: (actual_value, match_result)}}
+# match_result is kept for reference; accuracy is now computed by the evaluation engine
 field_corrections = {
     'Informal_Contract.pdf': {
         'vendor_name': ('QuickDeal Suppliers', 'TRUE'),
@@ -51,42 +53,36 @@ field_corrections = {
     }
 }
 
-# Read validation CSV
-csv_path = 'data/validation.csv'
+db_path = 'data/contracts.db'
+db = open_contract_database(db_path)
+store = EvaluationStore(db_path)
+
+# Latest extraction per filename
+latest = {}
+for contract in sorted(db.get_all_contracts(), key=lambda c: c['id']):
+    latest[contract['filename']] = contract
+
 rows = []
-updated_count = 0
 
-with open(csv_path, 'r', encoding='utf-8') as f:
-    reader = csv.DictReader(f)
-    fieldnames = reader.fieldnames
-    
-    for row in reader:
-        filename = row['Filename']
-        field_name = row['Field_Name']
-        
-        # Handle perfect matches
-        if filename in perfect_matches:
-            row['Actual_Value'] = row['Extracted_Value']
-            row['Match'] = 'TRUE'
-            row['Notes'] = 'Manually Verified'
-            updated_count += 1
-        
-        # Handle specific field corrections
-        elif filename in field_corrections:
-            if field_name in field_corrections[filename]:
-                actual_value, match = field_corrections[filename][field_name]
-                row['Actual_Value'] = actual_value
-                row['Match'] = match
-                row['Notes'] = 'Manually verified' if match == 'TRUE' else 'Correction applied'
-                updated_count += 1
-        
-        rows.append(row)
+# Handle perfect matches
+for filename in perfect_matches:
+    if filename not in latest:
+        print(f"  Skipping {filename} (not in database)")
+        continue
+    for field in FIELDS:
+        rows.append((filename, field, latest[filename].get(field), 'Manually Verified'))
+
+# Handle specific field corrections
+for filename, corrections in field_corrections.items():
+    for field_name, (actual_value, match) in corrections.items():
+        actual = None if actual_value == 'None' else actual_value
+        notes = 'Manually verified' if match == 'TRUE' else 'Correction applied'
+        rows.append((filename, field_name, actual, notes))
+
+updated_count = store.set_ground_truth_bulk(rows)
 
-# Write updated data back
-with open(csv_path, 'w', newline='', encoding='utf-8') as f:
-    writer = csv.DictWriter(f, fieldnames=fieldnames)
-    writer.writeheader()
-    writer.writerows(rows)
+store.close()
+db.close()
 
 print(f" Updated {updated_count} fields")
 print()
@@ -100,5 +96,6 @@ print("Partial Matches (with corrections):")
 for contract in field_corrections.keys():
     print(f"  • {contract}")
 print()
-print(f" Updated file: {csv_path}")
+print(f" Updated ground truth in: {db_path}")
+print(" Run: python validation_accuracy.py")
 print()
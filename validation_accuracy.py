@@ -1,62 +1,60 @@
 """
 Accuracy Calculator
-Analyzes validation results and generates accuracy report
+Compares extracted contracts against ground truth and generates accuracy report
+
+Usage:
+    python validation_accuracy.py                          # Evaluate contracts.db
+    python validation_accuracy.py --import-csv data/validation.csv
+    python validation_accuracy.py --mismatches             # List every wrong field
 """
 
-import csv
-from collections import defaultdict
+import argparse
+import time
+
+from src.evaluation import EvaluationStore
+
+parser = argparse.ArgumentParser(description="Field-level accuracy report")
+parser.add_argument("--db", default="data/contracts.db", help="Contracts database with ground truth")
+parser.add_argument("--import-csv", metavar="PATH", help="Load reviewed rows from a validation CSV first")
+parser.add_argument("--workers", type=int, default=None, help="Comparison processes (default: CPU count)")
+parser.add_argument("--mismatches", action="store_true", help="List every mismatched field")
+args = parser.parse_args()
 
 print("=" * 60)
 print("ACCURACY VALIDATION REPORT")
 print("=" * 60)
 print()
 
-# Read validation CSV
-csv_path = 'data/validation.csv'
-
-# Track results
-total_checked = 0
-total_correct = 0
-field_stats = defaultdict(lambda: {'total': 0, 'correct': 0})
-contract_stats = defaultdict(lambda: {'total': 0, 'correct': 0})
-
-with open(csv_path, 'r', encoding='utf-8') as f:
-    reader = csv.DictReader(f)
-    
-    for row in reader:
-        # Skip rows that haven't been validated yet
-        if not row['Match']:
-            continue
-        
-        total_checked += 1
-        field_name = row['Field_Name']
-        contract_id = row['Contract_ID']
-        match = row['Match'].upper()
-        
-        # Update totals
-        field_stats[field_name]['total'] += 1
-        contract_stats[contract_id]['total'] += 1
-        
-        if match == 'TRUE':
-            total_correct += 1
-            field_stats[field_name]['correct'] += 1
-            contract_stats[contract_id]['correct'] += 1
-
-# Calculate overall accuracy
-if total_checked > 0:
-    overall_accuracy = (total_correct / total_checked) * 100
-else:
-    print(" No validated rows found!")
-    print("Make sure you filled in the 'Match' column (TRUE/FALSE)")
+store = EvaluationStore(args.db)
+
+if args.import_csv:
+    imported = store.import_validation_csv(args.import_csv)
+    print(f" Imported {imported} ground truth rows from {args.import_csv}")
+    print()
+
+if store.count() == 0:
+    print(" No ground truth found!")
+    print("Run: python validation_accuracy.py --import-csv data/validation.csv")
+    store.close()
+    exit()
+
+start = time.perf_counter()
+report = store.evaluate(workers=args.workers)
+elapsed = time.perf_counter() - start
+store.close()
+
+if report['total'] == 0:
+    print(" No extracted contracts match the ground truth filenames!")
     exit()
 
 # Display results
 print(f" OVERALL METRICS")
 print("-" * 60)
-print(f"Total Fields Validated:  {total_checked}")
-print(f"Correct Extractions:     {total_correct}")
-print(f"Incorrect Extractions:   {total_checked - total_correct}")
-print(f"Overall Accuracy:        {overall_accuracy:.1f}%")
+print(f"Total Fields Validated:  {report['total']}")
+print(f"Correct Extractions:     {report['correct']}")
+print(f"Incorrect Extractions:   {report['total'] - report['correct']}")
+print(f"Overall Accuracy:        {report['accuracy']:.1f}%")
+print(f"Evaluation Time:         {elapsed:.2f}s")
 print()
 
 # Per-field accuracy
@@ -65,9 +63,8 @@ print("-" * 60)
 print(f"{'Field Name':<25} {'Correct':<10} {'Total':<10} {'Accuracy':<10}")
 print("-" * 60)
 
-for field, stats in sorted(field_stats.items()):
-    accuracy = (stats['correct'] / stats['total']) * 100 if stats['total'] > 0 else 0
-    print(f"{field:<25} {stats['correct']:<10} {stats['total']:<10} {accuracy:>6.1f}%")
+for field, stats in sorted(report['per_field'].items()):
+    print(f"{field:<25} {stats['correct']:<10} {stats['total']:<10} {stats['accuracy']:>6.1f}%")
 
 print("-" * 60)
 print()
@@ -75,17 +72,25 @@ print()
 # Per-contract accuracy
 print(f" PER-CONTRACT ACCURACY")
 print("-" * 60)
-print(f"{'Contract ID':<15} {'Correct':<10} {'Total':<10} {'Accuracy':<10}")
+print(f"{'Contract':<40} {'Correct':<10} {'Total':<10} {'Accuracy':<10}")
 print("-" * 60)
 
-for contract_id, stats in sorted(contract_stats.items(), key=lambda x: int(x[0])):
-    accuracy = (stats['correct'] / stats['total']) * 100 if stats['total'] > 0 else 0
-    print(f"{contract_id:<15} {stats['correct']:<10} {stats['total']:<10} {accuracy:>6.1f}%")
+for filename, stats in sorted(report['per_contract'].items()):
+    print(f"{filename[:39]:<40} {stats['correct']:<10} {stats['total']:<10} {stats['accuracy']:>6.1f}%")
 
 print("-" * 60)
 print()
 
+if args.mismatches and report['mismatches']:
+    print(" MISMATCHES")
+    print("-" * 60)
+    for item in report['mismatches']:
+        print(f"{item['contract']} / {item['field']}")
+        print(f"    Extracted: {item['extracted']}")
+        print(f"    Actual:    {item['actual']}")
+    print()
+
 # Summary
 print(" VALIDATION COMPLETE!")
 print()
-print(f"Validated {len(contract_stats)} contracts with {overall_accuracy:.1f}% accuracy")
+print(f"Validated {len(report['per_contract'])} contracts with {report['accuracy']:.1f}% accuracy")